@@ -0,0 +1 @@
+"""Benchmarks for GPT-Rewind, run from the repository root with python -m benchmarks.<name>"""
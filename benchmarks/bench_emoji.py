@@ -0,0 +1,70 @@
+"""
+Emoji counting on a synthetic response corpus (50 MB by default): the
+previous per-character EMOJI_DATA loop against the compiled sequence matcher.
+
+    python -m benchmarks.bench_emoji --size-mb 50
+"""
+import random
+import click
+import emoji
+
+from rewind.utils.emoji_utils import count_emojis
+from benchmarks.common import MB, timed, print_rows
+
+WORDS = ("the answer is here so we write some code 我们 今天 写 一些 代码 这个 问题 "
+         "非常 有意思 请 帮 我 看看 def return print value list").split()
+
+
+def _legacy_count(texts: list) -> dict:
+    """_count_emojis before the sequence matcher"""
+    emoji_stats = {}
+    for text in texts:
+        for char in text:
+            if char in emoji.EMOJI_DATA:
+                emoji_stats[char] = emoji_stats.get(char, 0) + 1
+    return emoji_stats
+
+
+def _sequence_count(texts: list) -> dict:
+    emoji_stats = {}
+    for text in texts:
+        count_emojis(text, emoji_stats)
+    return emoji_stats
+
+
+def _corpus(size_mb: float, emoji_share: float, seed: int = 0) -> list:
+    """responses of random words with emojis, ZWJ sequences, flags and skin tones mixed in"""
+    rng = random.Random(seed)
+    emojis = list(emoji.EMOJI_DATA)
+    texts, size = [], 0
+    while size < size_mb * MB:
+        tokens = [rng.choice(emojis) if rng.random() < emoji_share else rng.choice(WORDS)
+                  for _ in range(rng.randrange(50, 400))]
+        text = " ".join(tokens)
+        texts.append(text)
+        size += len(text.encode("utf-8"))
+    return texts
+
+
+@click.command()
+@click.option("--size-mb", default=50.0, show_default=True, help="Size of the response corpus")
+@click.option("--emoji-share", default=0.02, show_default=True,
+              help="Share of tokens that are emojis")
+@click.option("--repeat", default=1, show_default=True, help="Runs per measurement, best kept")
+def main(size_mb, emoji_share, repeat):
+    """Report seconds, MB/s and the number of emojis each counter finds"""
+    texts = _corpus(size_mb, emoji_share)
+    size = sum(len(text.encode("utf-8")) for text in texts) / MB
+    print(f"{len(texts)} responses, {size:.1f} MB")
+
+    rows = {}
+    for name, counter in (("per-character loop", _legacy_count),
+                          ("sequence matcher", _sequence_count)):
+        seconds, stats = timed(lambda counter=counter: counter(texts), repeat)
+        rows[name] = {"seconds": seconds, "MB/s": size / seconds,
+                      "emojis": sum(stats.values()), "distinct": len(stats)}
+    print_rows(rows, ["seconds", "MB/s", "emojis", "distinct"])
+
+
+if __name__ == "__main__":
+    main()  # pylint: disable=no-value-for-parameter
@@ -0,0 +1,54 @@
+"""
+Parse throughput of every installed JSON backend on the bundled example
+exports scaled up to --size-mb (100 MB by default).
+
+    python -m benchmarks.bench_json_backend --size-mb 100
+"""
+import os
+import click
+
+from rewind.utils.json_backend import ACTIVE_BACKEND, available_backends
+from rewind.data_process.loading_data import iter_sessions
+from benchmarks.common import EXAMPLE_EXPORTS, write_scaled_export, timed, file_mb, print_rows
+
+
+def _read_bytes(path: str) -> bytes:
+    with open(path, 'rb') as file:
+        return file.read()
+
+
+def _bench_file(path: str, provider_type, repeat: int) -> dict:
+    """rows of seconds and MB/s for one scaled export"""
+    size = file_mb(path)
+    raw = _read_bytes(path)
+
+    rows = {}
+    for backend in available_backends():
+        seconds, _ = timed(lambda backend=backend: backend.loads(raw), repeat)
+        rows[f"{backend.name} loads"] = {"seconds": seconds, "MB/s": size / seconds}
+
+    seconds, _ = timed(lambda: ACTIVE_BACKEND.load_file(path), repeat)
+    rows["load_json (read + parse)"] = {"seconds": seconds, "MB/s": size / seconds}
+
+    seconds, count = timed(lambda: sum(1 for _ in iter_sessions(path, provider_type)), repeat)
+    rows[f"iter_sessions ({count} sessions)"] = {"seconds": seconds, "MB/s": size / seconds}
+    return rows
+
+
+@click.command()
+@click.option("--size-mb", default=100.0, show_default=True, help="Size of each scaled export")
+@click.option("--repeat", default=3, show_default=True, help="Runs per measurement, best kept")
+def main(size_mb, repeat):
+    """Report MB/s per backend for whole-file loads and for the streaming loader"""
+    print(f"Selected backend: {ACTIVE_BACKEND.name}")
+    for provider_type in EXAMPLE_EXPORTS:
+        path = write_scaled_export(provider_type, size_mb)
+        try:
+            print(f"\n{provider_type.value}: {file_mb(path):.1f} MB")
+            print_rows(_bench_file(path, provider_type, repeat), ["seconds", "MB/s"])
+        finally:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()  # pylint: disable=no-value-for-parameter
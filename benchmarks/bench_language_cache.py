@@ -0,0 +1,50 @@
+"""
+Detection work saved by the language cache on the bundled example exports:
+a cold run, a repeat in the same process (memory hits) and a repeat in a new
+process (sqlite hits only).
+
+    python -m benchmarks.bench_language_cache
+"""
+import os
+import tempfile
+import click
+
+from rewind.utils.language_cache import LanguageCache
+from rewind.utils.language_utils import DETECTOR_TAG, detect_language_uncached
+from benchmarks.common import EXAMPLE_EXPORTS, fragment_texts, timed, print_rows
+
+
+def _detect_all(texts: list, cache: LanguageCache) -> None:
+    for text in texts:
+        if cache.get(text) is None:
+            cache.put(text, detect_language_uncached(text))
+    cache.flush()
+
+
+@click.command()
+@click.option("--copies", default=3, show_default=True,
+              help="Times the example fragments repeat within one run")
+def main(copies):
+    """Report seconds and hit rates for cold, memory-warm and disk-warm runs"""
+    texts = fragment_texts(EXAMPLE_EXPORTS) * copies
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "languages.sqlite3")
+        cache = LanguageCache(db_path, DETECTOR_TAG)
+        rows = {}
+        runs = [("cold", cache), ("repeat, same process", cache),
+                ("repeat, new process", LanguageCache(db_path, DETECTOR_TAG))]
+        for name, run_cache in runs:
+            before = run_cache.stats.as_dict()
+            seconds, _ = timed(lambda run_cache=run_cache: _detect_all(texts, run_cache), 1)
+            after = run_cache.stats.as_dict()
+            lookups = after["lookups"] - before["lookups"]
+            misses = after["misses"] - before["misses"]
+            rows[name] = {"seconds": seconds, "detected": misses,
+                          "hit rate": (lookups - misses) / lookups if lookups else 0.0}
+
+    print(f"{len(texts)} fragments, {len(set(texts))} distinct")
+    print_rows(rows, ["seconds", "detected", "hit rate"])
+
+
+if __name__ == "__main__":
+    main()  # pylint: disable=no-value-for-parameter
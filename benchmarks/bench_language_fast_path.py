@@ -0,0 +1,63 @@
+"""
+Share of fragments the script histogram classifies without langdetect, and
+the detection speedup over the previous path (character loop + langdetect).
+Runs on the bundled examples, or on any export given with --file.
+
+    python -m benchmarks.bench_language_fast_path
+    python -m benchmarks.bench_language_fast_path --file conversations.json --provider deepseek
+"""
+import click
+from langdetect import detect, LangDetectException
+
+from rewind.utils.providers import ProviderType
+from rewind.utils.language_utils import detect_language_uncached
+from rewind.utils.script_utils import classify_by_script
+from benchmarks.common import fragment_texts_of, timed, print_rows
+
+
+def _legacy_detect(sentence: str) -> str:
+    """detect_language before the script fast path"""
+    if not sentence.strip():
+        return "unknown"
+    chinese_count = english_count = 0
+    for char in sentence:
+        if '\u4e00' <= char <= '\u9fff':
+            chinese_count += 1
+        elif char.isalpha() and ord(char) < 128:
+            english_count += 1
+    if chinese_count > english_count:
+        return "zh-cn"
+    try:
+        return detect(sentence)
+    except LangDetectException:
+        return "unknown"
+
+
+@click.command()
+@click.option("--file", "file_path", default=None, help="Export to measure instead of the examples")
+@click.option("--provider", default="deepseek", show_default=True,
+              type=click.Choice([provider.value for provider in ProviderType]))
+@click.option("--repeat", default=3, show_default=True, help="Runs per measurement, best kept")
+def main(file_path, provider, repeat):
+    """Report the short-circuited fraction, agreement and speedup"""
+    texts = fragment_texts_of(file_path, provider)
+    if not texts:
+        print("No fragments found.")
+        return
+
+    decided = [text for text in texts if text.strip() and classify_by_script(text) is not None]
+    legacy_seconds, legacy = timed(lambda: [_legacy_detect(text) for text in texts], repeat)
+    fast_seconds, fast = timed(lambda: [detect_language_uncached(text) for text in texts], repeat)
+    agreement = sum(1 for old, new in zip(legacy, fast) if old == new) / len(texts)
+
+    print(f"{len(texts)} fragments, {len(decided) / len(texts):.1%} short-circuited, "
+          f"{agreement:.1%} same language as before")
+    print_rows({
+        "character loop + langdetect": {"seconds": legacy_seconds, "speedup": 1.0},
+        "script histogram fast path": {"seconds": fast_seconds,
+                                       "speedup": legacy_seconds / fast_seconds},
+    }, ["seconds", "speedup"])
+
+
+if __name__ == "__main__":
+    main()  # pylint: disable=no-value-for-parameter
@@ -0,0 +1,54 @@
+"""
+Accuracy against speed of sampled language detection: every fragment is
+detected on its whole text and on code-stripped samples of several sizes,
+and each sample size reports its agreement with whole-text detection.
+Runs on the bundled examples, or on any export given with --file.
+
+    python -m benchmarks.bench_language_sampling
+    python -m benchmarks.bench_language_sampling --file conversations.json --sizes 250,1000
+"""
+import click
+
+from rewind.utils.providers import ProviderType
+from rewind.utils.language_utils import detect_language_uncached, detection_sample
+from benchmarks.common import fragment_texts_of, timed, print_rows
+
+
+def _detect_all(texts: list, sample_chars: int) -> list:
+    return [detect_language_uncached(text, sample_chars) for text in texts]
+
+
+@click.command()
+@click.option("--file", "file_path", default=None, help="Export to measure instead of the examples")
+@click.option("--provider", default="deepseek", show_default=True,
+              type=click.Choice([provider.value for provider in ProviderType]))
+@click.option("--sizes", default="250,500,1000,2000", show_default=True,
+              help="Comma separated sample sizes in characters")
+@click.option("--repeat", default=3, show_default=True, help="Runs per measurement, best kept")
+def main(file_path, provider, sizes, repeat):
+    """Report seconds, speedup and agreement with whole-text detection per sample size"""
+    texts = fragment_texts_of(file_path, provider)
+    if not texts:
+        print("No fragments found.")
+        return
+    total_chars = sum(len(text) for text in texts)
+    print(f"{len(texts)} fragments, {total_chars} characters, "
+          f"longest {max(len(text) for text in texts)}")
+
+    full_seconds, full = timed(lambda: _detect_all(texts, 0), repeat)
+    rows = {"whole text": {"seconds": full_seconds, "speedup": 1.0, "chars read": 1.0,
+                           "agreement": 1.0}}
+    for size in (int(value) for value in sizes.split(",")):
+        seconds, sampled = timed(lambda size=size: _detect_all(texts, size), repeat)
+        sampled_chars = sum(len(detection_sample(text, size)) for text in texts)
+        rows[f"sample {size}"] = {
+            "seconds": seconds,
+            "speedup": full_seconds / seconds,
+            "chars read": sampled_chars / total_chars,
+            "agreement": sum(1 for a, b in zip(full, sampled) if a == b) / len(texts),
+        }
+    print_rows(rows, ["seconds", "speedup", "chars read", "agreement"])
+
+
+if __name__ == "__main__":
+    main()  # pylint: disable=no-value-for-parameter
@@ -0,0 +1,80 @@
+"""
+Time to get the normalized sessions of an export: parsed and normalized from
+the raw export, versus read back from the normalized session cache. Uses the
+bundled example exports scaled up to --size-mb (50 MB by default), or one
+export given with --file/--provider.
+
+    python -m benchmarks.bench_session_cache --size-mb 50
+"""
+import os
+import shutil
+import tempfile
+import click
+
+from rewind.utils.providers import ProviderType
+from rewind.utils.cache_utils import CacheManager
+from rewind.data_process.update_data import NormalizedSessions
+from rewind.data_process.session_cache import CachedSessions
+from benchmarks.common import EXAMPLE_EXPORTS, MB, write_scaled_export, timed, file_mb, \
+    print_rows
+
+
+def _count(sessions) -> int:
+    return sum(1 for _ in sessions)
+
+
+def _bench_file(path: str, provider_type: ProviderType, repeat: int) -> dict:
+    """rows of seconds, MB/s of the export and speedup over normalizing"""
+    size = file_mb(path)
+    cache_dir = tempfile.mkdtemp(prefix="rewind_sessions_")
+    try:
+        cache = CacheManager(cache_dir, max_entries=0, max_bytes=0)
+        rows = {}
+
+        seconds, count = timed(lambda: _count(NormalizedSessions(path, provider_type)), repeat)
+        rows[f"normalize ({count} sessions)"] = {"seconds": seconds, "MB/s": size / seconds}
+        baseline = seconds
+
+        def write_through():
+            for entry in os.listdir(cache_dir):
+                os.remove(os.path.join(cache_dir, entry))
+            return _count(CachedSessions(path, provider_type, cache))
+
+        seconds, _ = timed(write_through, repeat)
+        rows["normalize + write cache"] = {"seconds": seconds, "MB/s": size / seconds}
+
+        entry_bytes = sum(os.path.getsize(os.path.join(cache_dir, entry))
+                          for entry in os.listdir(cache_dir) if entry.endswith(".pkl"))
+        seconds, _ = timed(lambda: _count(CachedSessions(path, provider_type, cache)), repeat)
+        rows[f"cache load ({entry_bytes / MB:.1f} MB entry)"] = {
+            "seconds": seconds, "MB/s": size / seconds, "speedup": baseline / seconds}
+        return rows
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+@click.command()
+@click.option("--size-mb", default=50.0, show_default=True, help="Size of each scaled export")
+@click.option("--repeat", default=3, show_default=True, help="Runs per measurement, best kept")
+@click.option("--file", "file_path", default=None, help="Benchmark this export instead")
+@click.option("--provider", default="deepseek", show_default=True,
+              type=click.Choice([provider.value for provider in ProviderType]),
+              help="Provider of --file")
+def main(size_mb, repeat, file_path, provider):
+    """Compare raw parse + normalize time with normalized session cache load time"""
+    if file_path:
+        print(f"{provider}: {file_mb(file_path):.1f} MB")
+        print_rows(_bench_file(file_path, ProviderType(provider), repeat),
+                   ["seconds", "MB/s", "speedup"])
+        return
+    for provider_type in EXAMPLE_EXPORTS:
+        path = write_scaled_export(provider_type, size_mb)
+        try:
+            print(f"\n{provider_type.value}: {file_mb(path):.1f} MB")
+            print_rows(_bench_file(path, provider_type, repeat), ["seconds", "MB/s", "speedup"])
+        finally:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()  # pylint: disable=no-value-for-parameter
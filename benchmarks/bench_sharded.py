@@ -0,0 +1,79 @@
+"""
+Scaling of sharded analysis: every metric over the normalized sessions of an
+export, scanned in-process with 1 worker and in shards on a ShardPool of 2, 4
+and 8 workers. Speedup is over the first worker count, efficiency is speedup
+per added worker relative to it.
+Uses the bundled DeepSeek example scaled up to --size-mb (50 MB by default),
+or one export given with --file/--provider. Worker start-up is timed apart.
+
+    python -m benchmarks.bench_sharded --size-mb 50 --workers 1,2,4,8
+"""
+import functools
+import os
+import time
+import click
+
+from rewind.utils.providers import ProviderType
+from rewind.data_process.update_data import NormalizedSessions
+from rewind.data_process.accumulators import feed_sessions
+from rewind.data_process.analysis_session import default_accumulators, finalize_metrics
+from rewind.data_process.sharded import ShardPool, feed_sharded
+from benchmarks.common import write_scaled_export, timed, file_mb, print_rows
+
+
+def _analyze(sessions, workers: int, shard_pool: ShardPool):
+    if workers == 1:
+        return finalize_metrics(feed_sessions(sessions, default_accumulators()))
+    return finalize_metrics(feed_sharded(sessions, default_accumulators, shard_pool))
+
+
+def _bench_file(path: str, provider_type: ProviderType, worker_counts, repeat: int) -> dict:
+    """rows of seconds, MB/s, speedup and efficiency per worker count"""
+    size = file_mb(path)
+    sessions = list(NormalizedSessions(path, provider_type))
+    rows, baseline = {}, None
+    for workers in worker_counts:
+        shard_pool = ShardPool(workers)
+        try:
+            start = time.perf_counter()
+            _analyze(sessions, workers, shard_pool)
+            first = time.perf_counter() - start
+            seconds, _ = timed(functools.partial(_analyze, sessions, workers, shard_pool), repeat)
+        finally:
+            shard_pool.shutdown()
+        baseline = baseline or (seconds, workers)
+        speedup = baseline[0] / seconds
+        rows[f"{workers} worker{'s' if workers > 1 else ''}"] = {
+            "seconds": seconds, "first run": first, "MB/s": size / seconds,
+            "speedup": speedup, "efficiency": speedup * baseline[1] / workers}
+    return rows
+
+
+@click.command()
+@click.option("--size-mb", default=50.0, show_default=True, help="Size of the scaled export")
+@click.option("--workers", "worker_list", default="1,2,4,8", show_default=True,
+              help="Comma-separated worker counts, the first one is the baseline")
+@click.option("--repeat", default=3, show_default=True, help="Runs per measurement, best kept")
+@click.option("--file", "file_path", default=None, help="Benchmark this export instead")
+@click.option("--provider", default="deepseek", show_default=True,
+              type=click.Choice([provider.value for provider in ProviderType]),
+              help="Provider of --file")
+def main(size_mb, worker_list, repeat, file_path, provider):
+    """Report sharded analysis time and scaling efficiency per worker count"""
+    worker_counts = [int(workers) for workers in worker_list.split(",")]
+    columns = ["seconds", "first run", "MB/s", "speedup", "efficiency"]
+    print(f"{os.cpu_count()} CPUs")
+    if file_path:
+        print(f"{provider}: {file_mb(file_path):.1f} MB")
+        print_rows(_bench_file(file_path, ProviderType(provider), worker_counts, repeat), columns)
+        return
+    path = write_scaled_export(ProviderType.DEEPSEEK, size_mb)
+    try:
+        print(f"deepseek: {file_mb(path):.1f} MB")
+        print_rows(_bench_file(path, ProviderType.DEEPSEEK, worker_counts, repeat), columns)
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()  # pylint: disable=no-value-for-parameter
@@ -0,0 +1,105 @@
+"""Shared helpers for benchmarks: scaled copies of the bundled example exports"""
+import json
+import os
+import tempfile
+import time
+from typing import Any, Callable, Dict, Tuple
+
+from rewind.utils.providers import ProviderType
+from rewind.data_process.update_data import NormalizedSessions
+
+EXAMPLE_EXPORTS = {
+    ProviderType.DEEPSEEK: "data/example_deepseek.json",
+    ProviderType.QWEN: "data/example_qwen.json",
+}
+
+MB = 1024 * 1024
+
+
+def _example_sessions(provider_type: ProviderType) -> Tuple[Any, list]:
+    """(raw document, its session list) of a bundled example"""
+    with open(EXAMPLE_EXPORTS[provider_type], 'r', encoding='utf-8') as file:
+        document = json.load(file)
+    sessions = document["data"] if provider_type == ProviderType.QWEN else document
+    return document, sessions
+
+
+def write_scaled_export(provider_type: ProviderType, target_mb: float, directory: str = None) \
+    -> str:
+    """
+    Write a copy of a bundled example with its sessions repeated until the file
+    reaches target_mb. Every copy gets its own session id. Returns the file path.
+    """
+    document, sessions = _example_sessions(provider_type)
+    encoded = [json.dumps(session, ensure_ascii=False) for session in sessions]
+    original_ids = [session.get("id", "") for session in sessions]
+
+    handle, path = tempfile.mkstemp(prefix=f"rewind_{provider_type.value}_", suffix=".json",
+                                    dir=directory)
+    target_bytes = int(target_mb * MB)
+    with os.fdopen(handle, 'w', encoding='utf-8') as file:
+        file.write(_array_opening(provider_type, document))
+        written, copy_index = 0, 0
+        while written < target_bytes:
+            for text, original_id in zip(encoded, original_ids):
+                if written:
+                    file.write(",\n")
+                if original_id:
+                    text = text.replace(f'"id": "{original_id}"',
+                                        f'"id": "{original_id}-{copy_index}"', 1)
+                file.write(text)
+                written += len(text.encode('utf-8')) + 2
+            copy_index += 1
+        file.write("]}" if provider_type == ProviderType.QWEN else "]")
+    return path
+
+
+def _array_opening(provider_type: ProviderType, document: Any) -> str:
+    """text up to and including the '[' of the session array"""
+    if provider_type == ProviderType.QWEN:
+        header = {key: value for key, value in document.items() if key != "data"}
+        return json.dumps(header, ensure_ascii=False)[:-1] + ', "data": ['
+    return "["
+
+
+def timed(func: Callable[[], Any], repeat: int = 3) -> Tuple[float, Any]:
+    """best wall time of several runs and the last result"""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def file_mb(path: str) -> float:
+    """file size in MB"""
+    return os.path.getsize(path) / MB
+
+
+def print_rows(rows: Dict[str, Dict[str, Any]], columns: list) -> None:
+    """print a small aligned result table"""
+    width = max(len(name) for name in rows) + 2
+    print("".ljust(width) + "".join(column.rjust(14) for column in columns))
+    for name, row in rows.items():
+        cells = []
+        for column in columns:
+            value = row.get(column, "")
+            cells.append((f"{value:.2f}" if isinstance(value, float) else str(value)).rjust(14))
+        print(name.ljust(width) + "".join(cells))
+
+
+def fragment_texts_of(file_path: str = None, provider: str = "deepseek") -> list:
+    """fragment texts of an export given on the command line, else of the examples"""
+    exports = {ProviderType(provider): file_path} if file_path else EXAMPLE_EXPORTS
+    return fragment_texts(exports)
+
+
+def fragment_texts(exports: Dict[ProviderType, str]) -> list:
+    """content of every normalized fragment of some exports, in order"""
+    texts = []
+    for provider_type, path in exports.items():
+        for session in NormalizedSessions(path, provider_type):
+            for message in session.messages:
+                texts.extend(fragment.content for fragment in message.fragments)
+    return texts
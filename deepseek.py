@@ -13,7 +13,17 @@ from datetime import datetime
 from flask import Flask, request, jsonify, render_template, send_from_directory
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
-from rewind.utils.providers import ProviderType
+from rewind.utils.providers import AUTO_PROVIDER, ProviderType
+from rewind.utils.language_pool import default_worker_count, get_shared_pool
+from rewind.utils.language_cache import get_language_cache
+from rewind.utils.cache_utils import get_cache_manager
+from rewind.data_process.session_cache import SESSION_CACHE_ENV, get_session_cache
+from rewind.data_process.incremental import INCREMENTAL_ENV
+from rewind.data_process.update_data import supported_provider
+from rewind.data_process.sharded import default_shard_workers, get_shard_pool
+from rewind.data_process.loading_data import (DETECT_PREFIX_BYTES, detect_provider,
+                                              detect_provider_from_prefix)
+from rewind.utils.timezones import zone_offsets
 
 # Configure logging
 logging.basicConfig(
@@ -41,6 +51,8 @@ try:
         per_hour_distribution,
         time_limit,
     )
+    from rewind.apis.report_api import combined_report
+    from rewind.data_process import release_analysis_session
     logger.info("✓ All API modules loaded successfully")
 except ImportError as import_err:
     logger.warning("⚠ Some API modules failed to load: %s", import_err)
@@ -59,6 +71,19 @@ MAX_FILE_SIZE = 100 * 1024 * 1024  # 100MB
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = MAX_FILE_SIZE
+# Language detection worker processes, shared by all requests; one per CPU
+# unless REWIND_DETECT_WORKERS says otherwise
+app.config['DETECT_WORKERS'] = default_worker_count(os.cpu_count() or 1)
+# Processes scanning shards of the sessions of one export, 1 scans in-process
+app.config['SHARD_WORKERS'] = default_shard_workers()
+# IANA zone of the day/hour distributions when a request names none;
+# None buckets times on the clock the export wrote them in
+app.config['TIMEZONE'] = None
+# Uploads are deleted once analyzed, but the normalized session cache would keep
+# their texts and the incremental store their titles and timestamps; the web app
+# runs without both unless REWIND_SESSION_CACHE / REWIND_INCREMENTAL turn them on
+os.environ.setdefault(SESSION_CACHE_ENV, 'off')
+os.environ.setdefault(INCREMENTAL_ENV, 'off')
 
 
 def allowed_file(filename):
@@ -74,7 +99,7 @@ def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
-def try_api(api_func, filepath, default_value, provider_type='deepseek'):
+def try_api(api_func, filepath, default_value, provider_type='deepseek', **kwargs):
     """
     Safely call an API function with error handling and provider type injection.
 
@@ -83,16 +108,17 @@ def try_api(api_func, filepath, default_value, provider_type='deepseek'):
         filepath: Path to the JSON file.
         default_value: Return value on failure.
         provider_type: The AI provider (deepseek, qwen, etc.).
+        **kwargs: Further keyword arguments of api_func, e.g. timezone.
 
     Returns:
         The result of api_func or default_value on error.
     """
     try:
         # 尝试调用带有 provider_type 参数的函数
-        return api_func(filepath, ProviderType(provider_type))
+        return api_func(filepath, ProviderType(provider_type), **kwargs)
     except TypeError:
         try:
-            return api_func(filepath)
+            return api_func(filepath, **kwargs)
         except Exception as exc:  # pylint: disable=broad-exception-caught
             logger.warning(
                 "API error in %s (fallback): %s",
@@ -104,6 +130,136 @@ def try_api(api_func, filepath, default_value, provider_type='deepseek'):
         return default_value
 
 
+def provider_from_filepath(filepath):
+    """
+    Recover the provider type from an uploaded file's name.
+
+    Args:
+        filepath (str): Path saved by /api/upload.
+
+    Returns:
+        str: The provider type, deepseek when the name does not carry one.
+    """
+    # 从文件名中解析 provider_type
+    try:
+        basename = os.path.basename(filepath)
+        # 分割文件名：timestamp___provider___filename
+        parts = basename.split('___')
+        if len(parts) >= 3:
+            return parts[1]
+        return 'deepseek'  # 默认回退
+    except Exception:  # pylint: disable=broad-exception-caught
+        return 'deepseek'
+
+
+def upload_exports(filepaths):
+    """
+    Pair uploaded files with their providers: the one a name carries, else
+    the one detected from the file's first bytes.
+
+    Args:
+        filepaths (list): Paths saved by /api/upload.
+
+    Returns:
+        tuple: ([(path, ProviderType), ...], None), or (None, which file has no known provider).
+    """
+    exports = []
+    for path in filepaths:
+        parts = os.path.basename(path).split('___')
+        try:
+            provider_type = ProviderType(parts[1]) if len(parts) >= 3 \
+                else detect_provider(path)
+        except (OSError, ValueError) as exc:
+            logger.warning("No provider for %s: %s", path, exc)
+            return None, f'Unknown provider of {path}'
+        try:
+            supported_provider(provider_type)
+        except ValueError as exc:
+            return None, f'{path}: {exc}'
+        exports.append((path, provider_type))
+    return exports, None
+
+
+def check_upload(uploaded_file, file_size, provider_type):
+    """
+    Check an upload's size, and its first bytes against the chosen provider.
+
+    Args:
+        uploaded_file (FileStorage): The uploaded file, read from the start.
+        file_size (int): Its size in bytes.
+        provider_type (str): The chosen provider, or auto to detect it.
+
+    Returns:
+        tuple: (provider, None), or (None, why the file cannot be analyzed).
+    """
+    if file_size > MAX_FILE_SIZE:
+        return None, f'File too large (max {MAX_FILE_SIZE} bytes)'
+    prefix = uploaded_file.read(DETECT_PREFIX_BYTES)
+    uploaded_file.seek(0)
+    try:
+        detected = detect_provider_from_prefix(prefix, uploaded_file.filename).value
+    except ValueError as exc:
+        # An export the detector does not know may still parse as the chosen provider
+        if provider_type == AUTO_PROVIDER:
+            return None, str(exc)
+        return supported_upload(provider_type)
+    if provider_type not in (AUTO_PROVIDER, detected):
+        return None, f'This looks like a {detected} export, not {provider_type}'
+    return supported_upload(detected)
+
+
+def supported_upload(provider):
+    """
+    Check that the exports of a provider can be analyzed.
+
+    Args:
+        provider (str): Provider chosen or detected for an upload.
+
+    Returns:
+        tuple: (provider, None), or (None, why it cannot be analyzed).
+    """
+    try:
+        supported_provider(ProviderType(provider))
+    except ValueError as exc:
+        return None, str(exc)
+    return provider, None
+
+
+def valid_timezone(timezone):
+    """
+    Check a requested IANA timezone.
+
+    Args:
+        timezone (str): Zone name, or None for the clock the export wrote.
+
+    Returns:
+        bool: False for an unknown zone.
+    """
+    if timezone:
+        try:
+            zone_offsets(timezone)
+        except ValueError:
+            logger.warning("Invalid timezone: %s", timezone)
+            return False
+    return True
+
+
+def remove_upload(filepath):
+    """
+    Drop an uploaded file and the analysis kept for it.
+
+    Args:
+        filepath (str): Path saved by /api/upload.
+    """
+    release_analysis_session(filepath)
+    try:
+        if os.path.exists(filepath):
+            os.remove(filepath)
+            logger.info("Cleaned up: %s", filepath)
+    except OSError as exc:
+        logger.warning("Failed to cleanup: %s", exc)
+
+
 @app.route('/')
 def index():
     """
@@ -120,7 +276,7 @@ def index():
 def upload_file():
     """
     Handle file upload requests.
-    Expects 'file' and 'provider_type' in FormData.
+    Expects 'file' and 'provider_type' (a provider, or auto to detect it) in FormData.
 
     Returns:
         JSON response with file path or error message.
@@ -132,8 +288,8 @@ def upload_file():
         return jsonify({'error': 'No file provided'}), 400
 
     uploaded_file = request.files['file']
-    # 从 FormData 获取 provider_type，默认为 deepseek
-    provider_type = request.form.get('provider_type', 'deepseek')
+    # 从 FormData 获取 provider_type，默认自动识别
+    provider_type = request.form.get('provider_type', AUTO_PROVIDER)
 
     if uploaded_file.filename == '':
         logger.warning("Empty filename")
@@ -144,22 +300,22 @@ def upload_file():
         return jsonify({'error': 'Only JSON files are supported'}), 400
 
     try:
-        # Validate file size before saving
+        # Validate file size and provider before saving
         uploaded_file.seek(0, os.SEEK_END)
         file_size = uploaded_file.tell()
         uploaded_file.seek(0)
 
-        if file_size > MAX_FILE_SIZE:
-            logger.warning("File too large: %d bytes", file_size)
-            return jsonify({
-                'error': f'File too large (max {MAX_FILE_SIZE} bytes)'
-            }), 400
+        # 读取文件开头识别厂商：auto 时据此确定，选错厂商时在完整解析前即报错
+        provider, error = check_upload(uploaded_file, file_size, provider_type)
+        if error:
+            logger.warning("Rejected upload %s: %s", uploaded_file.filename, error)
+            return jsonify({'error': error}), 400
 
         # Save file temporarily
         # 构造文件名格式：时间戳___厂商类型___原始文件名
         # 这样可以在 /api/analyze 阶段从文件名中还原出厂商类型，而无需修改前端 analyzeData 逻辑
         filename = secure_filename(uploaded_file.filename)
-        safe_provider = secure_filename(provider_type)
+        safe_provider = secure_filename(provider)
         timestamp = datetime.now().timestamp()
 
         # 使用三个下划线作为分隔符，降低文件名冲突概率
@@ -203,26 +359,27 @@ def analyze():
         logger.warning("Invalid filepath: %s", filepath)
         return jsonify({'error': 'Invalid file path'}), 400
 
-    # 从文件名中解析 provider_type
-    try:
-        basename = os.path.basename(filepath)
-        # 分割文件名：timestamp___provider___filename
-        parts = basename.split('___')
-        if len(parts) >= 3:
-            provider_type = parts[1]
-        else:
-            provider_type = 'deepseek'  # 默认回退
-    except Exception:  # pylint: disable=broad-exception-caught
-        provider_type = 'deepseek'
+    timezone = data.get('timezone') or app.config['TIMEZONE']
+    if not valid_timezone(timezone):
+        # Rejected uploads are dropped like analyzed ones
+        remove_upload(filepath)
+        return jsonify({'error': f'Invalid timezone: {timezone}'}), 400
+
+    provider_type = provider_from_filepath(filepath)
 
     logger.info(
         "Starting analysis for: %s using provider: %s",
         filepath, provider_type
     )
 
+    # Analyses reuse one detection and one shard pool; a changed worker count replaces them
+    get_shared_pool(app.config['DETECT_WORKERS'])
+    get_shard_pool(app.config['SHARD_WORKERS'])
+
     try:
         # Process the data with error handling
         # Pass provider_type to all try_api calls
+        # The API functions share one parsed AnalysisSession of the file
         # 格式化字典以避免行过长
         result = {
             'most_used_models': try_api(
@@ -244,10 +401,10 @@ def analyze():
                 polite_extent, filepath, [], provider_type
             ),
             'chat_days': try_api(
-                chat_days, filepath, [], provider_type
+                chat_days, filepath, [], provider_type, timezone=timezone
             ),
             'per_hour_distribution': try_api(
-                per_hour_distribution, filepath, {}, provider_type
+                per_hour_distribution, filepath, {}, provider_type, timezone=timezone
             ),
             'time_limit': try_api(
                 time_limit, filepath, [], provider_type
@@ -258,6 +415,9 @@ def analyze():
         }
 
         logger.info("Analysis completed successfully")
+        logger.info("Language cache: %s", get_language_cache().stats)
+        logger.info("Result cache: %s", get_cache_manager().stats)
+        logger.info("Session cache: %s", get_session_cache().stats)
         return jsonify(result), 200
 
     except Exception as exc:  # pylint: disable=broad-exception-caught
@@ -265,12 +425,55 @@ def analyze():
         return jsonify({'error': f'Analysis failed: {str(exc)}'}), 500
     finally:
         # Clean up uploaded file
-        try:
-            if os.path.exists(filepath):
-                os.remove(filepath)
-                logger.info("Cleaned up: %s", filepath)
-        except OSError as exc:
-            logger.warning("Failed to cleanup: %s", exc)
+        remove_upload(filepath)
+
+
+@app.route('/api/analyze/combined', methods=['POST'])
+def analyze_combined():
+    """
+    Analyze several uploaded chat records of any providers together.
+    Expects 'filepaths' from /api/upload, normalized concurrently.
+
+    Returns:
+        JSON response with the combined metrics, the metrics per provider
+        and the time each file took.
+    """
+    logger.info("POST /api/analyze/combined - Combined analysis request")
+
+    data = request.get_json()
+    filepaths = data.get('filepaths') or []
+
+    if not isinstance(filepaths, list) or not filepaths or \
+            not all(isinstance(path, str) and os.path.exists(path) for path in filepaths):
+        logger.warning("Invalid filepaths: %s", filepaths)
+        return jsonify({'error': 'Invalid file paths'}), 400
+
+    timezone = data.get('timezone') or app.config['TIMEZONE']
+    exports, error = upload_exports(filepaths)
+    if not valid_timezone(timezone):
+        error = f'Invalid timezone: {timezone}'
+    if error:
+        # Rejected uploads are dropped like analyzed ones
+        for path in filepaths:
+            remove_upload(path)
+        return jsonify({'error': error}), 400
+
+    get_shared_pool(app.config['DETECT_WORKERS'])
+    get_shard_pool(app.config['SHARD_WORKERS'])
+
+    try:
+        result = combined_report(exports, timezone)
+        for timing in result['files']:
+            logger.info("Analyzed %s [%s]: %d sessions in %.3fs", timing['file'],
+                        timing['provider'], timing['session_count'], timing['seconds'])
+        return jsonify(result), 200
+
+    except Exception as exc:  # pylint: disable=broad-exception-caught
+        logger.error("Combined analysis error: %s", str(exc))
+        return jsonify({'error': f'Analysis failed: {str(exc)}'}), 500
+    finally:
+        for path in filepaths:
+            remove_upload(path)
 
 
 @app.route('/api/static/<path:filename>')
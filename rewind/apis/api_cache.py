@@ -0,0 +1,42 @@
+"""
+Result cache of the API functions.
+cached_api keys a result by the content hash of the input file, the
+function, its other arguments (provider, timezone, ...), ANALYSIS_VERSION
+and config_tag(), so re-analyzing the same export, even uploaded again
+under a new name, skips loading and analysis entirely.
+"""
+import functools
+import inspect
+from enum import Enum
+from typing import Any, Callable
+
+from rewind.data_process.analysis_session import ANALYSIS_VERSION
+from rewind.utils.cache_utils import get_cache_manager
+from rewind.utils.config_tag import config_tag
+
+
+def _argument_text(value: Any) -> str:
+    return str(value.value) if isinstance(value, Enum) else repr(value)
+
+
+def cached_api(func: Callable) -> Callable:
+    """cache an API function taking the export path as its first argument"""
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(json_path: str, *args, **kwargs):
+        bound = signature.bind(json_path, *args, **kwargs)
+        bound.apply_defaults()
+        arguments = list(bound.arguments.items())[1:]
+        function_name = ":".join([func.__name__, f"v{ANALYSIS_VERSION}", config_tag()] +
+                                 [f"{name}={_argument_text(value)}" for name, value in arguments])
+
+        cache_manager = get_cache_manager()
+        cached_result = cache_manager.get(json_path, function_name)
+        if cached_result is not None:
+            return cached_result
+        result = func(*bound.args, **bound.kwargs)
+        cache_manager.set(json_path, function_name, result)
+        return result
+
+    return wrapper
@@ -1,36 +1,32 @@
 """basic api for data overview"""
 from typing import List, Dict, Any
-from rewind.data_process import (
-    session_count_stats,
-    prefer_model_count,
-    count_chars,
-    language_dominant_count,
-    code_language_count,
-    load_json,
-    update_data,
-    ai_refuse_count
-)
+from rewind.data_process import AnalysisSession, get_analysis_session
 from rewind.utils.providers import ProviderType
-from rewind.utils.cache_utils import get_cache_manager
-
-cache_manager = get_cache_manager()
+from rewind.apis.api_cache import cached_api
 
 
+@cached_api
 def session_count(json_path: str, provider_type: ProviderType = ProviderType.DEEPSEEK) \
     -> Dict[str, Any]:
     """get session count stats from json file"""
-    data = load_json(json_path)
-    data = update_data(data, provider_type)
+    return session_count_of(get_analysis_session(json_path, provider_type))
+
+
+def session_count_of(analysis: AnalysisSession) -> Dict[str, Any]:
+    """session_count of an AnalysisSession"""
+    return dict(analysis.metrics["session_count_stats"])
 
-    return session_count_stats(data)
 
+@cached_api
 def most_used_models(json_path: str, provider_type: ProviderType = ProviderType.DEEPSEEK) \
     -> List[Dict[str, Any]]:
     """how many times each model is used"""
-    data = load_json(json_path)
-    data = update_data(data, provider_type)
+    return most_used_models_of(get_analysis_session(json_path, provider_type))
 
-    model_counts = prefer_model_count(data)
+
+def most_used_models_of(analysis: AnalysisSession) -> List[Dict[str, Any]]:
+    """most_used_models of an AnalysisSession"""
+    model_counts = analysis.metrics["prefer_model_count"]
 
     answer_list = []
 
@@ -40,13 +36,16 @@ def most_used_models(json_path: str, provider_type: ProviderType = ProviderType.
     return answer_list
 
 
+@cached_api
 def total_characters(json_path: str, provider_type: ProviderType = ProviderType.DEEPSEEK) \
     -> List[Dict[str, Any]]:
     """how many characters each model has generated or user has inputted"""
-    data = load_json(json_path)
-    data = update_data(data, provider_type)
+    return total_characters_of(get_analysis_session(json_path, provider_type))
+
 
-    char_counts = count_chars(data)
+def total_characters_of(analysis: AnalysisSession) -> List[Dict[str, Any]]:
+    """total_characters of an AnalysisSession"""
+    char_counts = analysis.metrics["count_chars"]
 
     answer_list = []
 
@@ -57,18 +56,16 @@ def total_characters(json_path: str, provider_type: ProviderType = ProviderType.
     return answer_list
 
 
+@cached_api
 def most_used_language(json_path: str, provider_type: ProviderType = ProviderType.DEEPSEEK) \
     -> List[Dict[str, Any]]:
     """which language is used the most"""
-    # Try to get from cache
-    cached_result = cache_manager.get(json_path, f"most_used_language_{provider_type.value}")
-    if cached_result is not None:
-        return cached_result
+    return most_used_language_of(get_analysis_session(json_path, provider_type))
 
-    data = load_json(json_path)
-    data = update_data(data, provider_type)
 
-    natural_language_stats, _ = language_dominant_count(data)
+def most_used_language_of(analysis: AnalysisSession) -> List[Dict[str, Any]]:
+    """most_used_language of an AnalysisSession"""
+    natural_language_stats, _ = analysis.metrics["language_dominant_count"]
 
     answer_list = []
 
@@ -84,22 +81,25 @@ def most_used_language(json_path: str, provider_type: ProviderType = ProviderTyp
                     "language": lang_code
                 })
 
-    code_counts = code_language_count(data)
-    for key, count in code_counts.items():
-        answer_list.append({"model_type": "all", "counts": count, \
-            "type": "code", "language": key})
-
-    # Save to cache
-    cache_manager.set(json_path, f"most_used_language_{provider_type.value}", answer_list)
+    # code_block_stats structure: {"python": {"blocks": 3, "lines": 42, "bytes": 1234}}
+    block_stats = analysis.metrics["code_block_stats"]
+    for key, stats in block_stats.items():
+        answer_list.append({"model_type": "all", "counts": stats["blocks"], \
+            "type": "code", "language": key, "lines": stats["lines"], "bytes": stats["bytes"]})
 
     return answer_list
 
+
+@cached_api
 def refuse_counts(json_path: str, provider_type: ProviderType = ProviderType.DEEPSEEK) -> int:
     """how many refuse responses are there"""
-    data = load_json(json_path)
-    data = update_data(data, provider_type)
+    return refuse_counts_of(get_analysis_session(json_path, provider_type))
+
+
+def refuse_counts_of(analysis: AnalysisSession) -> int:
+    """refuse_counts of an AnalysisSession"""
+    return analysis.metrics["ai_refuse_count"]
 
-    return ai_refuse_count(data)
 
 def main():
     """base api testing"""
@@ -0,0 +1,58 @@
+"""combined report api over several exports of one or more providers"""
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from rewind.data_process import AnalysisSession
+from rewind.data_process.combined import combined_analysis
+from rewind.utils.providers import ProviderType
+from rewind.apis.base_api import (
+    most_used_models_of,
+    total_characters_of,
+    most_used_language_of,
+    refuse_counts_of,
+    session_count_of,
+)
+from rewind.apis.style_api import emoji_counts_of, polite_extent_of
+from rewind.apis.time_api import chat_days_of, per_hour_distribution_of, time_limit_of
+
+
+def analysis_report(analysis: AnalysisSession, timezone: Optional[str] = None) \
+    -> Dict[str, Any]:
+    """every API result of an analysis, keyed like the /api/analyze response"""
+    return {
+        'most_used_models': most_used_models_of(analysis),
+        'total_characters': total_characters_of(analysis),
+        'most_used_language': most_used_language_of(analysis),
+        'refuse_counts': refuse_counts_of(analysis),
+        'emoji_counts': emoji_counts_of(analysis),
+        'polite_extent': polite_extent_of(analysis),
+        'chat_days': chat_days_of(analysis, timezone),
+        'per_hour_distribution': per_hour_distribution_of(analysis, timezone),
+        'time_limit': time_limit_of(analysis),
+        'session_count': session_count_of(analysis),
+    }
+
+
+def combined_report(exports: Sequence[Tuple[str, ProviderType]],
+                    timezone: Optional[str] = None) -> Dict[str, Any]:
+    """
+    one report over (path, provider) exports normalized concurrently, with a
+    report per provider and how long each file took
+    """
+    analysis = combined_analysis(exports)
+    return {
+        'combined': analysis_report(analysis.combined, timezone),
+        'providers': {provider_type.value: analysis_report(provider_analysis, timezone)
+                      for provider_type, provider_analysis in analysis.providers.items()},
+        'files': analysis.files,
+        'seconds': round(analysis.seconds, 3),
+    }
+
+
+def main():
+    """main function"""
+    print(combined_report([("data/example_deepseek.json", ProviderType.DEEPSEEK),
+                           ("data/example_qwen.json", ProviderType.QWEN)]))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,33 @@
 """style api for data overview"""
 
 from typing import List, Dict, Any
-from rewind.data_process import (
-    emoji_count as _emoji_count,
-    polite_count,
-    load_json,
-    update_data,
-)
+from rewind.data_process import AnalysisSession, get_analysis_session
 from rewind.utils.providers import ProviderType
+from rewind.apis.api_cache import cached_api
+
+
+@cached_api
 def emoji_counts(json_path: str, provider_type: ProviderType = ProviderType.DEEPSEEK) \
     -> List[Dict[str, Any]]:
     """counting each emoji times"""
-
-    data = load_json(json_path)
-    data = update_data(data, provider_type= provider_type)
-
-    return _emoji_count(data)
+    return emoji_counts_of(get_analysis_session(json_path, provider_type))
 
 
+def emoji_counts_of(analysis: AnalysisSession) -> List[Dict[str, Any]]:
+    """emoji_counts of an AnalysisSession"""
+    return [dict(item) for item in analysis.metrics["emoji_count"]]
 
 
+@cached_api
 def polite_extent(json_path: str, provider_type: ProviderType = ProviderType.DEEPSEEK) \
     -> List[Dict[str, Any]]:
     """counting polite and impolite words, returns list of dicts"""
+    return polite_extent_of(get_analysis_session(json_path, provider_type))
 
-    data = load_json(json_path)
-    data = update_data(data, provider_type= provider_type)
 
-    return polite_count(data)
+def polite_extent_of(analysis: AnalysisSession) -> List[Dict[str, Any]]:
+    """polite_extent of an AnalysisSession"""
+    return [dict(item) for item in analysis.metrics["polite_count"]]
 
 
 def main():
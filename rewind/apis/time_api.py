@@ -1,23 +1,22 @@
 """time related api for data overview"""
-from typing import Dict, List, Any
-
-from rewind.data_process import (
-    load_json,
-    update_data,
-    chat_frequency_distribution,
-    chat_themost,
-    count_per_hour_distribution,
-)
+from typing import Dict, List, Any, Optional
+
+from rewind.data_process import AnalysisSession, get_analysis_session
 from rewind.utils.providers import ProviderType
+from rewind.apis.api_cache import cached_api
 
-def chat_days(json_path: str, provider_type: ProviderType = ProviderType.DEEPSEEK) \
-    -> List[Dict[str, Any]]:
-    """each day chat frequency"""
 
-    data = load_json(json_path)
-    data = update_data(data, provider_type=provider_type)
+@cached_api
+def chat_days(json_path: str, provider_type: ProviderType = ProviderType.DEEPSEEK,
+              timezone: Optional[str] = None) -> List[Dict[str, Any]]:
+    """each day chat frequency, days of the IANA timezone or as the export wrote them"""
+    return chat_days_of(get_analysis_session(json_path, provider_type), timezone)
+
 
-    full_distribution = chat_frequency_distribution(data)
+def chat_days_of(analysis: AnalysisSession, timezone: Optional[str] = None) \
+    -> List[Dict[str, Any]]:
+    """chat_days of an AnalysisSession"""
+    full_distribution = analysis.in_timezone(timezone)["chat_frequency_distribution"]
     day_distribution = full_distribution["day_distribution"]
 
     answer_list = []
@@ -26,14 +25,18 @@ def chat_days(json_path: str, provider_type: ProviderType = ProviderType.DEEPSEE
 
     return answer_list
 
-def chat_months(json_path: str, provider_type: ProviderType = ProviderType.DEEPSEEK) \
-    -> List[Dict[str, Any]]:
-    """each month chat frequency"""
 
-    data = load_json(json_path)
-    data = update_data(data, provider_type=provider_type)
+@cached_api
+def chat_months(json_path: str, provider_type: ProviderType = ProviderType.DEEPSEEK,
+                timezone: Optional[str] = None) -> List[Dict[str, Any]]:
+    """each month chat frequency, months of the IANA timezone or as the export wrote them"""
+    return chat_months_of(get_analysis_session(json_path, provider_type), timezone)
+
 
-    full_distribution = chat_frequency_distribution(data)
+def chat_months_of(analysis: AnalysisSession, timezone: Optional[str] = None) \
+    -> List[Dict[str, Any]]:
+    """chat_months of an AnalysisSession"""
+    full_distribution = analysis.in_timezone(timezone)["chat_frequency_distribution"]
     month_distribution = full_distribution["month_distribution"]
 
     answer_list = []
@@ -42,14 +45,17 @@ def chat_months(json_path: str, provider_type: ProviderType = ProviderType.DEEPS
 
     return answer_list
 
+
+@cached_api
 def time_limit(json_path: str, provider_type: ProviderType = ProviderType.DEEPSEEK) \
     -> List[Dict[str, Any]]:
     """time limit for earliest and latest"""
+    return time_limit_of(get_analysis_session(json_path, provider_type))
 
-    data = load_json(json_path)
-    data = update_data(data, provider_type=provider_type)
 
-    full_distribution = chat_themost(data)
+def time_limit_of(analysis: AnalysisSession) -> List[Dict[str, Any]]:
+    """time_limit of an AnalysisSession"""
+    full_distribution = analysis.metrics["chat_themost"]
     earliest_time = full_distribution["earliest_time"]
     latest_time = full_distribution["latest_time"]
     earliest_session = full_distribution["earliest_session"]
@@ -57,29 +63,34 @@ def time_limit(json_path: str, provider_type: ProviderType = ProviderType.DEEPSE
 
     # Extract key information from sessions for cleaner display
     earliest_session_info = {
-        "title": earliest_session.get("title", "Unknown Title"),
-        "inserted_at": earliest_session.get("inserted_at", "Unknown Time")
+        "title": earliest_session.title,
+        "inserted_at": earliest_session.inserted_at
     } if earliest_session else None
 
     latest_session_info = {
-        "title": latest_session.get("title", "Unknown Title"),
-        "inserted_at": latest_session.get("inserted_at", "Unknown Time")
+        "title": latest_session.title,
+        "inserted_at": latest_session.inserted_at
     } if latest_session else None
 
     return [{"earliest_time": earliest_time}, {"latest_time": latest_time},
             {"earliest_session": earliest_session_info}, {"latest_session": latest_session_info}]
 
-def per_hour_distribution(json_path: str, provider_type: ProviderType = ProviderType.DEEPSEEK) \
-    -> Dict[Any, Any]:
-    """distribution of sessions across 24 hours of the day"""
 
-    data = load_json(json_path)
-    data = update_data(data, provider_type=provider_type)
+@cached_api
+def per_hour_distribution(json_path: str, provider_type: ProviderType = ProviderType.DEEPSEEK,
+                          timezone: Optional[str] = None) -> Dict[Any, Any]:
+    """distribution of sessions across 24 hours of the day in the IANA timezone"""
+    return per_hour_distribution_of(get_analysis_session(json_path, provider_type), timezone)
 
-    hour_distribution = count_per_hour_distribution(data)
+
+def per_hour_distribution_of(analysis: AnalysisSession, timezone: Optional[str] = None) \
+    -> Dict[Any, Any]:
+    """per_hour_distribution of an AnalysisSession"""
+    hour_distribution = dict(analysis.in_timezone(timezone)["count_per_hour_distribution"])
 
     return hour_distribution
 
+
 def main():
     """main function"""
     data_path = "data/claude_conversations.json"
@@ -1,7 +1,9 @@
 """Handler for rewind cli"""
 import json
-from rewind.apis import base_api, style_api, time_api
-from rewind.utils.providers import ProviderType
+from rewind.apis import base_api, report_api, style_api, time_api
+from rewind.utils.providers import AUTO_PROVIDER, ProviderType
+from rewind.data_process.loading_data import detect_provider
+from rewind.data_process.update_data import supported_provider
 from rewind.cli.ui import (
     console,
     print_header,
@@ -14,14 +16,20 @@ from rewind.cli.ui import (
 )
 
 
-def get_provider_enum(provider_str):
-    """Convert string provider to ProviderType enum"""
-    return ProviderType(provider_str.lower())
+def get_provider_enum(provider_str, file=None):
+    """
+    Convert string provider to ProviderType enum, detected from the file for auto.
+    Raises ValueError for a provider whose exports cannot be analyzed yet.
+    """
+    if provider_str.lower() == AUTO_PROVIDER:
+        provider_type = detect_provider(file)
+        console.print(f"[dim]Detected provider: {provider_type.value} ({file})[/dim]")
+        return supported_provider(provider_type)
+    return supported_provider(ProviderType(provider_str.lower()))
 
 
-def _print_model_usage(file, provider_type):
+def _print_model_usage(models):
     print_header("Most Used Models")
-    models = base_api.most_used_models(file, provider_type)
     if models:
         try:
             models.sort(key=lambda x: x["usage"], reverse=True)
@@ -37,9 +45,8 @@ def _print_model_usage(file, provider_type):
         console.print("[yellow]No data available.[/yellow]")
 
 
-def _print_character_counts(file, provider_type):
+def _print_character_counts(chars):
     print_header("Total Characters")
-    chars = base_api.total_characters(file, provider_type)
     if chars:
         try:
             chars.sort(key=lambda x: x["counts"], reverse=True)
@@ -57,15 +64,15 @@ def _print_character_counts(file, provider_type):
         console.print("[yellow]No data available.[/yellow]")
 
 
-def _print_language_stats(file, provider_type):
+def _print_language_stats(langs):
     print_header("Most Used Language")
-    langs = base_api.most_used_language(file, provider_type)
     if not langs:
         console.print("[yellow]No data available.[/yellow]")
         return
 
     natural_summary = {}
     code_summary = {}
+    code_lines = {}
 
     for item in langs:
         lang = item.get("language", "unknown")
@@ -76,6 +83,7 @@ def _print_language_stats(file, provider_type):
             natural_summary[lang] = natural_summary.get(lang, 0) + count
         elif l_type == "code":
             code_summary[lang] = code_summary.get(lang, 0) + count
+            code_lines[lang] = code_lines.get(lang, 0) + item.get("lines", 0)
 
     if natural_summary:
         nat_list = [{"language": k, "count": v} for k, v in natural_summary.items()]
@@ -97,46 +105,56 @@ def _print_language_stats(file, provider_type):
             value_key="count",
         )
 
+    if any(code_lines.values()):
+        lines_list = [{"language": k, "lines": v} for k, v in code_lines.items()]
+        lines_list.sort(key=lambda x: x["lines"], reverse=True)
+        print_distribution_bar(
+            lines_list,
+            title="Lines of Code by Language",
+            label_key="language",
+            value_key="lines",
+        )
+
     if not natural_summary and not code_summary:
         console.print("[yellow]No data available.[/yellow]")
 
 
 def handle_overview(file, provider):
     """Handle overview analysis for the given file and provider."""
-    provider_type = get_provider_enum(provider)
     try:
+        provider_type = get_provider_enum(provider, file)
         print_header("Session Count Stats")
         print_simple_dict(base_api.session_count(file, provider_type))
 
-        _print_model_usage(file, provider_type)
-        _print_character_counts(file, provider_type)
-        _print_language_stats(file, provider_type)
+        _print_model_usage(base_api.most_used_models(file, provider_type))
+        _print_character_counts(base_api.total_characters(file, provider_type))
+        _print_language_stats(base_api.most_used_language(file, provider_type))
 
         print_header("Refuse Counts")
         console.print(
             f"[bold red]Refusals:[/bold red] {base_api.refuse_counts(file, provider_type)}"
         )
 
-    except (OSError, json.JSONDecodeError, AttributeError) as error:
+    except (OSError, json.JSONDecodeError, AttributeError, ValueError) as error:
         console.print(f"[bold red]Error:[/bold red] {error}")
 
 
 def handle_style(file, provider):
     """Handle style analysis for the given file and provider."""
-    provider_type = get_provider_enum(provider)
     try:
+        provider_type = get_provider_enum(provider, file)
         print_emoji_rect(style_api.emoji_counts(file, provider_type), title="Emoji Wall")
 
         print_header("Politeness Extent")
         print_table(style_api.polite_extent(file, provider_type))
 
-    except (OSError, json.JSONDecodeError, AttributeError) as error:
+    except (OSError, json.JSONDecodeError, AttributeError, ValueError) as error:
         console.print(f"[bold red]Error:[/bold red] {error}")
 
 
-def _print_monthly_frequency(file, provider_type):
+def _print_monthly_frequency(file, provider_type, timezone=None):
     # Removed "Chat Frequency by Day" as requested
-    months = time_api.chat_months(file, provider_type)
+    months = time_api.chat_months(file, provider_type, timezone)
     if months:
         try:
             months.sort(key=lambda x: x["date"])
@@ -153,8 +171,7 @@ def _print_monthly_frequency(file, provider_type):
         console.print("[yellow]No data available.[/yellow]")
 
 
-def _print_daily_heatmap(file, provider_type):
-    days = time_api.chat_days(file, provider_type)
+def _print_daily_heatmap(days):
     if days:
         print_heatmap(days, title="Daily Activity Heatmap")
     else:
@@ -162,18 +179,16 @@ def _print_daily_heatmap(file, provider_type):
         console.print("[yellow]No data available.[/yellow]")
 
 
-def _print_time_limits(file, provider_type):
+def _print_time_limits(limits):
     print_header("Time Limits")
-    limits = time_api.time_limit(file, provider_type)
     flat_limits = {}
     for item in limits:
         flat_limits.update(item)
     print_simple_dict(flat_limits)
 
 
-def _print_hourly_distribution(file, provider_type):
+def _print_hourly_distribution(dist):
     print_header("Per Hour Distribution")
-    dist = time_api.per_hour_distribution(file, provider_type)
     if dist:
         formatted_dist = [{"hour": int(k), "count": v} for k, v in dist.items()]
         formatted_dist.sort(key=lambda x: x["hour"])
@@ -187,14 +202,70 @@ def _print_hourly_distribution(file, provider_type):
         console.print("No data available.")
 
 
-def handle_time(file, provider):
-    """Handle time analysis for the given file and provider."""
-    provider_type = get_provider_enum(provider)
+def handle_time(file, provider, timezone=None):
+    """
+    Handle time analysis for the given file and provider, bucketing days and
+    hours in the IANA timezone if one is given.
+    """
     try:
-        _print_monthly_frequency(file, provider_type)
-        _print_daily_heatmap(file, provider_type)
-        _print_time_limits(file, provider_type)
-        _print_hourly_distribution(file, provider_type)
+        provider_type = get_provider_enum(provider, file)
+        _print_monthly_frequency(file, provider_type, timezone)
+        _print_daily_heatmap(time_api.chat_days(file, provider_type, timezone))
+        _print_time_limits(time_api.time_limit(file, provider_type))
+        _print_hourly_distribution(time_api.per_hour_distribution(file, provider_type, timezone))
 
-    except (OSError, json.JSONDecodeError, AttributeError) as error:
+    except (OSError, json.JSONDecodeError, AttributeError, ValueError) as error:
         console.print(f"[bold red]Error:[/bold red] {error}")
+
+
+def _print_file_timings(report):
+    print_header("Files")
+    print_table(report["files"], title="Normalize + Analyze Time per File")
+    slowest = max(report["files"], key=lambda item: item["seconds"])
+    console.print(f"[bold]Total:[/bold] {report['seconds']}s, "
+                  f"slowest: {slowest['file']} ({slowest['seconds']}s)")
+
+
+def _print_provider_breakdown(report):
+    print_header("Per Provider")
+    rows = []
+    for provider, provider_report in report["providers"].items():
+        models = provider_report["most_used_models"]
+        rows.append({
+            "provider": provider,
+            "sessions": provider_report["session_count"]["session_count"],
+            "characters": sum(item["counts"] for item in provider_report["total_characters"]),
+            "refusals": provider_report["refuse_counts"],
+            "top_model": max(models, key=lambda item: item["usage"])["model"] if models else "",
+        })
+    print_table(rows)
+
+
+def handle_report(inputs, timezone=None):
+    """
+    Handle one combined report over several (file, provider) exports, with a
+    per-provider breakdown and the time each file took.
+    """
+    try:
+        exports = [(file, get_provider_enum(provider, file)) for file, provider in inputs]
+        report = report_api.combined_report(exports, timezone)
+    except (OSError, json.JSONDecodeError, AttributeError, ValueError) as error:
+        console.print(f"[bold red]Error:[/bold red] {error}")
+        return
+
+    combined = report["combined"]
+    _print_file_timings(report)
+    _print_provider_breakdown(report)
+
+    print_header("Session Count Stats")
+    print_simple_dict(combined["session_count"])
+    _print_model_usage(combined["most_used_models"])
+    _print_character_counts(combined["total_characters"])
+    _print_language_stats(combined["most_used_language"])
+
+    print_header("Refuse Counts")
+    console.print(f"[bold red]Refusals:[/bold red] {combined['refuse_counts']}")
+
+    _print_daily_heatmap(combined["chat_days"])
+    _print_time_limits(combined["time_limit"])
+    _print_hourly_distribution(combined["per_hour_distribution"])
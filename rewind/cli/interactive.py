@@ -38,8 +38,8 @@ def interactive_mode():
     # 2. Select Provider
     provider = questionary.select(
         "Select provider type:",
-        choices=["deepseek", "openai", "claude", "qwen"],
-        default="deepseek",
+        choices=["auto", "deepseek", "openai", "claude", "qwen"],
+        default="auto",
     ).ask()
 
     if not provider:
@@ -70,7 +70,8 @@ def interactive_mode():
                 break
             provider = questionary.select(
                 "Select provider type:",
-                choices=["deepseek", "openai", "claude", "qwen"],
+                choices=["auto", "deepseek", "openai", "claude", "qwen"],
+                default="auto",
             ).ask()
             if not provider:
                 break
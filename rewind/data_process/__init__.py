@@ -6,6 +6,7 @@ from rewind.data_process.numberic_data import (
     count_chars,
     language_dominant_count,
     code_language_count,
+    code_block_stats,
     ai_refuse_count
 )
 from rewind.data_process.style_data import (
@@ -16,8 +17,18 @@ from rewind.data_process.time_data import (
     chat_frequency_distribution,
     chat_themost,
     count_per_hour_distribution,
+    session_timeline,
 )
 from rewind.data_process.update_data import update_data
+from rewind.data_process.session_cache import CachedSessions
+from rewind.data_process.fragment_table import FragmentTable
+from rewind.data_process.session_timeline import SessionTimeline
+from rewind.data_process.accumulators import Accumulator, FragmentView, scan_sessions
+from rewind.data_process.analysis_session import (
+    AnalysisSession,
+    get_analysis_session,
+    release_analysis_session,
+)
 
 __all__ = ['load_json',
            'session_count_stats',
@@ -25,7 +36,18 @@ __all__ = ['load_json',
            'count_chars',
            'language_dominant_count',
            'code_language_count',
+           'code_block_stats',
            'ai_refuse_count',
            "chat_frequency_distribution",
            "chat_themost",
-           "count_per_hour_distribution",]
+           "count_per_hour_distribution",
+           "session_timeline",
+           "SessionTimeline",
+           "AnalysisSession",
+           "get_analysis_session",
+           "release_analysis_session",
+           "FragmentTable",
+           "CachedSessions",
+           "Accumulator",
+           "FragmentView",
+           "scan_sessions",]
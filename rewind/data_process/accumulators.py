@@ -0,0 +1,238 @@
+"""
+Fused fragment scanning.
+scan_sessions() walks every session, message and fragment once and feeds each
+registered accumulator, so all text metrics share one pass over the data.
+A metric is an Accumulator subclass overriding only the hooks it needs;
+adding one adds no pass, and hooks left alone cost nothing during a scan.
+
+An accumulator is also a partial aggregate: merge() folds in the same metric
+accumulated over the sessions that follow, so shards of an export, or several
+exports, are scanned apart and reduced with merge_shards() to exactly the
+metrics of one pass over them all, key order and tie-breaks included.
+"""
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from rewind.utils.conversation_model import Message, Session
+
+HOOKS = ("start_session", "add_message", "add_fragment", "end_session")
+
+
+class FragmentView:
+    """
+    The fragment being scanned, with the fields every metric reads resolved
+    once. One view is reused for the whole scan: read it, do not keep it.
+    """
+    # pylint: disable=too-few-public-methods
+    __slots__ = ("session", "message", "model", "interaction_type", "content", "full_key")
+
+    def __init__(self):
+        self.session = None
+        self.message = None
+        self.model = None
+        self.interaction_type = ""
+        self.content = ""
+        # "<model>_<interaction type>", the key of the per-model metrics
+        self.full_key = ""
+
+
+class Accumulator:
+    """
+    One metric fed by scan_sessions().
+    name is the key of its result, the data_process function computing the
+    metric alone, e.g. "count_chars".
+    """
+    name = ""
+
+    def start_session(self, session: Session) -> None:
+        """called before the messages of a session"""
+
+    def add_message(self, message: Message) -> None:
+        """called for every message, before its fragments"""
+
+    def add_fragment(self, view: FragmentView) -> None:
+        """called for every fragment"""
+
+    def end_session(self, session: Session) -> None:
+        """called after the messages of a session"""
+
+    def merge(self, other: "Accumulator") -> None:
+        """
+        fold in the same metric accumulated over the sessions following this
+        one's; other is consumed and must not be used afterwards
+        """
+        raise NotImplementedError
+
+    def finalize(self) -> Any:
+        """
+        the metric, once every session was added and every shard merged;
+        the accumulator can still be merged into another one afterwards
+        """
+        raise NotImplementedError
+
+
+def add_counts(target: Dict[Any, int], source: Dict[Any, int], sign: int = 1) -> None:
+    """
+    add counts into target, new keys after the existing ones as a single pass
+    would see them; subtracting (sign=-1) removes a count brought to zero
+    """
+    for key, count in source.items():
+        total = target.get(key, 0) + sign * count
+        if total or sign > 0:
+            target[key] = total
+        else:
+            target.pop(key, None)
+
+
+def add_nested_counts(target: Dict[Any, Dict[Any, int]], source: Dict[Any, Dict[Any, int]],
+                      sign: int = 1) -> None:
+    """add_counts for counts nested one level, e.g. per model/type key"""
+    for key, counts in source.items():
+        nested = target.setdefault(key, {})
+        add_counts(nested, counts, sign)
+        if sign < 0 and not nested:
+            del target[key]
+
+
+def add_records(target: Dict[Any, Dict[Any, int]], source: Dict[Any, Dict[Any, int]],
+                sign: int = 1) -> None:
+    """
+    add records of fields keyed one level deep, e.g. blocks, lines and bytes per
+    language; a field may be zero while its record stands, so subtracting keeps
+    every field and removes a record only once all of its fields are zero
+    """
+    for key, record in source.items():
+        fields = target.setdefault(key, {})
+        for field, value in record.items():
+            fields[field] = fields.get(field, 0) + sign * value
+        if sign < 0 and not any(fields.values()):
+            del target[key]
+
+
+class TopK:
+    """
+    The k largest values seen and what holds them, largest first. Among
+    equal values the first one added ranks first, like a scan replacing its
+    record holder only on a strictly larger value.
+    """
+    __slots__ = ("k", "items")
+
+    def __init__(self, k: int):
+        self.k = k
+        self.items: List[Tuple[Any, Any]] = []
+
+    def add(self, value: Any, holder: Any) -> None:
+        """offer one value and its holder"""
+        items = self.items
+        if len(items) >= self.k and value <= items[-1][0]:
+            return
+        index = len(items)
+        while index and items[index - 1][0] < value:
+            index -= 1
+        items.insert(index, (value, holder))
+        del items[self.k:]
+
+    def merge(self, other: "TopK") -> None:
+        """fold in the values offered after this tracker's"""
+        for value, holder in other.items:
+            self.add(value, holder)
+
+    def first(self, default: Tuple[Any, Any]) -> Tuple[Any, Any]:
+        """(value, holder) ranked first, default when nothing was added"""
+        return self.items[0] if self.items else default
+
+
+class Extreme:
+    """the first holder of the smallest, or with largest=True the largest, value seen"""
+    __slots__ = ("largest", "value", "holder")
+
+    def __init__(self, largest: bool = False):
+        self.largest = largest
+        self.value: Optional[Any] = None
+        self.holder: Optional[Any] = None
+
+    def add(self, value: Any, holder: Any) -> None:
+        """offer one value and its holder"""
+        if self.value is None or \
+                (value > self.value if self.largest else value < self.value):
+            self.value = value
+            self.holder = holder
+
+    def merge(self, other: "Extreme") -> None:
+        """fold in the values offered after this tracker's"""
+        if other.value is not None:
+            self.add(other.value, other.holder)
+
+
+def _bound_hooks(accumulators: Sequence[Accumulator], hook: str) -> List[Callable]:
+    """the accumulators' overrides of one hook"""
+    default = getattr(Accumulator, hook)
+    return [getattr(accumulator, hook) for accumulator in accumulators
+            if getattr(type(accumulator), hook) is not default]
+
+
+def scan_sessions(data_list: Iterable[Session],
+                  accumulators: Sequence[Accumulator]) -> Dict[str, Any]:
+    """feed every accumulator with one traversal, results keyed by accumulator name"""
+    return finalize_all(feed_sessions(data_list, accumulators))
+
+
+def feed_sessions(data_list: Iterable[Session],
+                  accumulators: Sequence[Accumulator]) -> Sequence[Accumulator]:
+    """feed every accumulator with one traversal and return them, not yet finalized"""
+    starts, messages, fragments, ends = (_bound_hooks(accumulators, hook) for hook in HOOKS)
+    view = FragmentView()
+
+    for session in data_list:
+        view.session = session
+        for hook in starts:
+            hook(session)
+        for message in session.messages:
+            for hook in messages:
+                hook(message)
+            if not fragments:
+                continue
+            model = message.model
+            view.message = message
+            view.model = model
+            for fragment in message.fragments:
+                interaction_type = fragment.interaction_type
+                view.interaction_type = interaction_type
+                view.content = fragment.content
+                view.full_key = f"{model}_{interaction_type}"
+                for hook in fragments:
+                    hook(view)
+        for hook in ends:
+            hook(session)
+
+    return accumulators
+
+
+def merge_shards(shards: Iterable[Sequence[Accumulator]]) -> Sequence[Accumulator]:
+    """
+    reduce the accumulators fed with consecutive shards of sessions, in
+    shard order, into those of the first shard; every shard lists the same
+    metrics in the same order
+    """
+    merged = None
+    for shard in shards:
+        if merged is None:
+            merged = shard
+            continue
+        if [accumulator.name for accumulator in shard] != \
+                [accumulator.name for accumulator in merged]:
+            raise ValueError("shards must list the same metrics in the same order")
+        for accumulator, other in zip(merged, shard):
+            accumulator.merge(other)
+    if merged is None:
+        raise ValueError("no shard to merge")
+    return merged
+
+
+def finalize_all(accumulators: Sequence[Accumulator]) -> Dict[str, Any]:
+    """finalized metrics keyed by accumulator name"""
+    return {accumulator.name: accumulator.finalize() for accumulator in accumulators}
+
+
+def accumulate(data_list: Iterable[Session], accumulator: Accumulator) -> Any:
+    """one metric computed alone"""
+    return scan_sessions(data_list, [accumulator])[accumulator.name]
@@ -0,0 +1,215 @@
+"""Single-pass analysis over one loaded and normalized export"""
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from rewind.utils.providers import ProviderType
+from rewind.utils.conversation_model import Session
+from rewind.utils.language_pool import LanguageDetectionPool
+from rewind.utils.config_tag import config_tag
+from rewind.data_process.session_cache import NORMALIZATION_VERSION, normalized_sessions
+from rewind.data_process.incremental import (incremental_enabled, incremental_metrics,
+                                             get_incremental_store)
+from rewind.data_process.accumulators import Accumulator, feed_sessions, finalize_all
+from rewind.data_process.numberic_data import (
+    SessionCountAccumulator,
+    ModelCountAccumulator,
+    CharCountAccumulator,
+    LanguageAccumulator,
+    CodeBlockAccumulator,
+    blocks_per_language,
+    RefusalAccumulator,
+)
+from rewind.data_process.style_data import PoliteAccumulator, EmojiAccumulator
+from rewind.data_process.sharded import feed_sharded, get_shard_pool
+from rewind.data_process.time_data import (
+    DateAccumulator,
+    ExtremesAccumulator,
+    HourAccumulator,
+    TimelineAccumulator,
+)
+
+# Bump whenever a metric's output changes, cached API results are then unused
+ANALYSIS_VERSION = 4
+
+# Sessions kept alive by get_analysis_session, most recently used last
+MAX_CACHED_SESSIONS = 2
+
+# Metrics AnalysisSession.in_timezone buckets again for another zone
+TIMEZONE_METRICS = ("chat_frequency_distribution", "count_per_hour_distribution")
+
+
+class AnalysisSession:
+    """
+    One export, loaded and normalized once.
+    The first metric access walks every session's longest interaction chain a
+    single time, feeding the accumulators of all metrics together; later
+    accesses are lookups.
+    Sessions may be a list or a re-iterable stream such as CachedSessions;
+    they are dropped once the metrics are computed.
+    Language detection runs on the given pool, by default the shared one.
+    """
+
+    def __init__(self, sessions: Iterable[Session],
+                 pool: Optional[LanguageDetectionPool] = None):
+        self._sessions = sessions
+        self._pool = pool
+        self._metrics: Optional[Dict[str, Any]] = None
+        self._zoned: Dict[str, Dict[str, Any]] = {}
+
+    @classmethod
+    def from_file(cls, json_path: str, provider_type: ProviderType = ProviderType.DEEPSEEK,
+                  pool: Optional[LanguageDetectionPool] = None) -> "AnalysisSession":
+        """
+        stream a provider export session by session, normalized from the file
+        or read back from the normalized session cache; with incremental
+        analysis on, only the sessions new since a stored export are scanned
+        """
+        if incremental_enabled() and not get_shard_pool().parallel:
+            return IncrementalAnalysisSession(json_path, provider_type, pool)
+        return cls(normalized_sessions(json_path, provider_type), pool)
+
+    @classmethod
+    def from_metrics(cls, metrics: Dict[str, Any]) -> "AnalysisSession":
+        """an AnalysisSession serving metrics computed elsewhere, e.g. merged from shards"""
+        analysis = cls(())
+        analysis._metrics = metrics
+        return analysis
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Every metric keyed by the data_process function that computes it alone,
+        e.g. metrics["count_chars"] == count_chars(data_list).
+        """
+        if self._metrics is None:
+            self._metrics = self._compute_metrics()
+            self._sessions = None
+        return self._metrics
+
+    def _compute_metrics(self) -> Dict[str, Any]:
+        """one scan of every session"""
+        return finalize_metrics(feed_default_accumulators(self._sessions, self._pool))
+
+    def in_timezone(self, timezone: Optional[str] = None) -> Dict[str, Any]:
+        """
+        chat_frequency_distribution and count_per_hour_distribution bucketed in
+        an IANA timezone from the kept session timeline; None keeps the clock
+        each timestamp was written in. Raises ValueError for an unknown zone.
+        """
+        if timezone is None:
+            return {name: self.metrics[name] for name in TIMEZONE_METRICS}
+        if timezone not in self._zoned:
+            timeline = self.metrics["session_timeline"]
+            self._zoned[timezone] = {
+                "chat_frequency_distribution": timeline.chat_frequency_distribution(timezone),
+                "count_per_hour_distribution": timeline.count_per_hour_distribution(timezone),
+            }
+        return self._zoned[timezone]
+
+
+class IncrementalAnalysisSession(AnalysisSession):
+    """
+    AnalysisSession of an export file whose metrics are updated from the
+    closest export analyzed before, see rewind/data_process/incremental.py
+    """
+
+    def __init__(self, json_path: str, provider_type: ProviderType = ProviderType.DEEPSEEK,
+                 pool: Optional[LanguageDetectionPool] = None):
+        super().__init__(normalized_sessions(json_path, provider_type), pool)
+        self.json_path = json_path
+        self.provider_type = provider_type
+
+    def _compute_metrics(self) -> Dict[str, Any]:
+        try:
+            metrics = incremental_metrics(self._sessions, self.json_path, self.provider_type,
+                                          get_incremental_store(analysis_tag()), self._pool)
+        except sqlite3.Error:
+            # A locked, read-only or corrupt store only costs speed
+            metrics = None
+        # None also when another process dropped stored sessions this export needed
+        return metrics if metrics is not None else super()._compute_metrics()
+
+
+def analysis_tag() -> str:
+    """versions and configuration of everything stored per-session results depend on"""
+    return f"analysis={ANALYSIS_VERSION};normalization={NORMALIZATION_VERSION};{config_tag()}"
+
+
+def default_accumulators(pool: Optional[LanguageDetectionPool] = None) -> List[Accumulator]:
+    """one accumulator per metric an AnalysisSession serves"""
+    return [
+        SessionCountAccumulator(),
+        ModelCountAccumulator(),
+        CharCountAccumulator(),
+        LanguageAccumulator(pool),
+        CodeBlockAccumulator(),
+        RefusalAccumulator(),
+        PoliteAccumulator(),
+        EmojiAccumulator(),
+        DateAccumulator(),
+        ExtremesAccumulator(),
+        HourAccumulator(),
+        TimelineAccumulator(),
+    ]
+
+
+def feed_default_accumulators(data_list: Iterable[Session],
+                              pool: Optional[LanguageDetectionPool] = None) \
+    -> Sequence[Accumulator]:
+    """
+    default_accumulators() fed with every session, in shards on the shared
+    ShardPool when it has several workers, else in one scan
+    """
+    shard_pool = get_shard_pool()
+    if shard_pool.parallel:
+        return feed_sharded(data_list, default_accumulators, shard_pool)
+    return feed_sessions(data_list, default_accumulators(pool))
+
+
+def finalize_metrics(accumulators: Sequence[Accumulator]) -> Dict[str, Any]:
+    """AnalysisSession.metrics of default_accumulators() fed with every session"""
+    metrics = finalize_all(accumulators)
+    metrics["code_language_count"] = blocks_per_language(metrics["code_block_stats"])
+    return metrics
+
+
+_sessions: "OrderedDict[Tuple[Any, ...], AnalysisSession]" = OrderedDict()
+_sessions_lock = threading.Lock()
+
+
+def _session_key(json_path: str, provider_type: ProviderType) -> Tuple[Any, ...]:
+    """identify a file version and provider, so an edited file is loaded again"""
+    stat = os.stat(json_path)
+    return (os.path.abspath(json_path), stat.st_mtime_ns, stat.st_size, provider_type)
+
+
+def get_analysis_session(json_path: str, provider_type: ProviderType = ProviderType.DEEPSEEK) \
+    -> AnalysisSession:
+    """
+    Shared AnalysisSession for a file, so the per-metric API functions called
+    one after another parse and normalize the file only once.
+    """
+    key = _session_key(json_path, provider_type)
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is not None:
+            _sessions.move_to_end(key)
+            return session
+
+    session = AnalysisSession.from_file(json_path, provider_type)
+    with _sessions_lock:
+        _sessions[key] = session
+        while len(_sessions) > MAX_CACHED_SESSIONS:
+            _sessions.popitem(last=False)
+    return session
+
+
+def release_analysis_session(json_path: str) -> None:
+    """drop the shared sessions of a file, e.g. before deleting an upload"""
+    abs_path = os.path.abspath(json_path)
+    with _sessions_lock:
+        for key in [key for key in _sessions if key[0] == abs_path]:
+            del _sessions[key]
@@ -0,0 +1,91 @@
+"""
+Combined analysis of several exports, e.g. one person's DeepSeek, Qwen and
+Claude histories. Every export is normalized and scanned on its own thread
+into not yet finalized accumulators; those are merged per provider and over
+all exports, in the order the exports were given, so the combined metrics
+are those of one pass over the exports one after another.
+"""
+import copy
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+from rewind.utils.providers import ProviderType
+from rewind.utils.language_pool import LanguageDetectionPool
+from rewind.data_process.accumulators import Accumulator, merge_shards
+from rewind.data_process.analysis_session import (AnalysisSession, feed_default_accumulators,
+                                                  finalize_metrics)
+from rewind.data_process.numberic_data import SessionCountAccumulator
+from rewind.data_process.session_cache import normalized_sessions
+
+# Exports normalized at the same time
+MAX_CONCURRENT_FILES = 4
+
+
+class ExportScan(NamedTuple):
+    """one export's accumulators and how long normalizing and scanning it took"""
+    path: str
+    provider_type: ProviderType
+    accumulators: Sequence[Accumulator]
+    session_count: int
+    seconds: float
+
+    def timing(self) -> Dict[str, Any]:
+        """JSON-ready row of the per-file timings"""
+        return {
+            "file": os.path.basename(self.path),
+            "provider": self.provider_type.value,
+            "session_count": self.session_count,
+            "size_mb": round(os.path.getsize(self.path) / (1024 * 1024), 2),
+            "seconds": round(self.seconds, 3),
+        }
+
+
+class CombinedAnalysis(NamedTuple):
+    """metrics over all exports, per provider, and the per-file timings"""
+    combined: AnalysisSession
+    providers: Dict[ProviderType, AnalysisSession]
+    files: List[Dict[str, Any]]
+    seconds: float
+
+
+def scan_export(path: str, provider_type: ProviderType,
+                pool: Optional[LanguageDetectionPool] = None) -> ExportScan:
+    """normalize and scan one export into accumulators, not yet finalized"""
+    start = time.perf_counter()
+    accumulators = feed_default_accumulators(normalized_sessions(path, provider_type), pool)
+    session_count = next(accumulator.session_count for accumulator in accumulators
+                         if isinstance(accumulator, SessionCountAccumulator))
+    return ExportScan(path, provider_type, accumulators, session_count,
+                      time.perf_counter() - start)
+
+
+def combined_analysis(exports: Sequence[Sequence[Any]],
+                      pool: Optional[LanguageDetectionPool] = None,
+                      max_workers: int = MAX_CONCURRENT_FILES) -> CombinedAnalysis:
+    """
+    Analyze (path, ProviderType) pairs together. Raises what normalizing an
+    export raises, e.g. OSError or ValueError for a file of another provider.
+    """
+    if not exports:
+        raise ValueError("no export to analyze")
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(exports))),
+                            thread_name_prefix="rewind-export") as executor:
+        futures = [executor.submit(scan_export, path, provider_type, pool)
+                   for path, provider_type in exports]
+        scans = [future.result() for future in futures]
+    files = [scan.timing() for scan in scans]
+
+    by_provider: Dict[ProviderType, List[ExportScan]] = {}
+    for scan in scans:
+        by_provider.setdefault(scan.provider_type, []).append(scan)
+    merged = {provider_type: merge_shards(scan.accumulators for scan in provider_scans)
+              for provider_type, provider_scans in by_provider.items()}
+    # Merging into the combined metrics consumes the per-provider accumulators
+    providers = {provider_type: AnalysisSession.from_metrics(
+                     copy.deepcopy(finalize_metrics(accumulators)))
+                 for provider_type, accumulators in merged.items()}
+    combined = AnalysisSession.from_metrics(finalize_metrics(merge_shards(merged.values())))
+    return CombinedAnalysis(combined, providers, files, time.perf_counter() - start)
@@ -1,12 +1,24 @@
 """
 Data processors for different providers
 """
-from rewind.data_process.different_providers.claude_data_processor import update_claude_data
-from rewind.data_process.different_providers.deepseek_data_processor import update_deepseek_data
-from rewind.data_process.different_providers.qwen_data_processor import update_qwen_data
+from rewind.data_process.different_providers.claude_data_processor import (
+    update_claude_data,
+    normalize_claude_session,
+)
+from rewind.data_process.different_providers.deepseek_data_processor import (
+    update_deepseek_data,
+    normalize_deepseek_session,
+)
+from rewind.data_process.different_providers.qwen_data_processor import (
+    update_qwen_data,
+    normalize_qwen_session,
+)
 
 __all__ = [
     "update_claude_data",
     "update_deepseek_data",
     "update_qwen_data",
+    "normalize_claude_session",
+    "normalize_deepseek_session",
+    "normalize_qwen_session",
 ]
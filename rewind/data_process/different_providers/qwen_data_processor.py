@@ -1,9 +1,15 @@
 """Qwen data processor"""
 from typing import List, Dict
 from rewind.utils.common_utils import process_session
+from rewind.utils.conversation_model import Session
 
 
-def update_qwen_data(raw_data_dict: Dict[str, List[Dict[str, any]]]) -> List[Dict[str, any]]:
+def update_qwen_data(raw_data_dict: Dict[str, List[Dict[str, any]]]) -> List[Session]:
     """Loading qwen data"""
     data_list = raw_data_dict.get("data", [])
-    return [process_session(session) for session in data_list]
+    return [normalize_qwen_session(session) for session in data_list]
+
+
+def normalize_qwen_session(session: Dict[str, any]) -> Session:
+    """Normalize one qwen session from the 'data' array"""
+    return process_session(session)
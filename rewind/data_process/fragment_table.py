@@ -0,0 +1,175 @@
+"""
+Columnar fragment table.
+One row per fragment with its session index, message index, model, fragment
+type and content length, plus one row per session with its start time.
+Group-by metrics then run as NumPy bincounts instead of Python loops.
+Needs numpy; to_dataframe additionally needs pandas.
+"""
+from array import array
+from typing import Any, Dict, Iterable, List, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional for the rest of rewind
+    np = None
+
+from rewind.utils.conversation_model import Session
+from rewind.utils.time_utils import local_seconds
+
+# Wall-clock start of a session without a parseable inserted_at
+MISSING_TIME = -1
+
+# Per-fragment columns; model and fragment_type hold codes into the label lists
+FRAGMENT_COLUMNS = ("session_index", "message_index", "model", "fragment_type", "content_length")
+
+
+def _wall_clock_seconds(session: Session) -> int:
+    """
+    Seconds since 1970-01-01 of the local wall-clock time the session's
+    inserted_at was written in, as the per-session metrics count it.
+    """
+    if session.inserted_epoch_us is None:
+        return MISSING_TIME
+    return local_seconds(session.inserted_epoch_us, session.inserted_offset)
+
+
+def _as_datetimes(seconds: "np.ndarray") -> "np.ndarray":
+    """datetime64 view of wall-clock seconds, NaT where the time is missing"""
+    values = seconds.astype("datetime64[s]")
+    values[seconds == MISSING_TIME] = np.datetime64("NaT")
+    return values
+
+
+def _codes_in_first_seen_order(codes: "np.ndarray", weights: "np.ndarray" = None) \
+    -> List[Tuple[int, int]]:
+    """(code, count or weight sum) per distinct code, in order of first appearance"""
+    if len(codes) == 0:
+        return []
+    totals = np.bincount(codes, weights=weights)
+    distinct, first_index = np.unique(codes, return_index=True)
+    ordered = distinct[np.argsort(first_index, kind="stable")]
+    return [(int(code), int(totals[code])) for code in ordered]
+
+
+def frequency_distribution(starts: "np.ndarray") -> Dict[str, Dict[str, int]]:
+    """sessions per YYYY-MM and YYYY-MM-DD of wall-clock start seconds, in first-seen order"""
+    start_times = starts.astype("datetime64[s]")
+    distributions = {}
+    for name, unit in (("month_distribution", "M"), ("day_distribution", "D")):
+        buckets = start_times.astype(f"datetime64[{unit}]").astype(np.int64)
+        labels = {}
+        if len(buckets):
+            offset = buckets.min()
+            for code, count in _codes_in_first_seen_order(buckets - offset):
+                label = str(np.datetime64(int(code + offset), unit))
+                labels[label] = count
+        distributions[name] = labels
+    return distributions
+
+
+def hour_distribution(starts: "np.ndarray") -> Dict[int, int]:
+    """sessions per hour 0-23 of wall-clock start seconds"""
+    hours = np.bincount((starts // 3600) % 24, minlength=24)
+    return {hour: int(hours[hour]) for hour in range(24)}
+
+
+class FragmentTable:
+    """Columnar copy of normalized sessions for vectorized group-bys"""
+
+    def __init__(self, columns: Dict[str, "np.ndarray"], models: List[str],
+                 fragment_types: List[str], session_start: "np.ndarray",
+                 model_cutoff: "np.ndarray"):
+        self.columns = columns
+        self.models = models
+        self.fragment_types = fragment_types
+        # Per session: wall-clock start seconds, and the index of its first
+        # message without fragments (where prefer_model_count stops)
+        self.session_start = session_start
+        self.model_cutoff = model_cutoff
+
+    @classmethod
+    def from_sessions(cls, data_list: Iterable[Session]) -> "FragmentTable":
+        """build the table with one pass over the sessions"""
+        if np is None:
+            raise ImportError("FragmentTable needs numpy, install it with `pip install numpy`")
+
+        rows = {name: array("q") for name in FRAGMENT_COLUMNS}
+        session_start, model_cutoff = array("q"), array("q")
+        model_codes: Dict[str, int] = {}
+        type_codes: Dict[str, int] = {}
+
+        for session_index, session in enumerate(data_list):
+            session_start.append(_wall_clock_seconds(session))
+            cutoff = len(session.messages)
+            for message_index, message in enumerate(session.messages):
+                if not message.fragments and cutoff == len(session.messages):
+                    cutoff = message_index
+                model_code = model_codes.setdefault(message.model, len(model_codes))
+                for fragment in message.fragments:
+                    rows["session_index"].append(session_index)
+                    rows["message_index"].append(message_index)
+                    rows["model"].append(model_code)
+                    rows["fragment_type"].append(
+                        type_codes.setdefault(fragment.interaction_type, len(type_codes)))
+                    rows["content_length"].append(len(fragment.content))
+            model_cutoff.append(cutoff)
+
+        columns = {name: np.frombuffer(values, dtype=np.int64) for name, values in rows.items()}
+        return cls(columns, list(model_codes), list(type_codes),
+                   np.frombuffer(session_start, dtype=np.int64),
+                   np.frombuffer(model_cutoff, dtype=np.int64))
+
+    def __len__(self) -> int:
+        return len(self.columns["session_index"])
+
+    @property
+    def session_count(self) -> int:
+        """number of sessions, including those without fragments"""
+        return len(self.session_start)
+
+    @property
+    def timestamps(self) -> "np.ndarray":
+        """wall-clock start seconds of each fragment's session"""
+        return self.session_start[self.columns["session_index"]]
+
+    def count_chars(self) -> Dict[str, int]:
+        """count_chars: content length summed per model_type key"""
+        n_types = max(len(self.fragment_types), 1)
+        keys = self.columns["model"] * n_types + self.columns["fragment_type"]
+        weights = self.columns["content_length"].astype(np.float64)
+        return {f"{self.models[key // n_types]}_{self.fragment_types[key % n_types]}": total
+                for key, total in _codes_in_first_seen_order(keys, weights)}
+
+    def prefer_model_count(self) -> Dict[str, int]:
+        """prefer_model_count: RESPONSE fragments per model"""
+        if "RESPONSE" not in self.fragment_types:
+            return {}
+        response = self.columns["fragment_type"] == self.fragment_types.index("RESPONSE")
+        counted = self.columns["message_index"] < \
+            self.model_cutoff[self.columns["session_index"]]
+        models = self.columns["model"][response & counted]
+        return {self.models[code]: count for code, count in _codes_in_first_seen_order(models)}
+
+    def chat_frequency_distribution(self) -> Dict[str, Dict[str, int]]:
+        """chat_frequency_distribution: sessions per YYYY-MM and YYYY-MM-DD"""
+        return frequency_distribution(self.session_start[self.session_start != MISSING_TIME])
+
+    def count_per_hour_distribution(self) -> Dict[int, int]:
+        """count_per_hour_distribution: sessions per start hour 0-23"""
+        return hour_distribution(self.session_start[self.session_start != MISSING_TIME])
+
+    def to_dataframe(self) -> Tuple[Any, Any]:
+        """(fragments, sessions) pandas DataFrames with decoded model and type labels"""
+        import pandas as pd  # pylint: disable=import-outside-toplevel
+
+        fragments = pd.DataFrame(self.columns)
+        for column, labels in (("model", self.models), ("fragment_type", self.fragment_types)):
+            # a null model stays a missing value instead of a category
+            fragments[column] = pd.Series(
+                np.array(labels, dtype=object)[self.columns[column]]).astype("category")
+        fragments["timestamp"] = _as_datetimes(self.timestamps)
+        sessions = pd.DataFrame({
+            "start": _as_datetimes(self.session_start),
+            "model_cutoff": self.model_cutoff,
+        })
+        return fragments, sessions
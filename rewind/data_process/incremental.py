@@ -0,0 +1,455 @@
+"""
+Incremental re-analysis of a newer export of the same account.
+A monthly re-export repeats almost every session of the previous one, so the
+metrics of each session are stored as a SessionPartial keyed by the session's
+id and updated_at, and the totals of every analyzed export are stored with
+its manifest, the session keys it contains. A new export is analyzed from
+the stored export sharing the most keys: only the sessions it does not have
+yet are scanned, their partials are added and those of sessions gone or
+changed since are subtracted. Counters add and subtract; the chat_themost
+records and the day/hour distributions are recomputed from the few numbers
+kept per session, so removing a record holder is exact; its sessions are
+then stand-ins carrying the title and timestamps but no messages.
+Totals rebased from another export get their counter keys back in the order
+a single pass over the new export sees them, so the metrics equal a full scan.
+Everything lives in .rewind_cache/incremental.sqlite3, emptied whenever the
+analysis tag (metric and normalization versions, config_tag()) changes.
+REWIND_INCREMENTAL=off analyzes every export from scratch instead.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from rewind.utils.providers import ProviderType
+from rewind.utils.cache_utils import CACHE_DIR, file_digest
+from rewind.utils.conversation_model import Session, Message
+from rewind.utils.language_pool import LanguageDetectionPool
+from rewind.data_process.accumulators import (Accumulator, FragmentView, accumulate, add_counts,
+                                              add_nested_counts, add_records, scan_sessions)
+from rewind.data_process.numberic_data import (
+    LanguageCounter,
+    blocks_per_language,
+    _count_message_models,
+    _count_code_blocks,
+    _is_refusal,
+)
+from rewind.data_process.style_data import _count_style_words, _count_emojis
+from rewind.data_process.time_data import (
+    DateAccumulator,
+    HourAccumulator,
+    TimelineAccumulator,
+    SessionExtremes,
+)
+
+INCREMENTAL_ENV = "REWIND_INCREMENTAL"
+DEFAULT_DB_PATH = os.path.join(CACHE_DIR, "incremental.sqlite3")
+
+# Stored exports per provider, least recently analyzed dropped first
+MAX_SNAPSHOTS = 8
+
+# Keys per SELECT ... IN query
+QUERY_BATCH_SIZE = 500
+
+# SessionPartial counters a single pass orders by the first session having each key
+_ORDERED_COUNTERS = ("models", "chars", "languages", "code_blocks", "polite", "emojis")
+
+# Separates the session and the model/type key of a delta language count
+_KEY_SEPARATOR = "\x1f"
+
+# Per-session numbers chat_themost, the distributions and the timeline are recomputed from:
+# (title, inserted_at, updated_at, inserted_epoch_us, inserted_offset,
+#  updated_epoch_us, updated_offset, session_id, interaction count, response characters)
+SessionFacts = Tuple[Any, ...]
+
+
+class SessionPartial:  # pylint: disable=too-many-instance-attributes
+    """
+    The additive metrics of one or more sessions, plus each session's facts.
+    Adding the partials of an export's sessions in order gives the metrics of
+    a single pass over it; subtracting one removes a session again.
+    """
+    __slots__ = ("models", "chars", "languages", "code_blocks", "refusals", "polite",
+                 "emojis", "facts")
+
+    def __init__(self):
+        self.models: Dict[str, int] = {}
+        self.chars: Dict[str, int] = {}
+        self.languages: Dict[str, Dict[str, int]] = {}
+        self.code_blocks: Dict[str, Dict[str, int]] = {}
+        self.refusals = 0
+        self.polite: Dict[str, int] = {}
+        self.emojis: Dict[str, int] = {}
+        self.facts: Dict[str, SessionFacts] = {}
+
+    def add(self, other: "SessionPartial", sign: int = 1) -> None:
+        """add another partial in place, or subtract it with sign=-1"""
+        for name in ("models", "polite", "emojis"):
+            add_counts(getattr(self, name), getattr(other, name), sign)
+        add_nested_counts(self.languages, other.languages, sign)
+        add_records(self.code_blocks, other.code_blocks, sign)
+        if sign > 0:
+            add_counts(self.chars, other.chars)
+        else:
+            # Empty fragments count 0 characters under a key a single pass still
+            # reports, so a key goes with its last fragment, which languages count
+            for key, count in other.chars.items():
+                if key in self.languages:
+                    self.chars[key] = self.chars.get(key, 0) - count
+                else:
+                    self.chars.pop(key, None)
+        self.refusals += sign * other.refusals
+        if sign > 0:
+            self.facts.update(other.facts)
+        else:
+            for key in other.facts:
+                self.facts.pop(key, None)
+
+    def subtract(self, other: "SessionPartial") -> None:
+        """remove the sessions of another partial"""
+        self.add(other, -1)
+
+    def metrics(self) -> Dict[str, Any]:
+        """the AnalysisSession.metrics dict of these sessions"""
+        stubs = []
+        extremes = SessionExtremes()
+        for facts in self.facts.values():
+            stub = Session.from_record(facts[:7] + ([], facts[7]))
+            extremes.add(stub, facts[9], facts[8])
+            stubs.append(stub)
+        timed = scan_sessions(stubs, [DateAccumulator(), HourAccumulator(),
+                                      TimelineAccumulator()])
+        code_blocks = {language: dict(stats) for language, stats in self.code_blocks.items()}
+        return {
+            "session_count_stats": {"session_count": len(self.facts)},
+            "prefer_model_count": dict(self.models),
+            "count_chars": dict(self.chars),
+            "language_dominant_count": (
+                {key: dict(counts) for key, counts in self.languages.items()}, {}),
+            "code_block_stats": code_blocks,
+            "code_language_count": blocks_per_language(code_blocks),
+            "ai_refuse_count": self.refusals,
+            "polite_count": [{"word": word, "counts": str(count)}
+                             for word, count in self.polite.items()],
+            "emoji_count": [{"emoji": emo, "counts": str(count)}
+                            for emo, count in self.emojis.items()],
+            "chat_themost": extremes.finalize(),
+            **timed,
+        }
+
+
+def session_key(session: Session) -> str:
+    """store key of a session version: its id and updated_at"""
+    identity = session.session_id or f"{session.title}{_KEY_SEPARATOR}{session.inserted_at}"
+    return f"{identity}{_KEY_SEPARATOR}{session.updated_at}"
+
+
+class PartialsAccumulator(Accumulator):
+    """
+    One SessionPartial per session, keyed by keys[i] for the i-th session.
+    Languages are detected in batches across all sessions on the pool.
+    """
+    name = "session_partials"
+
+    def __init__(self, keys: List[str], pool: Optional[LanguageDetectionPool] = None):
+        self.partials: Dict[str, SessionPartial] = {}
+        self._keys = keys
+        self._languages = LanguageCounter(pool)
+        self._partial = SessionPartial()
+        self._slot = ""
+        self._counting = True
+        self._response_char_count = 0
+
+    def start_session(self, session: Session) -> None:
+        self._slot = self._keys[len(self.partials)]
+        self._partial = self.partials[self._slot] = SessionPartial()
+        self._counting = True
+        self._response_char_count = 0
+
+    def add_message(self, message: Message) -> None:
+        if self._counting:
+            self._counting = _count_message_models(message, self._partial.models)
+
+    def add_fragment(self, view: FragmentView) -> None:
+        partial = self._partial
+        content, interaction_type, full_key = view.content, view.interaction_type, view.full_key
+        partial.chars[full_key] = partial.chars.get(full_key, 0) + len(content)
+        self._languages.add(content, f"{self._slot}{_KEY_SEPARATOR}{full_key}")
+        if _is_refusal(content, interaction_type):
+            partial.refusals += 1
+        if interaction_type == "REQUEST":
+            _count_style_words(content, partial.polite)
+        else:
+            _count_code_blocks(content, partial.code_blocks)
+            _count_emojis(content, partial.emojis)
+        if interaction_type in ("RESPONSE", "THINK"):
+            self._response_char_count += len(content)
+
+    def end_session(self, session: Session) -> None:
+        self._partial.facts[self._slot] = (
+            session.title, session.inserted_at, session.updated_at,
+            session.inserted_epoch_us, session.inserted_offset,
+            session.updated_epoch_us, session.updated_offset, session.session_id,
+            len(session.messages), self._response_char_count)
+
+    def merge(self, other: "PartialsAccumulator") -> None:
+        self.partials.update(other.finalize())
+
+    def finalize(self) -> Dict[str, SessionPartial]:
+        for key, counts in self._languages.result().items():
+            slot, full_key = key.rsplit(_KEY_SEPARATOR, 1)
+            self.partials[slot].languages[full_key] = counts
+        return self.partials
+
+
+class IncrementalStore:
+    """
+    sqlite file of session partials and of analyzed exports (manifest and
+    totals), tagged with the analysis settings and emptied when they change
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, tag: str = ""):
+        self.db_path = db_path
+        self.tag = tag
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._db is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(self.db_path, check_same_thread=False)
+            db.execute("CREATE TABLE IF NOT EXISTS partials (provider TEXT, key TEXT, "
+                       "partial BLOB NOT NULL, PRIMARY KEY (provider, key)) WITHOUT ROWID")
+            db.execute("CREATE TABLE IF NOT EXISTS snapshots (digest TEXT, provider TEXT, "
+                       "manifest BLOB NOT NULL, totals BLOB NOT NULL, used REAL NOT NULL, "
+                       "PRIMARY KEY (digest, provider))")
+            db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+            row = db.execute("SELECT value FROM meta WHERE name = 'tag'").fetchone()
+            if row is None or row[0] != self.tag:
+                db.execute("DELETE FROM partials")
+                db.execute("DELETE FROM snapshots")
+                db.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('tag', ?)",
+                           (self.tag,))
+            db.commit()
+            self._db = db
+        return self._db
+
+    def known_keys(self, provider: str) -> set:
+        """keys of the stored session partials of a provider"""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT key FROM partials WHERE provider = ?", (provider,))
+            return {key for key, in rows}
+
+    def partials(self, provider: str, keys: Iterable[str]) -> Dict[str, SessionPartial]:
+        """stored partials of some keys"""
+        keys = list(keys)
+        found = {}
+        with self._lock:
+            db = self._connection()
+            for start in range(0, len(keys), QUERY_BATCH_SIZE):
+                batch = keys[start:start + QUERY_BATCH_SIZE]
+                rows = db.execute(
+                    f"SELECT key, partial FROM partials WHERE provider = ? AND key IN "
+                    f"({','.join('?' * len(batch))})", (provider, *batch))
+                found.update((key, pickle.loads(blob)) for key, blob in rows)
+        return found
+
+    def put_partials(self, provider: str, partials: Dict[str, SessionPartial]) -> None:
+        """store new session partials"""
+        with self._lock:
+            with self._connection() as db:
+                db.executemany(
+                    "INSERT OR REPLACE INTO partials (provider, key, partial) VALUES (?, ?, ?)",
+                    ((provider, key, pickle.dumps(partial, protocol=pickle.HIGHEST_PROTOCOL))
+                     for key, partial in partials.items()))
+
+    def closest_snapshot(self, provider: str, keys: List[str]) \
+        -> Optional[Tuple[List[str], SessionPartial]]:
+        """(manifest, totals) of the stored export differing from keys in the fewest sessions"""
+        wanted = set(keys)
+        best, best_distance = None, len(keys)
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT digest, manifest FROM snapshots WHERE provider = ?", (provider,))
+            for digest, blob in rows.fetchall():
+                manifest = pickle.loads(blob)
+                shared = len(wanted.intersection(manifest))
+                distance = len(wanted) + len(manifest) - 2 * shared
+                if distance < best_distance:
+                    best, best_distance = (digest, manifest), distance
+            if best is None:
+                return None
+            row = self._connection().execute(
+                "SELECT totals FROM snapshots WHERE digest = ? AND provider = ?",
+                (best[0], provider)).fetchone()
+        return best[1], pickle.loads(row[0])
+
+    def put_snapshot(self, digest: str, provider: str, keys: List[str],
+                     totals: SessionPartial) -> None:
+        """store an analyzed export, then drop old exports and the partials only they used"""
+        with self._lock:
+            with self._connection() as db:
+                db.execute(
+                    "INSERT OR REPLACE INTO snapshots (digest, provider, manifest, totals, used) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (digest, provider, pickle.dumps(keys, protocol=pickle.HIGHEST_PROTOCOL),
+                     pickle.dumps(totals, protocol=pickle.HIGHEST_PROTOCOL), time.time()))
+                stale = db.execute(
+                    "SELECT digest FROM snapshots WHERE provider = ? ORDER BY used DESC "
+                    "LIMIT -1 OFFSET ?", (provider, MAX_SNAPSHOTS)).fetchall()
+                if not stale:
+                    return
+                db.executemany("DELETE FROM snapshots WHERE digest = ? AND provider = ?",
+                               ((stale_digest, provider) for stale_digest, in stale))
+                referenced = set()
+                for blob, in db.execute("SELECT manifest FROM snapshots WHERE provider = ?",
+                                        (provider,)):
+                    referenced.update(pickle.loads(blob))
+                unused = [(provider, key) for key, in db.execute(
+                    "SELECT key FROM partials WHERE provider = ?", (provider,)).fetchall()
+                          if key not in referenced]
+                db.executemany("DELETE FROM partials WHERE provider = ? AND key = ?", unused)
+
+
+def incremental_metrics(sessions: Iterable[Session], json_path: str,
+                        provider_type: ProviderType, store: IncrementalStore,
+                        pool: Optional[LanguageDetectionPool] = None) \
+    -> Optional[Dict[str, Any]]:
+    """
+    AnalysisSession.metrics of an export, scanning only the sessions the
+    store has no partial for, then updating the closest stored export's totals.
+    None when partials it relied on were dropped meanwhile by another process.
+    """
+    provider = provider_type.value
+    known = store.known_keys(provider)
+    keys: List[str] = []
+    delta_keys: List[str] = []
+
+    def delta_sessions() -> Iterator[Session]:
+        occurrences: Dict[str, int] = {}
+        for session in sessions:
+            key = session_key(session)
+            seen = occurrences.get(key, 0)
+            occurrences[key] = seen + 1
+            if seen:
+                # The same session twice in one export counts twice, as in a full pass
+                key = f"{key}#{seen}"
+            keys.append(key)
+            if key not in known:
+                delta_keys.append(key)
+                yield session
+
+    new_partials = accumulate(delta_sessions(), PartialsAccumulator(delta_keys, pool))
+    store.put_partials(provider, new_partials)
+
+    totals = _rebase(store, provider, keys, new_partials)
+    if totals is None:
+        return None
+    store.put_snapshot(file_digest(json_path), provider, keys, totals)
+    return totals.metrics()
+
+
+def _rebase(store: IncrementalStore, provider: str, keys: List[str],
+            new_partials: Dict[str, SessionPartial]) -> Optional[SessionPartial]:
+    """totals of the sessions keys, from the closest stored export or from scratch"""
+    base = store.closest_snapshot(provider, keys)
+    if base is None:
+        totals, added, removed = SessionPartial(), keys, []
+    else:
+        manifest, totals = base
+        in_base, in_export = set(manifest), set(keys)
+        added = [key for key in keys if key not in in_base]
+        removed = [key for key in manifest if key not in in_export]
+
+    needed = [key for key in added + removed if key not in new_partials]
+    stored = store.partials(provider, needed)
+    if len(stored) < len(needed):
+        return None
+    for key in removed:
+        totals.subtract(stored[key])
+    for key in added:
+        totals.add(new_partials[key] if key in new_partials else stored[key])
+    # Export order, so ties between record holders break as in a single pass
+    totals.facts = {key: totals.facts[key] for key in keys}
+    if base is not None and not _order_like_export(store, provider, keys, new_partials, totals):
+        return None
+    return totals
+
+
+def _order_like_export(store: IncrementalStore, provider: str, keys: List[str],
+                       new_partials: Dict[str, SessionPartial], totals: SessionPartial) -> bool:
+    """
+    Put the counter keys of totals rebased from another export where a single
+    pass over this one first sees them, reading partials in export order only
+    until every key is placed. False when a stored partial is gone.
+    """
+    unplaced = {name: dict.fromkeys(_counter_keys(getattr(totals, name)))
+                for name in _ORDERED_COUNTERS}
+    placed: Dict[str, List[Any]] = {name: [] for name in _ORDERED_COUNTERS}
+    for start in range(0, len(keys), QUERY_BATCH_SIZE):
+        if not any(unplaced.values()):
+            break
+        batch = keys[start:start + QUERY_BATCH_SIZE]
+        stored = store.partials(provider, [key for key in batch if key not in new_partials])
+        for key in batch:
+            partial = new_partials[key] if key in new_partials else stored.get(key)
+            if partial is None:
+                return False
+            for name, remaining in unplaced.items():
+                if not remaining:
+                    continue
+                for counter_key in _counter_keys(getattr(partial, name)):
+                    if counter_key in remaining:
+                        del remaining[counter_key]
+                        placed[name].append(counter_key)
+    for name in _ORDERED_COUNTERS:
+        setattr(totals, name,
+                _reordered(getattr(totals, name), placed[name] + list(unplaced[name])))
+    return True
+
+
+def _counter_keys(counts: Dict[str, Any]) -> List[Any]:
+    """keys of counts in order, (key, inner key) pairs for counts nested one level"""
+    found: List[Any] = []
+    for key, value in counts.items():
+        if isinstance(value, dict):
+            found.extend((key, inner) for inner in value)
+        else:
+            found.append(key)
+    return found
+
+
+def _reordered(counts: Dict[str, Any], order: List[Any]) -> Dict[str, Any]:
+    """counts rebuilt with the keys, or (key, inner key) pairs, in order"""
+    result: Dict[str, Any] = {}
+    for counter_key in order:
+        if isinstance(counter_key, tuple):
+            key, inner = counter_key
+            result.setdefault(key, {})[inner] = counts[key][inner]
+        else:
+            result[counter_key] = counts[counter_key]
+    return result
+
+
+def incremental_enabled() -> bool:
+    """False when REWIND_INCREMENTAL turns incremental analysis off"""
+    return os.environ.get(INCREMENTAL_ENV, "").strip().lower() not in \
+        ("off", "none", "0", "false")
+
+
+_stores: Dict[str, IncrementalStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_incremental_store(tag: str) -> IncrementalStore:
+    """the process-wide store of an analysis tag"""
+    with _stores_lock:
+        store = _stores.get(tag)
+        if store is None:
+            store = _stores[tag] = IncrementalStore(DEFAULT_DB_PATH, tag)
+        return store
@@ -1,13 +1,248 @@
 """Loading json data"""
 import json
+import re
+from typing import Any, Dict, Iterator, Set, TextIO, Tuple
+
+from rewind.utils.providers import ProviderType
+from rewind.utils import json_backend
+
+# Exports whose sessions sit in an array under a top-level key
+# instead of being the top-level array itself
+SESSION_ARRAY_KEYS = {
+    ProviderType.QWEN: "data",
+}
+
+# Characters read per step; a session larger than this is read in doubling steps
+STREAM_CHUNK_SIZE = 1 << 20
+
+# Streaming stays on the stdlib decoder: raw_decode finds each session's end
+# inside the C scanner, which outruns a Python-level boundary scan feeding a
+# faster parser. Whole documents go through json_backend.
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_DECODER = json.JSONDecoder()
+# Characters before the end of the buffer within which a decode error may be a cut-off
+# token, e.g. the rest of a \uXXXX escape or a number's exponent
+_TRUNCATION_MARGIN = 16
+
+# Bytes of an export read to detect its provider; the first session's keys come early
+DETECT_PREFIX_BYTES = 64 * 1024
+
+# Nesting of the keys collected while detecting, e.g. ("data", 0, "chat") for Qwen
+_DETECT_DEPTH = 3
+
+# A complete string, one structural character, or a bare scalar; a string
+# cut off at the end of the prefix matches none of them
+_TOKEN = re.compile(r'"(?:[^"\\]|\\.)*"|[{}\[\]:,]|[^\s{}\[\]:,"]+')
 
 
 def load_json(file_path: str):
-    """loading json"""
+    """loading json with the fastest installed JSON backend"""
+    return json_backend.load_file(file_path)
+
+
+def iter_sessions(file_path: str, provider_type: ProviderType = ProviderType.DEEPSEEK) \
+    -> Iterator[Any]:
+    """
+    Yield the raw sessions of an export one at a time.
+    Only the current session and one read chunk are held in memory,
+    so peak memory follows the largest conversation, not the whole file.
+    """
     with open(file_path, 'r', encoding='utf-8') as file:
-        data = json.load(file)
-    return data
+        reader = _JsonStreamReader(file)
+        key = SESSION_ARRAY_KEYS.get(provider_type)
+        if key is not None and not reader.seek_key(key):
+            return
+        yield from reader.iter_array()
+
+
+def detect_provider(file_path: str, prefix_bytes: int = DETECT_PREFIX_BYTES) -> ProviderType:
+    """
+    Tell the provider of an export from its first bytes, without loading it.
+    Raises ValueError when they match no provider.
+    """
+    with open(file_path, 'rb') as file:
+        return detect_provider_from_prefix(file.read(prefix_bytes), file_path)
+
+
+def detect_provider_from_prefix(prefix: bytes, name: str = "the export") -> ProviderType:
+    """
+    Tell the provider of an export from the keys in a prefix of it:
+    a top-level array of sessions with "mapping" and "inserted_at" is DeepSeek, with
+    "mapping" and "create_time" or "current_node" OpenAI, with "chat_messages" Claude;
+    a top-level object whose "data" array holds sessions with a "chat" is Qwen.
+    Raises ValueError when the prefix matches none of them.
+    """
+    # A multi-byte character cut off at the end only loses itself
+    root, keys = _prefix_keys(prefix.decode('utf-8', errors='ignore').lstrip("\ufeff"))
+
+    if root == "[":
+        session_keys = keys.get((0,), set())
+        if "chat_messages" in session_keys:
+            return ProviderType.CLAUDE
+        if "mapping" in session_keys:
+            if "inserted_at" in session_keys:
+                return ProviderType.DEEPSEEK
+            if session_keys & {"create_time", "current_node"}:
+                return ProviderType.OPENAI
+    elif root == "{" and "data" in keys.get((), set()):
+        if "chat" in keys.get(("data", 0), set()):
+            return ProviderType.QWEN
+    raise ValueError(f"{name} does not look like a DeepSeek, OpenAI, Claude or Qwen export")
+
+
+def _prefix_keys(text: str) -> Tuple[str, Dict[Tuple[Any, ...], Set[str]]]:
+    """
+    The opening bracket of a possibly truncated JSON document and the keys of its
+    objects by path, following only the first item of every array
+    """
+    root = ""
+    keys: Dict[Tuple[Any, ...], Set[str]] = {}
+    # Per open container: [path or None when not followed, item index or current key,
+    # whether a key comes next]
+    stack: list = []
+    pos = 0
+    while True:
+        pos = _WHITESPACE.match(text, pos).end()
+        match = _TOKEN.match(text, pos)
+        if match is None:
+            return root, keys
+        token, pos = match.group(), match.end()
+        frame = stack[-1] if stack else None
+
+        if token in ("{", "["):
+            root = root or token
+            path = () if frame is None else _child_path(frame[0], frame[1])
+            stack.append([path, None if token == "{" else 0, token == "{"])
+        elif token in ("}", "]"):
+            if not stack:
+                return root, keys
+            stack.pop()
+        elif frame is None:
+            continue
+        elif token == ":":
+            frame[2] = False
+        elif token == ",":
+            if isinstance(frame[1], int):
+                frame[1] += 1
+            else:
+                frame[2] = True
+        elif frame[2] and token.startswith('"'):
+            frame[1] = json.loads(token)
+            if frame[0] is not None:
+                keys.setdefault(frame[0], set()).add(frame[1])
+
+
+def _child_path(parent_path, position):
+    """path of a container opened under a key or as an array item, None when not followed"""
+    if parent_path is None or len(parent_path) >= _DETECT_DEPTH:
+        return None
+    if isinstance(position, str) or position == 0:
+        return parent_path + (position,)
+    return None
+
+
+def _maybe_truncated(exc: json.JSONDecodeError, buffered: int) -> bool:
+    """whether a decode error may come from the value running past the buffer"""
+    # An unterminated string is reported where it starts, anything else where it failed
+    return exc.msg.startswith("Unterminated string") or \
+        exc.pos >= buffered - _TRUNCATION_MARGIN
+
+
+class _JsonStreamReader:
+    """Incremental reader for the few top-level JSON structures of an export"""
+
+    def __init__(self, file_handle: TextIO, chunk_size: int = STREAM_CHUNK_SIZE):
+        self._file = file_handle
+        self._chunk_size = chunk_size
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self, size: int) -> bool:
+        """drop the consumed prefix and append up to size characters"""
+        if self._eof:
+            return False
+        chunk = self._file.read(size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _error(self, message: str) -> json.JSONDecodeError:
+        return json.JSONDecodeError(message, self._buffer, self._pos)
+
+    def _peek(self) -> str:
+        """next non-whitespace character, '' at end of file"""
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill(self._chunk_size):
+                return ""
+
+    def _expect(self, char: str) -> None:
+        if self._peek() != char:
+            raise self._error(f"Expecting '{char}'")
+        self._pos += 1
+
+    def _next_separator(self, closing: str) -> bool:
+        """consume ',' (more items follow) or the closing bracket"""
+        char = self._peek()
+        if char not in (",", closing):
+            raise self._error(f"Expecting ',' or '{closing}'")
+        self._pos += 1
+        return char == ","
+
+    def _value(self) -> Any:
+        """decode the next complete JSON value"""
+        size = self._chunk_size
+        while True:
+            self._peek()
+            try:
+                value, end = _DECODER.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError as exc:
+                # Cut off at the end of the buffer: read on. An error well inside
+                # the buffered text is malformed JSON that more data cannot fix
+                if not _maybe_truncated(exc, len(self._buffer)) or not self._fill(size):
+                    raise
+                size *= 2
+                continue
+            # A number at the very end may continue in the next chunk
+            if end == len(self._buffer) and self._fill(size):
+                continue
+            self._pos = end
+            return value
+
+    def iter_array(self) -> Iterator[Any]:
+        """yield the items of the array starting at the current position"""
+        self._expect("[")
+        if self._peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield self._value()
+            if not self._next_separator("]"):
+                return
 
+    def seek_key(self, key: str) -> bool:
+        """
+        Move to the value of a key of the object starting at the current position,
+        skipping the values before it. False when the object has no such key.
+        """
+        self._expect("{")
+        if self._peek() == "}":
+            return False
+        while True:
+            name = self._value()
+            self._expect(":")
+            if name == key:
+                return True
+            self._value()
+            if not self._next_separator("}"):
+                return False
 
 
 if __name__ == "__main__":
@@ -1,131 +1,341 @@
 """numberic data calculation"""
-from typing import List, Dict, Tuple
+from collections import deque
+from concurrent.futures import Future
+from typing import Deque, Iterable, Iterator, Dict, List, Optional, Tuple, Union
 from rewind.data_process.loading_data import load_json
 from rewind.data_process.update_data import update_data
-from rewind.utils.language_utils import (count_code_block_languages,
-                                        REFUSE_WORDS_LIST, detect_language)
+from rewind.utils.language_utils import (DETECTOR_TAG, detect_language,
+                                        detect_language_uncached)
+from rewind.utils.code_blocks import iter_code_blocks
+from rewind.utils.keyword_scanner import get_keyword_scanner
+from rewind.utils.language_cache import get_language_cache
 from rewind.data_process.style_data import polite_count, emoji_count
-from rewind.utils.data_utils import iterate_fragments, iterate_fragments_with_model
+from rewind.utils.language_pool import LanguageDetectionPool, get_shared_pool
+from rewind.utils.conversation_model import Session, Message
+from rewind.data_process.accumulators import (Accumulator, FragmentView, accumulate, add_counts,
+                                              add_nested_counts)
 from rewind.data_process.time_data import chat_frequency_distribution, chat_themost
+from rewind.data_process.fragment_table import FragmentTable
 
-def session_count_stats(data_list: List[Dict[str, any]]) -> Dict[str, any]:
+def session_count_stats(data_list: Iterable[Session]) -> Dict[str, any]:
     """
     Get raw data session count
     """
-    return {"session_count": len(data_list)}
+    return accumulate(data_list, SessionCountAccumulator())
 
-def prefer_model_count(data_list: List[Dict[str, any]]) -> Dict[str, any]:
+
+class SessionCountAccumulator(Accumulator):
+    """session_count_stats as an accumulator"""
+    name = "session_count_stats"
+
+    def __init__(self):
+        self.session_count = 0
+
+    def end_session(self, session: Session) -> None:
+        self.session_count += 1
+
+    def merge(self, other: "SessionCountAccumulator") -> None:
+        self.session_count += other.session_count
+
+    def finalize(self) -> Dict[str, int]:
+        return {"session_count": self.session_count}
+
+
+def prefer_model_count(data_list: Union[Iterable[Session], FragmentTable]) -> Dict[str, any]:
     """
     Given a list of dictionaries containing model statistics,
     return the dictionary with the highest 'preference_score'.
+    A FragmentTable is counted with vectorized group-bys.
     """
-    model_counts = {}
+    if isinstance(data_list, FragmentTable):
+        return data_list.prefer_model_count()
+    return accumulate(data_list, ModelCountAccumulator())
+
+
+class ModelCountAccumulator(Accumulator):
+    """prefer_model_count as an accumulator"""
+    name = "prefer_model_count"
 
-    for session in data_list:
+    def __init__(self):
+        self.model_counts: Dict[str, int] = {}
+        self._counting = True
 
-        interaction = session.get("longest_interaction_list", [])
+    def start_session(self, session: Session) -> None:
+        self._counting = True
 
-        for _, record in enumerate(interaction):
-            fragments = record.get("message", {}).get("fragments", [])
-            if len(fragments) == 0:
-                break
-            for fragment in fragments:
-                interact_type = fragment.get("type", "")
-                if interact_type in ('RESPONSE'):
-                    model_type = record.get("message", {}).get("model", "unknown")
-                    if model_type not in model_counts:
-                        model_counts[model_type] = 0
-                    model_counts[model_type] += 1
+    def add_message(self, message: Message) -> None:
+        if self._counting:
+            self._counting = _count_message_models(message, self.model_counts)
 
-    return model_counts
+    def merge(self, other: "ModelCountAccumulator") -> None:
+        add_counts(self.model_counts, other.model_counts)
 
+    def finalize(self) -> Dict[str, int]:
+        return self.model_counts
 
-def count_chars(data_list: List[Dict[str, any]]) -> Dict[str, int]:
+
+def _count_message_models(message: Message, model_counts: Dict[str, int]) -> bool:
+    """
+    Count the RESPONSE fragments of one message under its model.
+    Returns False for a message without fragments, which ends the session.
+    """
+    fragments = message.fragments
+    if len(fragments) == 0:
+        return False
+    for fragment in fragments:
+        if fragment.interaction_type == "RESPONSE":
+            model_type = message.model
+            if model_type not in model_counts:
+                model_counts[model_type] = 0
+            model_counts[model_type] += 1
+    return True
+
+
+def count_chars(data_list: Union[Iterable[Session], FragmentTable]) -> Dict[str, int]:
     """
     Count the total number of characters in the 'fragments' of each record's message.
+    A FragmentTable is counted with vectorized group-bys.
     """
-    char_dict = {}
+    if isinstance(data_list, FragmentTable):
+        return data_list.count_chars()
+    return accumulate(data_list, CharCountAccumulator())
+
+
+class CharCountAccumulator(Accumulator):
+    """count_chars as an accumulator"""
+    name = "count_chars"
 
-    for content, interaction_type, model_type in iterate_fragments_with_model(data_list):
-        full_key = f"{model_type}_{interaction_type}"
+    def __init__(self):
+        self.char_dict: Dict[str, int] = {}
 
-        if full_key not in char_dict:
-            char_dict[full_key] = 0
-        char_count = len(content)
-        char_dict[full_key] += char_count
+    def add_fragment(self, view: FragmentView) -> None:
+        full_key = view.full_key
+        self.char_dict[full_key] = self.char_dict.get(full_key, 0) + len(view.content)
 
-    return char_dict
+    def merge(self, other: "CharCountAccumulator") -> None:
+        add_counts(self.char_dict, other.char_dict)
 
-def language_dominant_count(data_list: List[Dict[str, any]]) -> \
+    def finalize(self) -> Dict[str, int]:
+        return self.char_dict
+
+def language_dominant_count(data_list: Iterable[Session],
+                            pool: Optional[LanguageDetectionPool] = None) -> \
     Tuple[Dict[str, int], Dict[str, int]]:
     """
     Count the number of languages in the 'fragments' of each record's message.
+    Detection runs on the shared process pool unless another pool is given.
     Returns: (natural_language_dict, code_language_dict_placeholder)
     Note: The second return value is legacy for compatibility but we focus on natural language here.
     """
-    language_dict = {}
+    return accumulate(data_list, LanguageAccumulator(pool))
+
+
+class LanguageAccumulator(Accumulator):
+    """language_dominant_count as an accumulator"""
+    name = "language_dominant_count"
 
-    # We will use this to track languages per model/interaction type
-    # Structure: "Model_Type": {"en": 10, "zh-cn": 5}
+    def __init__(self, pool: Optional[LanguageDetectionPool] = None):
+        # Structure: "Model_Type": {"en": 10, "zh-cn": 5}
+        self.language_counter = LanguageCounter(pool)
 
-    for content, interaction_type, model_type in iterate_fragments_with_model(data_list):
-        full_key = f"{model_type}_{interaction_type}"
+    def add_fragment(self, view: FragmentView) -> None:
+        self.language_counter.add(view.content, view.full_key)
 
-        if full_key not in language_dict:
-            language_dict[full_key] = {}
+    def merge(self, other: "LanguageAccumulator") -> None:
+        self.language_counter.merge(other.language_counter)
 
-        detected_lang = detect_language(content)
+    def finalize(self) -> Tuple[Dict[str, Dict[str, int]], Dict[str, int]]:
+        return self.language_counter.result(), {}
 
-        if detected_lang not in language_dict[full_key]:
-            language_dict[full_key][detected_lang] = 0
 
-        language_dict[full_key][detected_lang] += 1
+def _count_language(content: str, full_key: str, language_dict: Dict[str, Dict[str, int]]) \
+    -> None:
+    """Detect the language of one fragment and count it under its model/type key."""
+    if full_key not in language_dict:
+        language_dict[full_key] = {}
+    _add_language(detect_language(content), full_key, language_dict)
 
-    return language_dict, {}
 
-def code_language_count(data_list: List[Dict[str, any]]) -> Dict[str, int]:
+def _add_language(detected_lang: str, full_key: str,
+                  language_dict: Dict[str, Dict[str, int]]) -> None:
+    key_counts = language_dict.setdefault(full_key, {})
+    key_counts[detected_lang] = key_counts.get(detected_lang, 0) + 1
+
+
+class LanguageCounter:
+    """
+    Language counts per model/type key with detection batched onto a pool.
+    Texts already in the language cache are not sent to the workers, and
+    chunks are merged back in submission order, so the counts and their key
+    order are exactly those of calling _count_language on every fragment.
+    """
+
+    def __init__(self, pool: Optional[LanguageDetectionPool] = None):
+        self.language_dict: Dict[str, Dict[str, int]] = {}
+        self._pool = pool if pool is not None else get_shared_pool()
+        self._cache = get_language_cache(DETECTOR_TAG)
+        # (key, text to detect or None, cached language or None) in fragment order
+        self._entries: List[Tuple[str, Optional[str], Optional[str]]] = []
+        self._texts: List[str] = []
+        self._pending: Deque[Tuple[List[Tuple[str, Optional[str], Optional[str]]], Future]] = \
+            deque()
+
+    def add(self, content: str, full_key: str) -> None:
+        """count one fragment"""
+        if not self._pool.parallel:
+            _count_language(content, full_key, self.language_dict)
+            return
+        # Reserve the key now so keys keep their first-seen order
+        self.language_dict.setdefault(full_key, {})
+        cached = detect_language(content) if not content.strip() else self._cache.get(content)
+        if cached is not None:
+            if not self._entries and not self._pending:
+                _add_language(cached, full_key, self.language_dict)
+            else:
+                self._entries.append((full_key, None, cached))
+            return
+        self._entries.append((full_key, content, None))
+        self._texts.append(content)
+        if len(self._texts) >= self._pool.chunk_size:
+            self._submit()
+
+    def _submit(self) -> None:
+        self._pending.append((self._entries, self._pool.submit(self._texts)))
+        self._entries, self._texts = [], []
+        # Bound memory: wait for the oldest chunk instead of queueing the whole export
+        while len(self._pending) > self._pool.max_pending:
+            self._merge_oldest()
+
+    def _merge(self, entries: List[Tuple[str, Optional[str], Optional[str]]],
+               detected: Iterator[str]) -> None:
+        for full_key, content, language in entries:
+            if language is None:
+                language = next(detected)
+                self._cache.put(content, language)
+            _add_language(language, full_key, self.language_dict)
+
+    def _merge_oldest(self) -> None:
+        entries, future = self._pending.popleft()
+        self._merge(entries, iter(future.result()))
+
+    def result(self) -> Dict[str, Dict[str, int]]:
+        """wait for every chunk and return the language counts"""
+        if self._texts and not self._pending:
+            # Less than one chunk in total: not worth starting the workers
+            self._merge(self._entries, map(detect_language_uncached, self._texts))
+            self._entries, self._texts = [], []
+        elif self._texts:
+            self._submit()
+        while self._pending:
+            self._merge_oldest()
+        # Trailing cache hits queued behind the last chunk
+        self._merge(self._entries, iter(()))
+        self._entries = []
+        self._cache.flush()
+        return self.language_dict
+
+    def __getstate__(self) -> Dict[str, Dict[str, Dict[str, int]]]:
+        # Only the counts travel, e.g. back from a shard worker; the pool and cache stay
+        return {"language_dict": self.result()}
+
+    def __setstate__(self, state: Dict[str, Dict[str, Dict[str, int]]]) -> None:
+        self.__init__()
+        self.language_dict = state["language_dict"]
+
+    def merge(self, other: "LanguageCounter") -> None:
+        """add the counts of the fragments given to another counter after this one's"""
+        add_nested_counts(self.result(), other.result())
+
+
+def code_language_count(data_list: Iterable[Session]) -> Dict[str, int]:
     """
     Count the number of code blocks by programming language
     in the 'fragments' of each record's message.
     """
-    total_language_count = {}
+    return blocks_per_language(code_block_stats(data_list))
 
-    for content, interaction_type in iterate_fragments(data_list):
-        if interaction_type == "REQUEST":
-            continue
-        language_count = count_code_block_languages(content)
 
-        for lang, count in language_count.items():
-            if lang not in total_language_count:
-                total_language_count[lang] = 0
-            total_language_count[lang] += count
+def code_block_stats(data_list: Iterable[Session]) -> Dict[str, Dict[str, int]]:
+    """
+    Count the code blocks, their lines and their UTF-8 bytes by programming
+    language in the AI fragments; unlabeled blocks count as "text".
+    Returns: {"python": {"blocks": 3, "lines": 42, "bytes": 1234}, ...}
+    """
+    return accumulate(data_list, CodeBlockAccumulator())
+
+
+def blocks_per_language(block_stats: Dict[str, Dict[str, int]]) -> Dict[str, int]:
+    """code_language_count from code_block_stats"""
+    return {language: stats["blocks"] for language, stats in block_stats.items()}
+
+
+class CodeBlockAccumulator(Accumulator):
+    """code_block_stats as an accumulator"""
+    name = "code_block_stats"
+
+    def __init__(self):
+        self.block_stats: Dict[str, Dict[str, int]] = {}
+
+    def add_fragment(self, view: FragmentView) -> None:
+        if view.interaction_type != "REQUEST":
+            _count_code_blocks(view.content, self.block_stats)
+
+    def merge(self, other: "CodeBlockAccumulator") -> None:
+        add_nested_counts(self.block_stats, other.block_stats)
+
+    def finalize(self) -> Dict[str, Dict[str, int]]:
+        return self.block_stats
+
 
-    return total_language_count
+def _count_code_blocks(content: str, block_stats: Dict[str, Dict[str, int]]) -> None:
+    """Count the code blocks of one fragment by programming language."""
+    for block in iter_code_blocks(content):
+        stats = block_stats.get(block.language)
+        if stats is None:
+            stats = block_stats[block.language] = {"blocks": 0, "lines": 0, "bytes": 0}
+        stats["blocks"] += 1
+        stats["lines"] += block.lines
+        stats["bytes"] += block.size
 
-def ai_refuse_count(data_list: List[Dict[str, any]]) -> int:
+
+def ai_refuse_count(data_list: Iterable[Session]) -> int:
     """
     Count the number of AI refusal messages in the 'fragments' of each record's message.
     """
-    refuse_count = 0
+    return accumulate(data_list, RefusalAccumulator())
+
+
+class RefusalAccumulator(Accumulator):
+    """ai_refuse_count as an accumulator"""
+    name = "ai_refuse_count"
+
+    def __init__(self):
+        self.refuse_count = 0
+
+    def add_fragment(self, view: FragmentView) -> None:
+        if _is_refusal(view.content, view.interaction_type):
+            self.refuse_count += 1
 
-    for content, interaction_type in iterate_fragments(data_list):
-        if interaction_type == "RESPONSE" and \
-            any(refuse_word in content for refuse_word in REFUSE_WORDS_LIST) and \
-            len(content) < 50:
-            refuse_count += 1
+    def merge(self, other: "RefusalAccumulator") -> None:
+        self.refuse_count += other.refuse_count
 
-    return refuse_count
+    def finalize(self) -> int:
+        return self.refuse_count
+
+
+def _is_refusal(content: str, interaction_type: str) -> bool:
+    """Whether one fragment is a short AI refusal."""
+    return interaction_type == "RESPONSE" and len(content) < 50 and \
+        get_keyword_scanner().contains_any(content, "refuse")
 
 
 def main():
     """main function for numberic stats"""
 
-    data = load_json('data/conversations.json')
-    print("Session Count Stats:", session_count_stats(data))
-
-    data = update_data(data)
+    data = update_data(load_json('data/conversations.json'))
 
     print("Updated Data List Length:", len(data))
+    print("Session Count Stats:", session_count_stats(data))
 
     prefer_model_stats = prefer_model_count(data)
     print("Prefer Model Stats:", prefer_model_stats)
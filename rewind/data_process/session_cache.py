@@ -0,0 +1,128 @@
+"""
+Normalized session cache.
+Parsing a provider export and normalizing its sessions is paid again by every
+analysis that misses the result cache, e.g. after ANALYSIS_VERSION is bumped
+or for a metric added later. CachedSessions keeps the normalized sessions of
+an export in .rewind_cache/sessions/, keyed by the export's content hash, its
+provider, NORMALIZATION_VERSION and config_tag() (Qwen and Claude timestamps
+are normalized into REWIND_SOURCE_TIMEZONE): the first full iteration
+normalizes the export and writes the sessions through; later ones read them back.
+
+An entry is a sequence of pickle protocol 5 frames, each a list of up to
+FRAME_SESSIONS Session.to_record() tuples, closed by a None frame. Reading
+it holds one frame in memory at a time, like the streaming loader.
+REWIND_SESSION_CACHE=off disables it; REWIND_SESSION_CACHE_MAX_MB caps it.
+"""
+import os
+import pickle
+import threading
+from typing import Iterator, Optional
+
+from rewind.utils.providers import ProviderType
+from rewind.utils.conversation_model import Session
+from rewind.utils.cache_utils import CACHE_DIR, CacheManager
+from rewind.utils.config_tag import config_tag
+from rewind.utils.env_utils import env_int
+from rewind.data_process.update_data import NormalizedSessions
+
+SESSION_CACHE_ENV = "REWIND_SESSION_CACHE"
+SESSION_CACHE_MAX_MB_ENV = "REWIND_SESSION_CACHE_MAX_MB"
+SESSION_CACHE_DIR = os.path.join(CACHE_DIR, "sessions")
+DEFAULT_SESSION_CACHE_MAX_MB = 1024
+SESSION_CACHE_MAX_ENTRIES = 64
+
+# Bump whenever a provider normalizer's output changes, cached sessions are then unused
+NORMALIZATION_VERSION = 2
+
+# Sessions per pickle frame
+FRAME_SESSIONS = 256
+
+_LOAD_ERRORS = (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError,
+                IndexError, TypeError, ValueError)
+
+
+def _entry_name(provider_type: ProviderType) -> str:
+    return f"sessions:{provider_type.value}:v{NORMALIZATION_VERSION}:{config_tag()}"
+
+
+class CachedSessions:  # pylint: disable=too-few-public-methods
+    """
+    Normalized sessions of an export, re-iterable like NormalizedSessions.
+    Iterating reads the cached sessions when there are some, else normalizes
+    the export and, once the iteration runs to the end, caches the result.
+    """
+
+    def __init__(self, file_path: str, provider_type: ProviderType = ProviderType.DEEPSEEK,
+                 cache: Optional[CacheManager] = None):
+        self.source = NormalizedSessions(file_path, provider_type)
+        self.file_path = file_path
+        self.provider_type = provider_type
+        self.cache = cache if cache is not None else get_session_cache()
+
+    def __iter__(self) -> Iterator[Session]:
+        name = _entry_name(self.provider_type)
+        file_handle = self.cache.open_entry(self.file_path, name)
+        if file_handle is None:
+            yield from self._normalize_through(name)
+            return
+
+        yielded = False
+        with file_handle:
+            try:
+                while True:
+                    frame = pickle.load(file_handle)
+                    if frame is None:
+                        return
+                    for record in frame:
+                        session = Session.from_record(record)
+                        yielded = True
+                        yield session
+            except _LOAD_ERRORS:
+                # Entries are renamed into place whole, so this is a foreign file
+                self.cache.discard(self.file_path, name)
+                if yielded:
+                    raise
+        yield from self._normalize_through(name)
+
+    def _normalize_through(self, name: str) -> Iterator[Session]:
+        """normalize the export, writing the sessions to the cache as they pass"""
+        frame = []
+        with self.cache.writer(self.file_path, name) as file_handle:
+            for session in self.source:
+                frame.append(session.to_record())
+                if len(frame) == FRAME_SESSIONS:
+                    pickle.dump(frame, file_handle, protocol=5)
+                    frame = []
+                yield session
+            if frame:
+                pickle.dump(frame, file_handle, protocol=5)
+            pickle.dump(None, file_handle, protocol=5)
+
+
+def session_cache_enabled() -> bool:
+    """False when REWIND_SESSION_CACHE turns the cache off"""
+    return os.environ.get(SESSION_CACHE_ENV, "").strip().lower() not in \
+        ("off", "none", "0", "false")
+
+
+def normalized_sessions(file_path: str, provider_type: ProviderType = ProviderType.DEEPSEEK):
+    """CachedSessions of an export, or plain NormalizedSessions when the cache is off"""
+    if session_cache_enabled():
+        return CachedSessions(file_path, provider_type)
+    return NormalizedSessions(file_path, provider_type)
+
+
+_session_cache: Optional[CacheManager] = None  # pylint: disable=invalid-name
+_session_cache_lock = threading.Lock()
+
+
+def get_session_cache() -> CacheManager:
+    """the process-wide CacheManager of normalized sessions"""
+    global _session_cache  # pylint: disable=global-statement
+    with _session_cache_lock:
+        if _session_cache is None:
+            max_mb = env_int(SESSION_CACHE_MAX_MB_ENV, DEFAULT_SESSION_CACHE_MAX_MB)
+            _session_cache = CacheManager(
+                SESSION_CACHE_DIR, max_entries=SESSION_CACHE_MAX_ENTRIES,
+                max_bytes=max_mb * 1024 * 1024)
+        return _session_cache
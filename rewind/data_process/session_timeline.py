@@ -0,0 +1,70 @@
+"""
+Session start timeline.
+The UTC start epoch and source UTC offset of every session, kept after the
+sessions themselves are dropped, so the day, month and hour distributions
+can be bucketed again in any IANA zone without normalizing the export again.
+Collecting needs nothing but the standard library; bucketing needs numpy.
+"""
+from array import array
+from typing import Dict, Iterable, Optional
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional for the rest of rewind
+    np = None
+
+from rewind.utils.conversation_model import Session
+from rewind.utils.time_utils import MICROSECONDS
+from rewind.utils.timezones import zone_offsets
+from rewind.data_process.fragment_table import frequency_distribution, hour_distribution
+
+
+class SessionTimeline:
+    """start epoch seconds and offsets of the sessions with a parseable inserted_at"""
+
+    def __init__(self):
+        self.epochs = array("q")
+        self.offsets = array("q")
+
+    @classmethod
+    def from_sessions(cls, data_list: Iterable[Session]) -> "SessionTimeline":
+        """collect the timeline with one pass over the sessions"""
+        timeline = cls()
+        for session in data_list:
+            timeline.add(session)
+        return timeline
+
+    def add(self, session: Session) -> None:
+        """append one session's start"""
+        if session.inserted_epoch_us is not None:
+            self.epochs.append(session.inserted_epoch_us // MICROSECONDS)
+            self.offsets.append(session.inserted_offset)
+
+    def merge(self, other: "SessionTimeline") -> None:
+        """append the starts of the sessions of another timeline"""
+        self.epochs.extend(other.epochs)
+        self.offsets.extend(other.offsets)
+
+    def __len__(self) -> int:
+        return len(self.epochs)
+
+    def local_seconds(self, timezone: Optional[str] = None) -> "np.ndarray":
+        """
+        Wall-clock start seconds since 1970-01-01 in an IANA zone, or on the
+        clock each timestamp was written in when timezone is None
+        """
+        if np is None:
+            raise ImportError("SessionTimeline needs numpy, install it with `pip install numpy`")
+        epochs = np.frombuffer(self.epochs, dtype=np.int64)
+        if timezone is None:
+            return epochs + np.frombuffer(self.offsets, dtype=np.int64)
+        return zone_offsets(timezone).local_seconds(epochs)
+
+    def chat_frequency_distribution(self, timezone: Optional[str] = None) \
+        -> Dict[str, Dict[str, int]]:
+        """chat_frequency_distribution bucketed in a zone"""
+        return frequency_distribution(self.local_seconds(timezone))
+
+    def count_per_hour_distribution(self, timezone: Optional[str] = None) -> Dict[int, int]:
+        """count_per_hour_distribution bucketed in a zone"""
+        return hour_distribution(self.local_seconds(timezone))
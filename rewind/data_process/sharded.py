@@ -0,0 +1,119 @@
+"""
+Sharded analysis on a process pool.
+Scanning an export runs every metric on one core. With more than one shard
+worker, the sessions are cut into shards of SHARD_SESSIONS consecutive
+sessions and sent as Session.to_record() tuples to worker processes, each
+feeding a fresh set of accumulators; the unfinalized accumulators come back
+and are merged in shard order, so the metrics equal those of one scan.
+Workers detect languages in-process, the shards being the parallelism.
+Set REWIND_SHARD_WORKERS to the worker count (1, the default, scans in-process).
+"""
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Iterable, List, Optional, Sequence, Tuple
+
+from rewind.utils.conversation_model import Session
+from rewind.utils.env_utils import env_int
+from rewind.utils.language_pool import get_shared_pool
+from rewind.utils.process_pool import LazyProcessPool, init_detection_worker
+from rewind.data_process.accumulators import Accumulator, feed_sessions, merge_shards
+
+SHARD_WORKERS_ENV = "REWIND_SHARD_WORKERS"
+
+# Sessions per shard; enough to amortize pickling the accumulators back
+SHARD_SESSIONS = 512
+
+# Shards in flight per worker before the submitter merges the oldest one
+PENDING_SHARDS_PER_WORKER = 2
+
+AccumulatorFactory = Callable[[], Sequence[Accumulator]]
+
+
+def default_shard_workers() -> int:
+    """REWIND_SHARD_WORKERS, else 1, also for a malformed value"""
+    return max(env_int(SHARD_WORKERS_ENV, 1), 1)
+
+
+def _init_shard_worker() -> None:
+    """seed langdetect and detect languages in the worker itself"""
+    init_detection_worker()
+    get_shared_pool(1)
+
+
+def _scan_shard(make_accumulators: AccumulatorFactory,
+                records: List[Tuple[Any, ...]]) -> Sequence[Accumulator]:
+    sessions = [Session.from_record(record) for record in records]
+    return feed_sessions(sessions, make_accumulators())
+
+
+class ShardPool(LazyProcessPool):
+    """
+    Lazily started process pool scanning shards of sessions.
+    Worker processes are spawned on the first shard, so exports of a
+    single shard never pay the start-up cost.
+    """
+
+    def __init__(self, workers: Optional[int] = None, shard_sessions: int = SHARD_SESSIONS):
+        super().__init__(default_shard_workers() if workers is None else workers,
+                         _init_shard_worker)
+        self.shard_sessions = shard_sessions
+        self.max_pending = self.workers * PENDING_SHARDS_PER_WORKER
+
+    def submit(self, make_accumulators: AccumulatorFactory,
+               records: List[Tuple[Any, ...]]) -> Future:
+        """scan one shard of session records, the future yields its accumulators"""
+        return self._submit(_scan_shard, make_accumulators, records)
+
+
+def feed_sharded(data_list: Iterable[Session], make_accumulators: AccumulatorFactory,
+                 shard_pool: ShardPool) -> Sequence[Accumulator]:
+    """
+    feed_sessions() over shards scanned on the pool, merged in order into
+    accumulators not yet finalized; make_accumulators is called in the
+    workers, so it must be a module-level function
+    """
+    pending: Deque[Future] = deque()
+    merged = feed_sessions((), make_accumulators())
+    records = []
+    try:
+        for session in data_list:
+            records.append(session.to_record())
+            if len(records) < shard_pool.shard_sessions:
+                continue
+            pending.append(shard_pool.submit(make_accumulators, records))
+            records = []
+            # Bound memory: merge the oldest shard instead of queueing the whole export
+            while len(pending) > shard_pool.max_pending:
+                merged = merge_shards([merged, pending.popleft().result()])
+
+        if records and not pending:
+            # Less than one shard in total: not worth starting the workers
+            return merge_shards([merged, _scan_shard(make_accumulators, records)])
+        if records:
+            pending.append(shard_pool.submit(make_accumulators, records))
+        while pending:
+            merged = merge_shards([merged, pending.popleft().result()])
+    finally:
+        for future in pending:
+            future.cancel()
+    return merged
+
+
+_shared_shard_pool: Optional[ShardPool] = None  # pylint: disable=invalid-name
+_shared_lock = threading.Lock()
+
+
+def get_shard_pool(workers: Optional[int] = None) -> ShardPool:
+    """
+    Process-wide shard pool reused across analyses, e.g. by every Flask
+    request. Passing a different worker count replaces the pool.
+    """
+    global _shared_shard_pool  # pylint: disable=global-statement
+    with _shared_lock:
+        if _shared_shard_pool is None or \
+                (workers is not None and workers != _shared_shard_pool.workers):
+            if _shared_shard_pool is not None:
+                _shared_shard_pool.shutdown()
+            _shared_shard_pool = ShardPool(workers)
+        return _shared_shard_pool
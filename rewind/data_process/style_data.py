@@ -1,56 +1,74 @@
 """Style analysis for user side and ai side"""
-from typing import List, Dict
-import emoji
-from rewind.utils.language_utils import POLITE_WORDS_LIST, IMPOLITE_WORDS_LIST
-from rewind.utils.data_utils import iterate_fragments
+from typing import Iterable, Dict, List
+from rewind.utils.keyword_scanner import get_keyword_scanner
+from rewind.utils.emoji_utils import count_emojis
+from rewind.utils.conversation_model import Session
+from rewind.data_process.accumulators import Accumulator, FragmentView, accumulate, add_counts
 
 
-def polite_count(data_list: List[Dict[str, any]]) -> List[Dict[str, any]]:
+def polite_count(data_list: Iterable[Session]) -> List[Dict[str, any]]:
     """
     Count the number of polite and impolite words in the 'fragments' of each record's message.
     Returns a list of dictionaries with format: [{"word":"您","counts":"10"}, ...]
     """
-    polite_stats = {}
+    return accumulate(data_list, PoliteAccumulator())
 
-    for content, interaction_type in iterate_fragments(data_list):
-        if interaction_type == "REQUEST":
-            _count_polite_words(content, polite_stats)
-            _count_impolite_words(content, polite_stats)
 
-    # Convert dictionary to list of dictionaries format
-    result = [{"word": word, "counts": str(count)} for word, count in polite_stats.items()]
-    return result
+class PoliteAccumulator(Accumulator):
+    """polite_count as an accumulator"""
+    name = "polite_count"
 
+    def __init__(self):
+        self.polite_stats: Dict[str, int] = {}
 
-def _count_polite_words(content: str, polite_stats: Dict[str, int]) -> None:
-    """Count polite words in content and update stats."""
-    for polite_word in POLITE_WORDS_LIST:
-        if polite_word in content:
-            polite_stats[polite_word] = polite_stats.get(polite_word, 0) + 1
+    def add_fragment(self, view: FragmentView) -> None:
+        if view.interaction_type == "REQUEST":
+            _count_style_words(view.content, self.polite_stats)
 
+    def merge(self, other: "PoliteAccumulator") -> None:
+        add_counts(self.polite_stats, other.polite_stats)
 
-def _count_impolite_words(content: str, polite_stats: Dict[str, int]) -> None:
-    """Count impolite words in content and update stats."""
-    for impolite_word in IMPOLITE_WORDS_LIST:
-        if impolite_word in content:
-            polite_stats[impolite_word] = polite_stats.get(impolite_word, 0) + 1
+    def finalize(self) -> List[Dict[str, str]]:
+        # Convert dictionary to list of dictionaries format
+        return [{"word": word, "counts": str(count)} for word, count in self.polite_stats.items()]
 
 
-def emoji_count(data_list: List[Dict[str, any]]) -> Dict[any, int]:
+def _count_style_words(content: str, polite_stats: Dict[str, int]) -> None:
+    """
+    Count the polite, then the impolite words in content with one scan
+    and update stats; each word counts once per fragment.
+    """
+    hits = get_keyword_scanner().scan(content)
+    for list_name in ("polite", "impolite"):
+        for word in hits.get(list_name, ()):
+            polite_stats[word] = polite_stats.get(word, 0) + 1
+
+
+def emoji_count(data_list: Iterable[Session]) -> Dict[any, int]:
     """
     Count the number of emojis in the 'fragments' of each record's message.
     """
-    emoji_stats = {}
+    return accumulate(data_list, EmojiAccumulator())
+
+
+class EmojiAccumulator(Accumulator):
+    """emoji_count as an accumulator"""
+    name = "emoji_count"
+
+    def __init__(self):
+        self.emoji_stats: Dict[str, int] = {}
+
+    def add_fragment(self, view: FragmentView) -> None:
+        if view.interaction_type != "REQUEST":
+            _count_emojis(view.content, self.emoji_stats)
+
+    def merge(self, other: "EmojiAccumulator") -> None:
+        add_counts(self.emoji_stats, other.emoji_stats)
 
-    for content, interaction_type in iterate_fragments(data_list):
-        if interaction_type != "REQUEST":
-            _count_emojis(content, emoji_stats)
-    result=[{"emoji": emo, "counts": str(count)} for emo, count in emoji_stats.items()]
-    return result
+    def finalize(self) -> List[Dict[str, str]]:
+        return [{"emoji": emo, "counts": str(count)} for emo, count in self.emoji_stats.items()]
 
 
 def _count_emojis(content: str, emoji_stats: Dict[str, int]) -> None:
-    """Count emojis in content and update stats."""
-    for char in content:
-        if char in emoji.EMOJI_DATA:
-            emoji_stats[char] = emoji_stats.get(char, 0) + 1
+    """Count emojis in content, whole ZWJ/flag/skin-tone sequences as one, and update stats."""
+    count_emojis(content, emoji_stats)
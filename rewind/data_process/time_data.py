@@ -1,164 +1,282 @@
 """analyze time data"""
-from typing import List, Dict, Any
-from datetime import time
-from dateutil import parser
-from rewind.utils.time_utils import delta_to_dhms
-
-def chat_frequency_distribution(data_list: List[Dict[str, Any]]) -> Dict[Any, Any]:
-    """analyze chat frequency distribution"""
-    month_frequency_distribution = {}
-    day_frequency_distribution = {}
-    for session in data_list:
-        create_time = session.get("inserted_at", "")
-        if create_time:
-            create_time_ym = create_time[:7]  # Extract "YYYY-MM"
-            if create_time_ym not in month_frequency_distribution:
-                month_frequency_distribution[create_time_ym] = 0
-            month_frequency_distribution[create_time_ym] += 1
-            create_time_ymd = create_time[:10]  # Extract "YYYY-MM-DD"
-            if create_time_ymd not in day_frequency_distribution:
-                day_frequency_distribution[create_time_ymd] = 0
-            day_frequency_distribution[create_time_ymd] += 1
-
-    return {"month_distribution": month_frequency_distribution,
-            "day_distribution": day_frequency_distribution}
-
-
-def _find_most_active_session(data_list: List[Dict[str, Any]]) -> tuple:
-    """find the session with the most interactions"""
-    max_interaction_count = 0
-    max_interaction_session = None
-
-    for session in data_list:
-        interactions = session.get("longest_interaction_list", [])
-        interaction_count = len(interactions)
-        if interaction_count > max_interaction_count:
-            max_interaction_count = interaction_count
-            max_interaction_session = session
-
-    return max_interaction_session, max_interaction_count
-
-
-def _find_most_response_session(data_list: List[Dict[str, Any]]) -> tuple:
-    """find the session with the most response characters"""
-    max_response_char_count = 0
-    max_response_session = None
-
-    for session in data_list:
-        interactions = session.get("longest_interaction_list", [])
-        response_char_count = 0
-        for record in interactions:
-            fragments = record.get("message", {}).get("fragments", [])
-            for fragment in fragments:
-                if fragment.get("type", "") in ("RESPONSE", "THINK"):
-                    content = fragment.get("content", "")
-                    response_char_count += len(content)
-        if response_char_count > max_response_char_count:
-            max_response_char_count = response_char_count
-            max_response_session = session
-
-    return max_response_session, max_response_char_count
-
-
-def _find_longest_duration_session(data_list: List[Dict[str, Any]]) -> tuple:
-    """find the session with the longest duration"""
-    max_total_seconds = 0
-    max_last_time_session = None
-    days, hours, minutes, seconds = 0, 0, 0, 0
-
-    for session in data_list:
-        inserted_at = session.get("inserted_at", "")
-        updated_at = session.get("updated_at", "")
-        if inserted_at and updated_at:
-            current_days, current_hours, current_minutes,\
-                current_seconds, total_seconds =\
-                delta_to_dhms(inserted_at, updated_at)
-            if total_seconds > max_total_seconds:
-                max_total_seconds = total_seconds
-                max_last_time_session = session
-                days, hours, minutes, seconds =\
-                    current_days, current_hours, current_minutes, current_seconds
-
-    return max_last_time_session, max_total_seconds, days, hours, minutes, seconds
-
-
-def _find_earliest_latest_sessions(data_list: List[Dict[str, Any]]) -> tuple:
-    """find the earliest and latest sessions using 6 AM as day boundary"""
-
-
-    earliest_time = None
-    earliest_session = None
-    latest_time = None
-    latest_session = None
-
-    for session in data_list:
-        inserted_at = session.get("inserted_at", "")
-        if inserted_at:
-            # Parse the ISO string to datetime object
-            datetime_obj = parser.isoparse(inserted_at)
-            chat_time = datetime_obj.time()
+from typing import Iterable, Dict, Any, List, Optional, Tuple, Union
+from rewind.utils.time_utils import (DAY_SECONDS, MICROSECONDS, day_label, local_seconds,
+                                     seconds_to_dhms)
+from rewind.utils.conversation_model import Session
+from rewind.utils.timezones import ZoneOffsets, zone_offsets
+from rewind.data_process.fragment_table import FragmentTable
+from rewind.data_process.session_timeline import SessionTimeline
+from rewind.data_process.accumulators import (Accumulator, Extreme, FragmentView, TopK,
+                                              accumulate, add_counts)
+
+DAY_MICROSECONDS = DAY_SECONDS * MICROSECONDS
+# Sessions from 6 AM on count towards the earliest, before it towards the latest chat
+SIX_AM = 6 * 3600 * MICROSECONDS
+# Sessions ranked per chat_themost record
+CHAT_THEMOST_TOP_K = 5
+
+TimeSource = Union[Iterable[Session], FragmentTable, SessionTimeline]
+
+
+def chat_frequency_distribution(data_list: TimeSource, timezone: Optional[str] = None) \
+    -> Dict[Any, Any]:
+    """
+    analyze chat frequency distribution, vectorized for a FragmentTable or a
+    SessionTimeline. Days and months are those of the IANA timezone, or of the
+    clock each timestamp was written in when it is None.
+    """
+    if isinstance(data_list, SessionTimeline):
+        return data_list.chat_frequency_distribution(timezone)
+    if isinstance(data_list, FragmentTable):
+        _check_wall_clock_only(timezone)
+        return data_list.chat_frequency_distribution()
+    return accumulate(data_list, DateAccumulator(timezone))
+
+
+def _check_wall_clock_only(timezone: Optional[str]) -> None:
+    if timezone is not None:
+        raise ValueError("a FragmentTable keeps wall-clock starts only, "
+                         "bucket sessions or a SessionTimeline in another timezone")
+
+
+class DateAccumulator(Accumulator):
+    """chat_frequency_distribution as an accumulator"""
+    name = "chat_frequency_distribution"
+
+    def __init__(self, timezone: Optional[str] = None):
+        self.month_frequency_distribution: Dict[str, int] = {}
+        self.day_frequency_distribution: Dict[str, int] = {}
+        self.timezone = timezone
+        self._zone = zone_offsets(timezone) if timezone is not None else None
+
+    def start_session(self, session: Session) -> None:
+        _count_session_dates(session, self.month_frequency_distribution,
+                             self.day_frequency_distribution, self._zone)
+
+    def merge(self, other: "DateAccumulator") -> None:
+        _check_same_timezone(self.timezone, other.timezone)
+        add_counts(self.month_frequency_distribution, other.month_frequency_distribution)
+        add_counts(self.day_frequency_distribution, other.day_frequency_distribution)
+
+    def finalize(self) -> Dict[str, Dict[str, int]]:
+        return {"month_distribution": self.month_frequency_distribution,
+                "day_distribution": self.day_frequency_distribution}
+
+
+def _check_same_timezone(timezone: Optional[str], other: Optional[str]) -> None:
+    if timezone != other:
+        raise ValueError(f"can not merge distributions bucketed in {timezone} and {other}")
+
+
+def _start_seconds(session: Session, zone: Optional[ZoneOffsets] = None) -> Optional[int]:
+    """
+    wall-clock start seconds of a session in a zone, or on the clock its
+    inserted_at was written in; None when it has no parseable start
+    """
+    epoch_us = session.inserted_epoch_us
+    if epoch_us is None:
+        return None
+    if zone is None:
+        return local_seconds(epoch_us, session.inserted_offset)
+    epoch = epoch_us // MICROSECONDS
+    return epoch + zone.offset_at(epoch)
+
+
+def _count_session_dates(session: Session, month_frequency_distribution: Dict[str, int],
+                         day_frequency_distribution: Dict[str, int],
+                         zone: Optional[ZoneOffsets] = None) -> None:
+    """count one session into the month and day distributions"""
+    start_seconds = _start_seconds(session, zone)
+    if start_seconds is None:
+        return
+    create_time_ymd = day_label(start_seconds // DAY_SECONDS)
+    create_time_ym = create_time_ymd[:7]  # Extract "YYYY-MM"
+    month_frequency_distribution[create_time_ym] = \
+        month_frequency_distribution.get(create_time_ym, 0) + 1
+    day_frequency_distribution[create_time_ymd] = \
+        day_frequency_distribution.get(create_time_ymd, 0) + 1
+
+
+class SessionExtremes:
+    """
+    track the sessions holding each chat_themost record, one session at a
+    time, with the top_k sessions of the interaction, response and duration
+    rankings; trackers of consecutive sessions merge into those of them all
+    """
+
+    def __init__(self, top_k: int = CHAT_THEMOST_TOP_K):
+        self.most_active = TopK(top_k)
+        self.most_response = TopK(top_k)
+        self.longest_duration = TopK(top_k)
+        self.earliest = Extreme()
+        self.latest = Extreme(largest=True)
+
+    def add(self, session: Session, response_char_count: int,
+            interaction_count: Optional[int] = None) -> None:
+        """
+        update every record with one session and its response character count;
+        interaction_count defaults to the session's message count
+        """
+        if interaction_count is None:
+            interaction_count = len(session.messages)
+        # A record holder needs more than nothing
+        if interaction_count > 0:
+            self.most_active.add(interaction_count, session)
+
+        if response_char_count > 0:
+            self.most_response.add(response_char_count, session)
+
+        inserted_us = session.inserted_epoch_us
+        updated_us = session.updated_epoch_us
+        if inserted_us is not None and updated_us is not None:
+            total_seconds = abs(updated_us - inserted_us) // MICROSECONDS
+            if total_seconds > 0:
+                self.longest_duration.add(total_seconds, session)
+
+        if inserted_us is not None:
+            # Microseconds into the day on the session's own wall clock
+            chat_time = (inserted_us + session.inserted_offset * MICROSECONDS) % DAY_MICROSECONDS
 
             # For earliest: find the earliest time after 6 AM
-            if chat_time >= time(6, 0):
-                if earliest_time is None or chat_time < earliest_time:
-                    earliest_time = chat_time
-                    earliest_session = session
+            if chat_time >= SIX_AM:
+                self.earliest.add(chat_time, session)
 
             # For latest: find the latest time before 6 AM
-            if chat_time < time(6, 0):
-                if latest_time is None or chat_time > latest_time:
-                    latest_time = chat_time
-                    latest_session = session
+            else:
+                self.latest.add(chat_time, session)
+
+    def merge(self, other: "SessionExtremes") -> None:
+        """fold in the records of the sessions added to other after this tracker's"""
+        self.most_active.merge(other.most_active)
+        self.most_response.merge(other.most_response)
+        self.longest_duration.merge(other.longest_duration)
+        self.earliest.merge(other.earliest)
+        self.latest.merge(other.latest)
+
+    def finalize(self) -> Dict[str, Any]:
+        """chat_themost style result dict, each ranking as (session, value) pairs"""
+        max_interaction_count, most_active_session = self.most_active.first((0, None))
+        max_response_char_count, most_response_session = self.most_response.first((0, None))
+        longest_seconds, longest_session = self.longest_duration.first((0, None))
+        days, hours, minutes, seconds = seconds_to_dhms(longest_seconds)
+        return {
+            "most_active_session": most_active_session,
+            "max_interaction_count": max_interaction_count,
+            "most_response_session": most_response_session,
+            "max_response_char_count": max_response_char_count,
+            "longest_duration_session": longest_session,
+            "longest_duration_seconds": longest_seconds,
+            "longest_duration_dhms": f"{days}d {hours}h {minutes}m {seconds}s",
+            "earliest_session": self.earliest.holder,
+            "earliest_time": _format_clock(self.earliest.value),
+            "latest_session": self.latest.holder,
+            "latest_time": _format_clock(self.latest.value),
+            "top_active_sessions": _ranking(self.most_active),
+            "top_response_sessions": _ranking(self.most_response),
+            "top_duration_sessions": _ranking(self.longest_duration),
+        }
+
+
+def _ranking(top: TopK) -> List[Tuple[Session, int]]:
+    return [(session, value) for value, session in top.items]
+
+
+def _format_clock(clock: Optional[int]) -> str:
+    """HH:MM:SS string for microseconds into the day, None when missing"""
+    if clock is None:
+        return None
+    seconds = clock // MICROSECONDS
+    return f"{seconds // 3600:02}:{seconds // 60 % 60:02}:{seconds % 60:02}"
+
+
+def chat_themost(data_list: Iterable[Session]) -> Dict[str, Any]:
+    """find the session with the most interactions"""
+    return accumulate(data_list, ExtremesAccumulator())
 
-    # Convert time objects to string format
-    earliest_time_str = f"{earliest_time.hour:02}:{earliest_time.minute:02}:\
-        {earliest_time.second:02}" if earliest_time else None
-    latest_time_str = f"{latest_time.hour:02}:{latest_time.minute:02}:\
-        {latest_time.second:02}" if latest_time else None
 
-    return earliest_session, earliest_time_str, latest_session, latest_time_str
+class ExtremesAccumulator(Accumulator):
+    """chat_themost as an accumulator, counting response characters as fragments pass"""
+    name = "chat_themost"
 
+    def __init__(self):
+        self.extremes = SessionExtremes()
+        self._response_char_count = 0
 
-def chat_themost(data_list: List[Dict[str, Any]]) -> Dict[str, Any]:
-    """find the session with the most interactions"""
-    most_active_session, max_interaction_count = _find_most_active_session(data_list)
-    most_response_session, max_response_char_count = _find_most_response_session(data_list)
-    longest_duration_session, longest_duration_seconds, days, hours, minutes, seconds =\
-        _find_longest_duration_session(data_list)
-    earliest_session, earliest_time, latest_session, latest_time =\
-        _find_earliest_latest_sessions(data_list)
-
-    return {
-        "most_active_session": most_active_session,
-        "max_interaction_count": max_interaction_count,
-        "most_response_session": most_response_session,
-        "max_response_char_count": max_response_char_count,
-        "longest_duration_session": longest_duration_session,
-        "longest_duration_seconds": longest_duration_seconds,
-        "longest_duration_dhms": f"{days}d {hours}h {minutes}m {seconds}s",
-        "earliest_session": earliest_session,
-        "earliest_time": earliest_time,
-        "latest_session": latest_session,
-        "latest_time": latest_time
-    }
-
-
-def count_per_hour_distribution(data_list: List[Dict[str, Any]]) -> Dict[Any, Any]:
-    """Calculate the distribution of sessions across 24 hours of the day."""
-    hour_distribution = {hour: 0 for hour in range(24)}
-
-    for session in data_list:
-        inserted_at = session.get("inserted_at", "")
-
-        if not inserted_at:
-            continue
-
-        # Parse ISO datetime strings
-        start_time = parser.isoparse(inserted_at)
-
-        # Get the start and end hours
-        start_hour = start_time.hour
-
-        hour_distribution[start_hour] += 1
-
-    return hour_distribution
+    def add_fragment(self, view: FragmentView) -> None:
+        if view.interaction_type in ("RESPONSE", "THINK"):
+            self._response_char_count += len(view.content)
+
+    def end_session(self, session: Session) -> None:
+        self.extremes.add(session, self._response_char_count)
+        self._response_char_count = 0
+
+    def merge(self, other: "ExtremesAccumulator") -> None:
+        self.extremes.merge(other.extremes)
+
+    def finalize(self) -> Dict[str, Any]:
+        return self.extremes.finalize()
+
+
+def count_per_hour_distribution(data_list: TimeSource, timezone: Optional[str] = None) \
+    -> Dict[Any, Any]:
+    """
+    Calculate the distribution of sessions across 24 hours of the day,
+    in the IANA timezone or on the clock each timestamp was written in.
+    """
+    if isinstance(data_list, SessionTimeline):
+        return data_list.count_per_hour_distribution(timezone)
+    if isinstance(data_list, FragmentTable):
+        _check_wall_clock_only(timezone)
+        return data_list.count_per_hour_distribution()
+    return accumulate(data_list, HourAccumulator(timezone))
+
+
+class HourAccumulator(Accumulator):
+    """count_per_hour_distribution as an accumulator"""
+    name = "count_per_hour_distribution"
+
+    def __init__(self, timezone: Optional[str] = None):
+        self.hour_distribution = {hour: 0 for hour in range(24)}
+        self.timezone = timezone
+        self._zone = zone_offsets(timezone) if timezone is not None else None
+
+    def start_session(self, session: Session) -> None:
+        _count_session_hour(session, self.hour_distribution, self._zone)
+
+    def merge(self, other: "HourAccumulator") -> None:
+        _check_same_timezone(self.timezone, other.timezone)
+        add_counts(self.hour_distribution, other.hour_distribution)
+
+    def finalize(self) -> Dict[int, int]:
+        return self.hour_distribution
+
+
+def _count_session_hour(session: Session, hour_distribution: Dict[int, int],
+                        zone: Optional[ZoneOffsets] = None) -> None:
+    """count one session into the hour distribution by its start hour"""
+    start_seconds = _start_seconds(session, zone)
+    if start_seconds is None:
+        return
+    hour_distribution[start_seconds % DAY_SECONDS // 3600] += 1
+
+
+def session_timeline(data_list: Iterable[Session]) -> SessionTimeline:
+    """start epochs and offsets of the sessions, to bucket again in other timezones"""
+    return accumulate(data_list, TimelineAccumulator())
+
+
+class TimelineAccumulator(Accumulator):
+    """session_timeline as an accumulator"""
+    name = "session_timeline"
+
+    def __init__(self):
+        self.timeline = SessionTimeline()
+
+    def start_session(self, session: Session) -> None:
+        self.timeline.add(session)
+
+    def merge(self, other: "TimelineAccumulator") -> None:
+        self.timeline.merge(other.timeline)
+
+    def finalize(self) -> SessionTimeline:
+        return self.timeline
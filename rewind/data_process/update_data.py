@@ -1,16 +1,36 @@
 """update raw chat data"""
-from typing import Any, List, Dict
+from typing import Any, Callable, Dict, Iterable, Iterator, List
 from rewind.utils.providers import ProviderType
-from rewind.data_process.loading_data import load_json
+from rewind.utils.conversation_model import Session
+from rewind.data_process.loading_data import load_json, iter_sessions
 
 # Import specific processors
 from rewind.data_process.different_providers import (update_deepseek_data,
                                                      update_qwen_data,
-                                                     update_claude_data)
+                                                     update_claude_data,
+                                                     normalize_deepseek_session,
+                                                     normalize_qwen_session,
+                                                     normalize_claude_session)
+
+SESSION_NORMALIZERS: Dict[ProviderType, Callable[[Dict[str, Any]], Session]] = {
+    ProviderType.DEEPSEEK: normalize_deepseek_session,
+    ProviderType.QWEN: normalize_qwen_session,
+    ProviderType.CLAUDE: normalize_claude_session,
+}
+
+
+def supported_provider(provider_type: ProviderType) -> ProviderType:
+    """
+    The provider itself when its exports can be normalized, e.g. once detected.
+    Raises ValueError for a provider without a normalizer yet.
+    """
+    if provider_type not in SESSION_NORMALIZERS:
+        raise ValueError(f"{provider_type.value} exports are not supported yet")
+    return provider_type
 
 
 def update_data(data_list: Any, provider_type: ProviderType = ProviderType.DEEPSEEK) \
-    -> List[Dict[str, any]]:
+    -> List[Session]:
     """
     Update the data list by loading only the necessary fields and clean existing data.
     """
@@ -26,6 +46,38 @@ def update_data(data_list: Any, provider_type: ProviderType = ProviderType.DEEPS
     return new_data_list
 
 
+def iter_update_data(raw_sessions: Iterable[Dict[str, Any]],
+                     provider_type: ProviderType = ProviderType.DEEPSEEK) \
+    -> Iterator[Session]:
+    """
+    Streaming update_data: normalize raw sessions one at a time,
+    e.g. straight from iter_sessions.
+    """
+    normalizer = SESSION_NORMALIZERS.get(provider_type)
+    if normalizer is None:
+        raise NotImplementedError(f"Provider type {provider_type} not supported yet.")
+
+    for session in raw_sessions:
+        yield normalizer(session)
+
+
+class NormalizedSessions:  # pylint: disable=too-few-public-methods
+    """
+    Normalized sessions of an export file, streamed from disk on every iteration.
+    Can be iterated more than once without keeping the sessions in memory.
+    """
+
+    def __init__(self, file_path: str, provider_type: ProviderType = ProviderType.DEEPSEEK):
+        if provider_type not in SESSION_NORMALIZERS:
+            raise NotImplementedError(f"Provider type {provider_type} not supported yet.")
+        self.file_path = file_path
+        self.provider_type = provider_type
+
+    def __iter__(self) -> Iterator[Session]:
+        return iter_update_data(iter_sessions(self.file_path, self.provider_type),
+                                self.provider_type)
+
+
 if __name__ == "__main__":
     DEEPSEEK_RAW_PATH = "data/example_deepseek.json"
     QWEN_RAW_PATH = "data/example_qwen.json"
@@ -1,62 +1,399 @@
 """Cache utils for rewind"""
 import os
-import json
-import hashlib
-from typing import Optional, Any
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, BinaryIO, Dict, Iterator, Optional, Tuple
 from pathlib import Path
 
+import xxhash
+
+from rewind.utils.env_utils import env_int
+
+try:
+    from filelock import FileLock
+except ImportError:  # filelock is optional, fcntl covers POSIX
+    FileLock = None
+try:
+    import fcntl
+except ImportError:  # Windows without filelock: eviction is only locked per process
+    fcntl = None
+
 CACHE_DIR = ".rewind_cache"
 
+MAX_ENTRIES_ENV = "REWIND_CACHE_MAX_ENTRIES"
+MAX_MB_ENV = "REWIND_CACHE_MAX_MB"
+DEFAULT_MAX_ENTRIES = 4096
+DEFAULT_MAX_MB = 256
+
+MEMORY_ENTRIES_ENV = "REWIND_CACHE_MEMORY_ENTRIES"
+MEMORY_MB_ENV = "REWIND_CACHE_MEMORY_MB"
+DEFAULT_MEMORY_ENTRIES = 512
+DEFAULT_MEMORY_MB = 64
+
+ENTRY_SUFFIX = ".pkl"
+TEMP_SUFFIX = ".tmp"
+LOCK_NAME = ".lock"
+
+# Writes between full rescans of the directory, which also count the
+# entries other processes added
+RESCAN_INTERVAL = 64
+
+# A memory hit refreshes the entry file's LRU position once it is this old
+TOUCH_INTERVAL_SECONDS = 60
+
+# Temporary files older than this were left by a crashed writer
+STALE_TEMP_SECONDS = 3600
+
+# Bytes hashed per read
+HASH_CHUNK_SIZE = 1 << 20
+
+# File hashes remembered, most recently used last
+MAX_MEMOIZED_DIGESTS = 256
+
+_digests: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+_digests_lock = threading.Lock()
+
+
+def file_digest(file_path: str) -> str:
+    """xxh3-128 hex digest of a file's content, hashed once per path, mtime and size"""
+    stat = os.stat(file_path)
+    memo_key = (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+    with _digests_lock:
+        digest = _digests.get(memo_key)
+        if digest is not None:
+            _digests.move_to_end(memo_key)
+            return digest
+
+    hasher = xxhash.xxh3_128()
+    with open(file_path, "rb") as file_handle:
+        for chunk in iter(lambda: file_handle.read(HASH_CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    digest = hasher.hexdigest()
+
+    with _digests_lock:
+        _digests[memo_key] = digest
+        while len(_digests) > MAX_MEMOIZED_DIGESTS:
+            _digests.popitem(last=False)
+    return digest
+
+
+class ResultCacheStats:
+    """hit, miss and eviction counters of a CacheManager; hits include memory_hits"""
+
+    def __init__(self):
+        self.hits = 0
+        self.memory_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def lookups(self) -> int:
+        """every get() call"""
+        return self.hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        """share of lookups answered from the cache"""
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        """counters and hit rate, e.g. for logging"""
+        return {"lookups": self.lookups, "hits": self.hits, "memory_hits": self.memory_hits,
+                "misses": self.misses, "evictions": self.evictions,
+                "hit_rate": round(self.hit_rate, 4)}
+
+    def __str__(self) -> str:
+        return (f"{self.lookups} lookups, {self.hit_rate:.1%} hits "
+                f"({self.memory_hits} from memory), {self.evictions} evictions")
+
+
 class CacheManager:
-    """Simple file-based cache manager"""
+    """
+    File-based cache manager bounded by entry count and size, with a memory tier.
+
+    Results are content addressed: the key is the xxhash of the input file's
+    bytes plus a name for the computation, so a re-uploaded copy of an export
+    hits the cache while an edited file misses it. Values are pickled, so they
+    come back with their exact types.
 
-    def __init__(self, cache_dir: str = CACHE_DIR):
+    Entries are written to a temporary file and renamed into place, so readers
+    never see a partial entry. Past the entry or byte cap (REWIND_CACHE_MAX_ENTRIES,
+    REWIND_CACHE_MAX_MB, 0 for no cap) the least recently used entries are
+    deleted under a lock file; a hit refreshes the entry's mtime, its LRU position
+    across processes.
+
+    get() and set() go through an in-process LRU of the pickled entries
+    (REWIND_CACHE_MEMORY_ENTRIES, REWIND_CACHE_MEMORY_MB, 0 turns it off). Every
+    hit is unpickled afresh, and a memory hit is dropped once its file has been
+    evicted, discarded or replaced by any process. Malformed settings fall back
+    to the defaults.
+    """
+
+    # pylint: disable=too-many-instance-attributes,too-many-arguments,too-many-positional-arguments
+    def __init__(self, cache_dir: str = CACHE_DIR, max_entries: Optional[int] = None,
+                 max_bytes: Optional[int] = None, memory_entries: Optional[int] = None,
+                 memory_bytes: Optional[int] = None):
+        # Created on the first write, so merely importing the module leaves no directory behind
         self.cache_dir = Path(cache_dir)
-        self.cache_dir.mkdir(exist_ok=True)
+        self._root = str(self.cache_dir)
+        self.max_entries = max_entries if max_entries is not None else \
+            env_int(MAX_ENTRIES_ENV, DEFAULT_MAX_ENTRIES)
+        self.max_bytes = max_bytes if max_bytes is not None else \
+            env_int(MAX_MB_ENV, DEFAULT_MAX_MB) * 1024 * 1024
+        self.memory_entries = memory_entries if memory_entries is not None else \
+            env_int(MEMORY_ENTRIES_ENV, DEFAULT_MEMORY_ENTRIES)
+        self.memory_bytes = memory_bytes if memory_bytes is not None else \
+            env_int(MEMORY_MB_ENV, DEFAULT_MEMORY_MB) * 1024 * 1024
+        self.stats = ResultCacheStats()
+        # Guards the counters below; _eviction_lock serializes this process's evictions
+        self._thread_lock = threading.Lock()
+        self._eviction_lock = threading.Lock()
+        self._file_lock = FileLock(str(self.cache_dir / LOCK_NAME)) if FileLock else None
+        # Entry count and bytes as of the last scan plus this process's writes since
+        self._entries: Optional[int] = None
+        self._bytes = 0
+        self._writes_since_scan = 0
+        # Entry path -> (pickled entry, inode of the file it matches), most recently used last
+        self._memory: "OrderedDict[str, Tuple[bytes, int]]" = OrderedDict()
+        self._memory_size = 0
 
     def _get_cache_key(self, file_path: str, function_name: str) -> str:
-        """Generate a unique cache key based on file path and function name"""
-        abs_path = os.path.abspath(file_path)
-        key_str = f"{abs_path}:{function_name}"
-        return hashlib.md5(key_str.encode()).hexdigest()
+        """Generate a unique cache key based on file content and function name"""
+        key_str = f"{file_digest(file_path)}:{function_name}"
+        return xxhash.xxh3_128_hexdigest(key_str.encode("utf-8"))
+
+    def _entry_path(self, file_path: str, function_name: str) -> str:
+        key = self._get_cache_key(file_path, function_name)
+        return os.path.join(self._root, key + ENTRY_SUFFIX)
 
     def get(self, file_path: str, function_name: str) -> Optional[Any]:
         """Get cached result if valid"""
-        cache_key = self._get_cache_key(file_path, function_name)
-        cache_file = self.cache_dir / f"{cache_key}.json"
+        try:
+            cache_file = self._entry_path(file_path, function_name)
+            payload = self._recall(cache_file)
+            if payload is not None:
+                data = pickle.loads(payload)
+                self._count(True, memory=True)
+                return data
+            with open(cache_file, "rb") as file_handle:
+                payload = file_handle.read()
+                inode = os.fstat(file_handle.fileno()).st_ino
+            data = pickle.loads(payload)
+            # Move the entry to the young end of the LRU order
+            os.utime(cache_file)
+        except FileNotFoundError:
+            data = None
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError,
+                IndexError, TypeError, ValueError):
+            # A foreign or corrupt file is a miss, it is overwritten on set()
+            data = None
+        if data is not None:
+            self._remember(cache_file, payload, inode)
+        self._count(data is not None)
+        return data
 
-        if not cache_file.exists():
-            return None
+    def set(self, file_path: str, function_name: str, data: Any):
+        """Save result to cache"""
+        try:
+            payload = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return
+        if self.max_bytes and len(payload) > self.max_bytes:
+            return
+        try:
+            cache_file = self._entry_path(file_path, function_name)
+            with self.writer(file_path, function_name) as file_handle:
+                file_handle.write(payload)
+            self._remember(cache_file, payload, os.stat(cache_file).st_ino)
+        except OSError:
+            pass
 
+    def open_entry(self, file_path: str, function_name: str) -> Optional[BinaryIO]:
+        """binary handle on an entry written through writer(), None (a miss) when absent"""
         try:
-            with open(cache_file, 'r', encoding='utf-8') as file_handle:
-                cache_data = json.load(file_handle)
+            cache_file = self._entry_path(file_path, function_name)
+            file_handle = open(cache_file, "rb")  # pylint: disable=consider-using-with
+        except OSError:
+            file_handle = None
+        else:
+            try:
+                os.utime(cache_file)
+            except OSError:
+                pass
+        self._count(file_handle is not None)
+        return file_handle
 
-            # Check if source file has changed
-            current_mtime = os.path.getmtime(file_path)
-            if current_mtime != cache_data.get('mtime'):
-                return None
+    @contextmanager
+    def writer(self, file_path: str, function_name: str) -> Iterator[BinaryIO]:
+        """
+        Binary file for an entry written in pieces. It is renamed into place
+        when the block exits without an error, and dropped when it outgrows
+        max_bytes.
+        """
+        cache_file = self._entry_path(file_path, function_name)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        handle, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=TEMP_SUFFIX)
+        try:
+            with os.fdopen(handle, "wb") as file_handle:
+                yield file_handle
+                size = file_handle.tell()
+            if self.max_bytes and size > self.max_bytes:
+                _remove(temp_path)
+                return
+            self._forget(cache_file)
+            os.replace(temp_path, cache_file)
+        except BaseException:
+            _remove(temp_path)
+            raise
+        self._added(size)
 
-            return cache_data.get('data')
-        except (OSError, json.JSONDecodeError, AttributeError):
-            return None
+    def discard(self, file_path: str, function_name: str) -> None:
+        """delete an entry, e.g. one that failed to load"""
+        try:
+            cache_file = self._entry_path(file_path, function_name)
+        except OSError:
+            return
+        self._forget(cache_file)
+        _remove(cache_file)
 
-    def set(self, file_path: str, function_name: str, data: Any):
-        """Save result to cache"""
-        cache_key = self._get_cache_key(file_path, function_name)
-        cache_file = self.cache_dir / f"{cache_key}.json"
+    def _count(self, hit: bool, memory: bool = False) -> None:
+        with self._thread_lock:
+            if hit:
+                self.stats.hits += 1
+                self.stats.memory_hits += memory
+            else:
+                self.stats.misses += 1
 
+    def _recall(self, cache_file: str) -> Optional[bytes]:
+        """the memory copy of an entry while its file is still the one it was read from"""
+        with self._thread_lock:
+            remembered = self._memory.get(cache_file)
+        if remembered is None:
+            return None
+        payload, inode = remembered
         try:
-            current_mtime = os.path.getmtime(file_path)
-            cache_data = {
-                'mtime': current_mtime,
-                'data': data
-            }
-
-            with open(cache_file, 'w', encoding='utf-8') as file_handle:
-                json.dump(cache_data, file_handle, ensure_ascii=False)
-        except (OSError, json.JSONDecodeError, AttributeError):
-            pass
+            stat = os.stat(cache_file)
+            if stat.st_ino != inode:
+                raise FileNotFoundError(cache_file)
+            if time.time() - stat.st_mtime > TOUCH_INTERVAL_SECONDS:
+                os.utime(cache_file)
+        except OSError:
+            self._forget(cache_file)
+            return None
+        with self._thread_lock:
+            if cache_file in self._memory:
+                self._memory.move_to_end(cache_file)
+        return payload
+
+    def _remember(self, cache_file: str, payload: bytes, inode: int) -> None:
+        """keep an entry in memory, dropping the least recently used past the memory caps"""
+        if not self.memory_entries or (self.memory_bytes and len(payload) > self.memory_bytes):
+            return
+        with self._thread_lock:
+            previous = self._memory.pop(cache_file, None)
+            if previous is not None:
+                self._memory_size -= len(previous[0])
+            self._memory[cache_file] = (payload, inode)
+            self._memory_size += len(payload)
+            while len(self._memory) > self.memory_entries or \
+                    (self.memory_bytes and self._memory_size > self.memory_bytes):
+                _, (dropped, _) = self._memory.popitem(last=False)
+                self._memory_size -= len(dropped)
+
+    def _forget(self, cache_file: str) -> None:
+        with self._thread_lock:
+            previous = self._memory.pop(cache_file, None)
+            if previous is not None:
+                self._memory_size -= len(previous[0])
+
+    def _added(self, size: int) -> None:
+        """account for a new entry and evict once a cap is exceeded or a rescan is due"""
+        with self._thread_lock:
+            self._bytes += size
+            self._entries = self._entries + 1 if self._entries is not None else None
+            self._writes_since_scan += 1
+            due = self._entries is None or self._writes_since_scan >= RESCAN_INTERVAL or \
+                self._over_capacity(self._entries, self._bytes)
+        if due:
+            self.evict()
+
+    def _over_capacity(self, entries: int, size: int) -> bool:
+        return bool((self.max_entries and entries > self.max_entries) or
+                    (self.max_bytes and size > self.max_bytes))
+
+    def evict(self) -> int:
+        """
+        Delete least recently used entries until the caps hold, and temporary
+        files left by crashed writers. Returns the number of entries deleted.
+        """
+        with self._locked():
+            entries = []
+            now = time.time()
+            for entry in os.scandir(self._root):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                if entry.name.endswith(TEMP_SUFFIX):
+                    if now - stat.st_mtime > STALE_TEMP_SECONDS:
+                        _remove(entry.path)
+                elif entry.name.endswith(ENTRY_SUFFIX):
+                    entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+            entries.sort()
+
+            count, size = len(entries), sum(entry[1] for entry in entries)
+            evicted = 0
+            for _, entry_size, path in entries:
+                if not self._over_capacity(count, size):
+                    break
+                _remove(path)
+                self._forget(path)
+                count -= 1
+                size -= entry_size
+                evicted += 1
+
+        with self._thread_lock:
+            self._entries, self._bytes = count, size
+            self._writes_since_scan = 0
+            self.stats.evictions += evicted
+        return evicted
+
+    def usage(self) -> Tuple[int, int]:
+        """(entries, bytes) of the cache directory as of the last scan"""
+        if self._entries is None:
+            self.evict()
+        return self._entries, self._bytes
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """exclusive across the threads of this process and, on the lock file, across processes"""
+        with self._eviction_lock:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            if self._file_lock is not None:
+                with self._file_lock:
+                    yield
+            elif fcntl is not None:
+                with open(self.cache_dir / LOCK_NAME, "a+b") as lock_handle:
+                    fcntl.flock(lock_handle, fcntl.LOCK_EX)
+                    try:
+                        yield
+                    finally:
+                        fcntl.flock(lock_handle, fcntl.LOCK_UN)
+            else:
+                yield
+
+
+def _remove(path: str) -> None:
+    """delete a file another process may have deleted already"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
 
 _cache_manager = CacheManager()
 
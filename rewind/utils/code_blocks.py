@@ -0,0 +1,76 @@
+"""
+Fenced code block tokenizer.
+Markdown fences are found line by line: a fence line is up to three spaces,
+then three or more backticks or tildes, then an optional info string whose
+first word is the block's language. A block closes at the next fence line of
+the same character at least as long with nothing after it, or runs to the end
+of the text when it never closes (as in CommonMark) if anything follows it.
+Only fence lines are ever matched, so the text is read once whatever its
+fences look like.
+"""
+import re
+from typing import Iterator, NamedTuple, Tuple
+
+# Language reported for a block without an info string
+UNLABELED_LANGUAGE = "text"
+
+_FENCE_LINE = re.compile(r"^ {0,3}(`{3,}|~{3,})([^\n]*)$", re.MULTILINE)
+
+
+class CodeBlock(NamedTuple):
+    """one fenced block: lowercased language, body lines and body size in UTF-8 bytes"""
+    language: str
+    lines: int
+    size: int
+
+
+def iter_code_blocks(text: str) -> Iterator[CodeBlock]:
+    """every fenced code block of a markdown text, in order"""
+    for _, body_start, body_end, _, language in _iter_fenced(text):
+        yield _block(language, text[body_start:body_end])
+
+
+def strip_code_blocks(text: str) -> str:
+    """the text outside its fenced code blocks, each block and its fences cut to a line break"""
+    pieces = []
+    pos = 0
+    for start, _, _, end, _ in _iter_fenced(text):
+        pieces.append(text[pos:start])
+        pos = end
+    if not pieces:
+        return text
+    pieces.append(text[pos:])
+    return "\n".join(pieces)
+
+
+def _iter_fenced(text: str) -> Iterator[Tuple[int, int, int, int, str]]:
+    """(start, body start, body end, end, language) of every fenced code block"""
+    if "```" not in text and "~~~" not in text:
+        return
+    fence = None
+    start = body_start = 0
+    language = ""
+    for match in _FENCE_LINE.finditer(text):
+        marker, info = match.group(1), match.group(2)
+        if fence is None:
+            # Backticks in a backtick fence's info string make it inline code
+            if marker[0] == "`" and "`" in info:
+                continue
+            fence = marker
+            words = info.split(maxsplit=1)
+            language = words[0].lower() if words else UNLABELED_LANGUAGE
+            start, body_start = match.start(), match.end() + 1
+        elif marker[0] == fence[0] and len(marker) >= len(fence) and not info.strip():
+            yield start, body_start, match.start(), match.end(), language
+            fence = None
+    # A stray fence on the last lines opens nothing worth counting
+    if fence is not None and text[body_start:].strip():
+        yield start, body_start, len(text), len(text), language
+
+
+def _block(language: str, body: str) -> CodeBlock:
+    lines = body.count("\n")
+    if body and not body.endswith("\n"):
+        lines += 1
+    size = len(body) if body.isascii() else len(body.encode("utf-8"))
+    return CodeBlock(language, lines, size)
@@ -1,26 +1,39 @@
 """Common utility functions for data processing"""
 import datetime
+import os
+from functools import lru_cache
 from zoneinfo import ZoneInfo
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Union
+from rewind.utils.conversation_model import Session, Message, Fragment
+
+# Exports that carry no UTC offset of the user (Qwen epochs, Claude UTC
+# strings) are written in this zone; time metrics can still be bucketed in
+# any other zone at aggregation time
+SOURCE_TIMEZONE_ENV = "REWIND_SOURCE_TIMEZONE"
+DEFAULT_SOURCE_TIMEZONE = "Asia/Shanghai"
+
+
+@lru_cache(maxsize=None)
+def source_timezone() -> ZoneInfo:
+    """zone of REWIND_SOURCE_TIMEZONE, Asia/Shanghai by default"""
+    return ZoneInfo(os.environ.get(SOURCE_TIMEZONE_ENV, "").strip() or DEFAULT_SOURCE_TIMEZONE)
 
 
 def format_timestamp(timestamp: int) -> str:
-    """Format timestamp to ISO string with timezone +8"""
-    tz_plus_8 = datetime.timezone(datetime.timedelta(hours=8))
-    date_time = datetime.datetime.fromtimestamp(timestamp, tz=tz_plus_8)
+    """Format timestamp to ISO string in the source timezone"""
+    date_time = datetime.datetime.fromtimestamp(timestamp, tz=source_timezone())
     return date_time.isoformat()
 
 
-def utc_to_iso_plus8(iso_str: str) -> str:
-    """Convert UTC ISO string to ISO string with +8 timezone"""
+def utc_to_source_timezone(iso_str: str) -> str:
+    """Convert UTC ISO string to ISO string in the source timezone"""
     if iso_str == "unknown":
         return "unknown"
     dt_utc = datetime.datetime.fromisoformat(iso_str.replace("Z", "+00:00"))
-    dt_plus8 = dt_utc.astimezone(ZoneInfo("Asia/Shanghai"))
-    return dt_plus8.isoformat()
+    return dt_utc.astimezone(source_timezone()).isoformat()
 
 
-def process_message_fragments(message: Dict[str, any]) -> Tuple[List[Dict[str, any]], str]:
+def process_message_fragments(message: Dict[str, any]) -> Tuple[List[Fragment], str]:
     """Process message fragments and return fragments list and model name"""
     fragments = []
     model = ""
@@ -35,16 +48,10 @@ def process_message_fragments(message: Dict[str, any]) -> Tuple[List[Dict[str, a
             meg_type = "THINK" if phase == "think" else "RESPONSE" if phase == "answer" else ""
             content = item.get("content", "")
             if meg_type:
-                fragments.append({
-                    "type": meg_type,
-                    "content": content
-                })
+                fragments.append(Fragment(meg_type, content))
         model = message.get("model", "unknown")
     else:
-        fragments.append({
-            "type": "REQUEST",
-            "content": message.get("content", "")
-        })
+        fragments.append(Fragment("REQUEST", message.get("content", "")))
         models = message.get("models", [])
         model = models[0] if models else "unknown"
 
@@ -59,40 +66,57 @@ def find_parent_message(messages: List[Dict[str, any]], parent_id: str) -> Dict[
     return None
 
 
-def build_interaction_chain(messages: List[Dict[str, any]]) -> List[Dict[str, any]]:
-    """Build the longest interaction chain from messages"""
+def index_messages(messages: List[Dict[str, any]]) -> Dict[str, Dict[str, any]]:
+    """Map message ID to message, the first message wins like find_parent_message"""
+    index = {}
+    for msg in messages:
+        index.setdefault(msg.get("id", ""), msg)
+    return index
+
+
+def build_interaction_chain(messages: List[Dict[str, any]], all_branches: bool = False) \
+    -> Union[List[Message], List[List[Message]]]:
+    """
+    Build the longest interaction chain from messages, ending at the last message.
+    With all_branches, return one chain per branch instead, i.e. per message
+    that no other message names as its parent, in message order.
+    """
     if not messages:
         return []
 
+    index = index_messages(messages)
+    if not all_branches:
+        return _build_chain(messages[-1], index, len(messages))
+
+    parent_ids = {msg.get("parentId") for msg in messages}
+    return [_build_chain(msg, index, len(messages)) for msg in messages
+            if msg.get("id", "") not in parent_ids]
+
+
+def _build_chain(current_msg: Dict[str, any], index: Dict[str, Dict[str, any]],
+                 max_length: int) -> List[Message]:
+    """Follow parentId links from one message up to the root through the ID index"""
     interaction_chain = []
-    current_msg = messages[-1]
 
-    while current_msg:
+    # A chain can not be longer than the session unless the parent links loop
+    while current_msg and len(interaction_chain) < max_length:
         fragments, model = process_message_fragments(current_msg)
         if not fragments and current_msg.get("role", "") == "assistant":
             break
 
-        interaction_chain.append({
-            'id': current_msg.get("id", ""),
-            'message': {
-                "model": model,
-                "fragments": fragments
-            }
-        })
+        interaction_chain.append(Message(current_msg.get("id", ""), model, fragments))
 
         parent_id = current_msg.get("parentId", "-1")
         if not parent_id or parent_id == "-1":
             break
 
-        current_msg = find_parent_message(messages, parent_id)
-        if not current_msg:
-            break
+        current_msg = index.get(parent_id)
 
     interaction_chain.reverse()
     return interaction_chain
 
 
-def process_session(session: Dict[str, any]) -> Dict[str, any]:
+def process_session(session: Dict[str, any]) -> Session:
     """Process a single session and return formatted data"""
     title = session.get("title", "unknown")
     created_at = session.get("created_at", 0)
@@ -101,9 +125,5 @@ def process_session(session: Dict[str, any]) -> Dict[str, any]:
     messages = session.get("chat", {}).get("messages", [])
     interaction_chain = build_interaction_chain(messages)
 
-    return {
-        "title": title,
-        "inserted_at": format_timestamp(created_at),
-        "updated_at": format_timestamp(updated_at),
-        "longest_interaction_list": interaction_chain
-    }
+    return Session(title, format_timestamp(created_at), format_timestamp(updated_at),
+                   interaction_chain, session.get("id", ""))
@@ -0,0 +1,16 @@
+"""
+Configuration analysis results depend on besides the export itself.
+Every cache of results or normalized sessions keys its entries with
+config_tag(), so changing REWIND_SOURCE_TIMEZONE, REWIND_WORD_LISTS or
+REWIND_DETECT_SAMPLE_CHARS misses entries written under other settings
+instead of serving them.
+"""
+from rewind.utils.common_utils import source_timezone
+from rewind.utils.keyword_scanner import get_keyword_scanner
+from rewind.utils.language_utils import DETECTOR_TAG
+
+
+def config_tag() -> str:
+    """detector version and sample size, word lists digest and source timezone"""
+    return (f"detector={DETECTOR_TAG};words={get_keyword_scanner().digest};"
+            f"source_tz={source_timezone().key}")
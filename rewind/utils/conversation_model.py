@@ -0,0 +1,128 @@
+"""
+Compact typed records for normalized conversations.
+Provider processors emit these instead of nested dicts: attribute access in
+the metric loops skips the .get() chains, __slots__ drops the per-object
+dict, and model and fragment type strings are interned so every fragment
+shares one copy of them.
+"""
+# Plain record types
+# pylint: disable=too-few-public-methods
+import sys
+from typing import Any, Dict, List, Tuple
+
+from rewind.utils.time_utils import parse_timestamp
+
+
+def _intern(value: Any) -> Any:
+    """intern strings, keep anything else (e.g. a null model) as it is"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class Fragment:
+    """one REQUEST/THINK/RESPONSE piece of a message"""
+    __slots__ = ("interaction_type", "content")
+
+    def __init__(self, interaction_type: str, content: str):
+        self.interaction_type = _intern(interaction_type)
+        self.content = content
+
+    def to_dict(self) -> Dict[str, Any]:
+        """legacy {"type", "content"} dict"""
+        return {"type": self.interaction_type, "content": self.content}
+
+
+class Message:
+    """one message of a session's longest interaction chain"""
+    __slots__ = ("message_id", "model", "fragments")
+
+    def __init__(self, message_id: str, model: str, fragments: List[Fragment]):
+        self.message_id = message_id
+        self.model = _intern(model)
+        self.fragments = fragments
+
+    def to_dict(self) -> Dict[str, Any]:
+        """legacy {"id", "message": {"model", "fragments"}} record dict"""
+        return {
+            "id": self.message_id,
+            "message": {
+                "model": self.model,
+                "fragments": [fragment.to_dict() for fragment in self.fragments]
+            }
+        }
+
+
+class Session:  # pylint: disable=too-many-instance-attributes
+    """
+    one normalized conversation, messages hold its longest interaction chain.
+    session_id is the provider's conversation id, "" when the export has none.
+    The ISO timestamps are parsed once here: *_epoch_us is the UTC epoch in
+    microseconds (None when the string does not parse) and *_offset the UTC
+    offset in seconds the string was written in.
+    """
+    __slots__ = ("title", "inserted_at", "updated_at", "messages", "session_id",
+                 "inserted_epoch_us", "inserted_offset", "updated_epoch_us", "updated_offset")
+
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    def __init__(self, title: str, inserted_at: str, updated_at: str, messages: List[Message],
+                 session_id: str = ""):
+        self.title = title
+        self.inserted_at = inserted_at
+        self.updated_at = updated_at
+        self.messages = messages
+        self.session_id = session_id
+        self.inserted_epoch_us, self.inserted_offset = parse_timestamp(inserted_at)
+        self.updated_epoch_us, self.updated_offset = parse_timestamp(updated_at)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """legacy normalized session dict with longest_interaction_list"""
+        return {
+            "title": self.title,
+            "inserted_at": self.inserted_at,
+            "updated_at": self.updated_at,
+            "longest_interaction_list": [message.to_dict() for message in self.messages]
+        }
+
+    def to_record(self) -> Tuple[Any, ...]:
+        """
+        the session as nested tuples and lists of plain values, which pickle
+        about twice as fast as the objects and restore with from_record
+        """
+        return (self.title, self.inserted_at, self.updated_at,
+                self.inserted_epoch_us, self.inserted_offset,
+                self.updated_epoch_us, self.updated_offset,
+                [(message.message_id, message.model,
+                  [(fragment.interaction_type, fragment.content)
+                   for fragment in message.fragments])
+                 for message in self.messages],
+                self.session_id)
+
+    @classmethod
+    def from_record(cls, record: Tuple[Any, ...]) -> "Session":
+        """rebuild a to_record() session, keeping its parsed timestamps instead of parsing again"""
+        new = object.__new__
+        session = new(cls)
+        (session.title, session.inserted_at, session.updated_at,
+         session.inserted_epoch_us, session.inserted_offset,
+         session.updated_epoch_us, session.updated_offset, message_records,
+         session.session_id) = record
+        messages = []
+        for message_id, model, fragment_records in message_records:
+            message = new(Message)
+            message.message_id = message_id
+            message.model = _intern(model)
+            fragments = []
+            for interaction_type, content in fragment_records:
+                fragment = new(Fragment)
+                fragment.interaction_type = _intern(interaction_type)
+                fragment.content = content
+                fragments.append(fragment)
+            message.fragments = fragments
+            messages.append(message)
+        session.messages = messages
+        return session
+
+
+def fragments_from_dicts(fragments: List[Dict[str, Any]]) -> List[Fragment]:
+    """typed fragments from raw {"type", "content"} dicts"""
+    return [Fragment(fragment.get("type", ""), fragment.get("content", ""))
+            for fragment in fragments]
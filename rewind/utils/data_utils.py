@@ -1,34 +1,25 @@
 """Common utility functions for data processing"""
-from typing import List, Dict, Generator, Tuple
+from typing import Generator, Iterable, Tuple
+from rewind.utils.conversation_model import Session
 
 
-def iterate_fragments(data_list: List[Dict[str, any]]) -> Generator[Tuple[str, str], None, None]:
+def iterate_fragments(data_list: Iterable[Session]) -> Generator[Tuple[str, str], None, None]:
     """
     Generator that yields (content, interaction_type) tuples for all fragments in the data.
     """
     for session in data_list:
-        interaction = session.get("longest_interaction_list", [])
+        for message in session.messages:
+            for fragment in message.fragments:
+                yield fragment.content, fragment.interaction_type
 
-        for record in interaction:
-            fragments = record.get("message", {}).get("fragments", [])
-            for fragment in fragments:
-                content = fragment.get("content", "")
-                interaction_type = fragment.get("type", "")
-                yield content, interaction_type
 
-
-def iterate_fragments_with_model(data_list: List[Dict[str, any]]) ->\
+def iterate_fragments_with_model(data_list: Iterable[Session]) ->\
     Generator[Tuple[str, str, str], None, None]:
     """
     Generator that yields (content, interaction_type, model_type) tuples
     """
     for session in data_list:
-        interaction = session.get("longest_interaction_list", [])
-
-        for record in interaction:
-            fragments = record.get("message", {}).get("fragments", [])
-            model_type = record.get("message", {}).get("model", "unknown")
-            for fragment in fragments:
-                content = fragment.get("content", "")
-                interaction_type = fragment.get("type", "")
-                yield content, interaction_type, model_type
+        for message in session.messages:
+            model_type = message.model
+            for fragment in message.fragments:
+                yield fragment.content, fragment.interaction_type, model_type
@@ -0,0 +1,66 @@
+"""
+Emoji sequence matching.
+A regular expression built from every emoji.EMOJI_DATA key as a trie matches
+the longest emoji at a position, so ZWJ sequences, flags, keycaps and
+skin-tone modifiers count as the one emoji they render as. Qualified and
+unqualified spellings of an emoji (with or without U+FE0F) are counted under
+its fully-qualified form.
+The trie is only tried where a cheap character class of emoji first
+characters finds a candidate: the trie's own first-character set holds over a
+thousand astral literals that the regex engine checks one by one at every
+position, while the class keeps the BMP ones as a bitmap and folds the astral
+ones into a range.
+"""
+import re
+from functools import lru_cache
+from typing import Dict, Iterator, Tuple
+
+import emoji
+
+from rewind.utils.keyword_scanner import trie_pattern
+
+KEYCAP_BASES = "0123456789#*"
+
+
+def _candidate_pattern(sequences) -> str:
+    """
+    Character class that matches wherever an emoji may start: keycap bases
+    only before a keycap, exact BMP first characters, and astral first
+    characters as one range (the few non-emoji inside it fail the trie)
+    """
+    firsts = {sequence[0] for sequence in sequences if sequence[0] not in KEYCAP_BASES}
+    bmp = "".join(re.escape(char) for char in sorted(firsts) if ord(char) <= 0xFFFF)
+    astral = sorted(char for char in firsts if ord(char) > 0xFFFF)
+    astral_range = f"{astral[0]}-{astral[-1]}" if astral else ""
+    return f"[{re.escape(KEYCAP_BASES)}](?=\ufe0f?\u20e3)|[{bmp}{astral_range}]"
+
+
+@lru_cache(maxsize=None)
+def _emoji_matcher() -> Tuple["re.Pattern[str]", "re.Pattern[str]", Dict[str, str]]:
+    """candidate pattern, longest-match trie and the canonical form of every emoji spelling"""
+    fully_qualified = {data["en"]: sequence for sequence, data in emoji.EMOJI_DATA.items()
+                       if data["status"] == emoji.STATUS["fully_qualified"]}
+    canonical = {sequence: fully_qualified.get(data["en"], sequence)
+                 for sequence, data in emoji.EMOJI_DATA.items()}
+    return (re.compile(_candidate_pattern(emoji.EMOJI_DATA)),
+            re.compile(trie_pattern(emoji.EMOJI_DATA)), canonical)
+
+
+def iter_emojis(text: str) -> Iterator[str]:
+    """every emoji of a text in order, each as its fully-qualified sequence"""
+    candidates, trie, canonical = _emoji_matcher()
+    search, match_at = candidates.search, trie.match
+    candidate = search(text)
+    while candidate is not None:
+        found = match_at(text, candidate.start())
+        if found is None:
+            candidate = search(text, candidate.end())
+        else:
+            yield canonical[found.group()]
+            candidate = search(text, found.end())
+
+
+def count_emojis(text: str, emoji_stats: Dict[str, int]) -> None:
+    """add the emojis of a text to per-emoji counts"""
+    for sequence in iter_emojis(text):
+        emoji_stats[sequence] = emoji_stats.get(sequence, 0) + 1
@@ -0,0 +1,22 @@
+"""Settings read from environment variables"""
+import logging
+import os
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+def env_int(name: str, default: Optional[int]) -> Optional[int]:
+    """
+    Integer value of an environment variable, default when it is unset or empty.
+    A malformed value also falls back to default, with a warning, so a typo in a
+    setting read at import time cannot keep the app from starting.
+    """
+    value = os.environ.get(name, "").strip()
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        logger.warning("Ignoring %s=%r, not an integer; using %s", name, value, default)
+        return default
@@ -0,0 +1,115 @@
+"""
+Pluggable JSON backend.
+Uses the fastest installed parser (orjson, ujson, simdjson) and falls back to
+the stdlib json module. Set REWIND_JSON_BACKEND to force one by name.
+"""
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional, Union
+
+BACKEND_ENV = "REWIND_JSON_BACKEND"
+
+# Tried in this order when no backend is forced
+PREFERRED_BACKENDS = ["orjson", "ujson", "simdjson", "json"]
+
+
+class JsonBackend:
+    """loads/dumps pair of one JSON library with stdlib json error semantics"""
+
+    def __init__(self, name: str, loads_func: Callable[[Union[str, bytes]], Any],
+                 dumps_func: Callable[[Any], str]):
+        self.name = name
+        self._loads = loads_func
+        self.dumps = dumps_func
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        """decode a document, raising json.JSONDecodeError when it is malformed"""
+        try:
+            return self._loads(data)
+        except json.JSONDecodeError:
+            raise
+        except ValueError as error:
+            raise json.JSONDecodeError(str(error), "", 0) from error
+
+    def load_file(self, file_path: str) -> Any:
+        """read and decode a whole file"""
+        with open(file_path, 'rb') as file:
+            return self.loads(file.read())
+
+    def __repr__(self) -> str:
+        return f"JsonBackend({self.name!r})"
+
+
+def _stdlib_backend() -> JsonBackend:
+    return JsonBackend("json", json.loads, lambda obj: json.dumps(obj, ensure_ascii=False))
+
+
+def _orjson_backend() -> JsonBackend:
+    # pylint: disable=import-outside-toplevel,no-member
+    import orjson
+    return JsonBackend("orjson", orjson.loads,
+                       lambda obj: orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode())
+
+
+def _ujson_backend() -> JsonBackend:
+    import ujson  # pylint: disable=import-outside-toplevel,import-error
+    return JsonBackend("ujson", ujson.loads, lambda obj: ujson.dumps(obj, ensure_ascii=False))
+
+
+def _simdjson_backend() -> JsonBackend:
+    import simdjson  # pylint: disable=import-outside-toplevel,import-error
+    return JsonBackend("simdjson", simdjson.loads,
+                       lambda obj: json.dumps(obj, ensure_ascii=False))
+
+
+_FACTORIES: Dict[str, Callable[[], JsonBackend]] = {
+    "orjson": _orjson_backend,
+    "ujson": _ujson_backend,
+    "simdjson": _simdjson_backend,
+    "json": _stdlib_backend,
+}
+
+
+def get_backend(name: str) -> Optional[JsonBackend]:
+    """backend by library name, None when that library is not installed"""
+    factory = _FACTORIES.get(name)
+    if factory is None:
+        raise ValueError(f"Unknown JSON backend {name!r}, expected one of {PREFERRED_BACKENDS}")
+    try:
+        return factory()
+    except ImportError:
+        return None
+
+
+def available_backends() -> List[JsonBackend]:
+    """every installed backend, fastest first"""
+    backends = [get_backend(name) for name in PREFERRED_BACKENDS]
+    return [backend for backend in backends if backend is not None]
+
+
+def _select_backend() -> JsonBackend:
+    forced = os.environ.get(BACKEND_ENV, "").strip().lower()
+    if forced:
+        selected = get_backend(forced)
+        if selected is None:
+            raise ImportError(f"{BACKEND_ENV}={forced} but {forced} is not installed")
+        return selected
+    return available_backends()[0]
+
+
+ACTIVE_BACKEND = _select_backend()
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """decode with the selected backend"""
+    return ACTIVE_BACKEND.loads(data)
+
+
+def dumps(obj: Any) -> str:
+    """encode with the selected backend, non-ASCII kept as is"""
+    return ACTIVE_BACKEND.dumps(obj)
+
+
+def load_file(file_path: str) -> Any:
+    """read and decode a whole file with the selected backend"""
+    return ACTIVE_BACKEND.load_file(file_path)
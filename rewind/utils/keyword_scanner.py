@@ -0,0 +1,148 @@
+"""
+Multi-keyword scanner for the politeness and refusal word lists.
+Every word of every list is compiled into one trie-shaped regular expression,
+so a fragment is scanned once no matter how many words the lists hold.
+Each search reports the longest word starting at the first position with a
+match and the next search starts one character later; words that are
+prefixes of the match come from a precomputed prefix closure, so overlapping
+and nested words are all found, as with `in`.
+Word lists load from the JSON file named by REWIND_WORD_LISTS, e.g.
+{"polite": ["please", "请"], "impolite": [...], "refuse": [...]};
+lists it leaves out keep the defaults from language_utils.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Set
+
+from rewind.utils import json_backend
+from rewind.utils.language_utils import (
+    POLITE_WORDS_LIST,
+    IMPOLITE_WORDS_LIST,
+    REFUSE_WORDS_LIST,
+)
+
+WORD_LISTS_ENV = "REWIND_WORD_LISTS"
+
+DEFAULT_WORD_LISTS = {
+    "polite": POLITE_WORDS_LIST,
+    "impolite": IMPOLITE_WORDS_LIST,
+    "refuse": REFUSE_WORDS_LIST,
+}
+
+
+def trie_pattern(words: Iterable[str]) -> str:
+    """
+    Regex alternation of the words shaped like their trie, so matching walks
+    shared prefixes once. At each position it matches the longest word.
+    """
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    return _node_pattern(trie)
+
+
+def _node_pattern(node: Dict[str, dict]) -> str:
+    ends_here = "" in node
+    branches = [re.escape(char) + _node_pattern(child)
+                for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ""
+    if len(branches) == 1 and len(branches[0]) == 1:
+        body = branches[0]
+    else:
+        body = "(?:" + "|".join(branches) + ")"
+    # Greedy optional: continue to a longer word when one follows
+    return body + "?" if ends_here else body
+
+
+class KeywordScanner:
+    """
+    One compiled pattern for several named word lists.
+    scan() returns, per list, the words of that list the text contains.
+    """
+
+    def __init__(self, word_lists: Dict[str, Iterable[str]]):
+        self.word_lists: Dict[str, List[str]] = {
+            name: list(dict.fromkeys(word for word in words if word))
+            for name, words in word_lists.items()
+        }
+        # Identifies the lists in the keys of results computed with them
+        self.digest = hashlib.sha1(json.dumps(self.word_lists, ensure_ascii=False,
+                                              sort_keys=True).encode("utf-8")).hexdigest()[:16]
+        all_words = {word for words in self.word_lists.values() for word in words}
+        # For each word, every listed word that is a prefix of it, itself included
+        self._prefix_closure: Dict[str, List[str]] = {
+            word: [word[:end] for end in range(1, len(word) + 1) if word[:end] in all_words]
+            for word in all_words
+        }
+        self._lists_of: Dict[str, List[str]] = {}
+        self._list_order: Dict[str, Dict[str, int]] = {}
+        for name, words in self.word_lists.items():
+            self._list_order[name] = {word: index for index, word in enumerate(words)}
+            for word in words:
+                self._lists_of.setdefault(word, []).append(name)
+        self._pattern: Optional["re.Pattern[str]"] = None
+        if all_words:
+            self._pattern = re.compile(trie_pattern(all_words))
+
+    def found_words(self, text: str) -> Set[str]:
+        """every listed word that occurs in the text"""
+        found: Set[str] = set()
+        if self._pattern is None:
+            return found
+        # search() instead of an overlapping lookahead finditer: without the
+        # lookahead the regex engine can skip ahead to the words' first characters
+        search = self._pattern.search
+        match = search(text)
+        while match is not None:
+            found.update(self._prefix_closure[match.group()])
+            match = search(text, match.start() + 1)
+        return found
+
+    def scan(self, text: str) -> Dict[str, List[str]]:
+        """words found per list, in list order; lists without a hit are left out"""
+        hits: Dict[str, List[str]] = {}
+        for word in self.found_words(text):
+            for name in self._lists_of[word]:
+                hits.setdefault(name, []).append(word)
+        for name, words in hits.items():
+            words.sort(key=self._list_order[name].__getitem__)
+        return hits
+
+    def contains_any(self, text: str, list_name: str) -> bool:
+        """whether the text contains any word of one list"""
+        return any(list_name in self._lists_of[word] for word in self.found_words(text))
+
+
+def load_word_lists(path: Optional[str] = None) -> Dict[str, List[str]]:
+    """default word lists, overridden per list by a JSON file (REWIND_WORD_LISTS)"""
+    word_lists = {name: list(words) for name, words in DEFAULT_WORD_LISTS.items()}
+    path = path or os.environ.get(WORD_LISTS_ENV, "").strip()
+    if path:
+        configured = json_backend.load_file(path)
+        if not isinstance(configured, dict):
+            raise ValueError(f"{path}: expected an object of word lists")
+        for name, words in configured.items():
+            if not isinstance(words, list) or not all(isinstance(word, str) for word in words):
+                raise ValueError(f"{path}: word list {name!r} must be a list of strings")
+            word_lists[name] = words
+    return word_lists
+
+
+_shared_scanner: Optional[KeywordScanner] = None  # pylint: disable=invalid-name
+_shared_lock = threading.Lock()
+
+
+def get_keyword_scanner() -> KeywordScanner:
+    """scanner of the configured word lists, compiled once per process"""
+    global _shared_scanner  # pylint: disable=global-statement
+    with _shared_lock:
+        if _shared_scanner is None:
+            _shared_scanner = KeywordScanner(load_word_lists())
+        return _shared_scanner
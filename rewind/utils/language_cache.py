@@ -0,0 +1,194 @@
+"""
+Memoized language detection results.
+The same fragments recur within and across exports (greetings, "continue",
+retried prompts, regenerated answers), so detected languages are kept in a
+bounded in-memory LRU keyed by the xxhash of the text, backed by an optional
+sqlite file that survives between runs. Only hashes are stored, never text.
+REWIND_LANGUAGE_CACHE sets the sqlite path; "off" keeps the cache in memory.
+"""
+import atexit
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import xxhash
+
+from rewind.utils.cache_utils import CACHE_DIR
+
+CACHE_ENV = "REWIND_LANGUAGE_CACHE"
+DEFAULT_DB_PATH = os.path.join(CACHE_DIR, "languages.sqlite3")
+
+# Entries kept in memory, most recently used last
+MAX_MEMORY_ENTRIES = 100_000
+
+# New results written to disk per transaction
+DISK_BATCH_SIZE = 1000
+
+
+def content_key(text: str) -> bytes:
+    """128-bit xxh3 digest of the text"""
+    return xxhash.xxh3_128_digest(text.encode("utf-8", "surrogatepass"))
+
+
+class CacheStats:
+    """lookup counters of a LanguageCache"""
+
+    def __init__(self):
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @property
+    def lookups(self) -> int:
+        """every get() call"""
+        return self.memory_hits + self.disk_hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        """share of lookups answered without running detection"""
+        return (self.memory_hits + self.disk_hits) / self.lookups if self.lookups else 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        """counters and hit rate, e.g. for logging"""
+        return {"lookups": self.lookups, "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits, "misses": self.misses,
+                "hit_rate": round(self.hit_rate, 4)}
+
+    def __str__(self) -> str:
+        return (f"{self.lookups} lookups, {self.hit_rate:.1%} hits "
+                f"({self.memory_hits} memory, {self.disk_hits} disk), {self.misses} detected")
+
+
+class LanguageCache:  # pylint: disable=too-many-instance-attributes
+    """
+    Bounded LRU of detected languages with an optional sqlite backing file.
+    The file is tagged with the detector settings and emptied when they
+    change, so stale languages are never served.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, detector_tag: str = "",
+                 max_entries: int = MAX_MEMORY_ENTRIES):
+        self.db_path = db_path
+        self.detector_tag = detector_tag
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+        self._memory: "OrderedDict[bytes, str]" = OrderedDict()
+        self._unsaved: Dict[bytes, str] = {}
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        """open the backing file on first use; None when there is none or it is unusable"""
+        if self._db is None and self.db_path:
+            try:
+                directory = os.path.dirname(self.db_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                db = sqlite3.connect(self.db_path, check_same_thread=False)
+                db.execute("CREATE TABLE IF NOT EXISTS languages "
+                           "(key BLOB PRIMARY KEY, language TEXT NOT NULL) WITHOUT ROWID")
+                db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+                row = db.execute("SELECT value FROM meta WHERE name = 'detector'").fetchone()
+                if row is None or row[0] != self.detector_tag:
+                    db.execute("DELETE FROM languages")
+                    db.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('detector', ?)",
+                               (self.detector_tag,))
+                db.commit()
+                self._db = db
+            except sqlite3.Error:
+                # A read-only or corrupt cache file only costs speed
+                self.db_path = None
+        return self._db
+
+    def _remember(self, key: bytes, language: str) -> None:
+        self._memory[key] = language
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, text: str) -> Optional[str]:
+        """cached language of a text, None when it still has to be detected"""
+        key = content_key(text)
+        with self._lock:
+            language = self._memory.get(key)
+            if language is not None:
+                self._memory.move_to_end(key)
+                self.stats.memory_hits += 1
+                return language
+
+            db = self._connection()
+            row = None
+            if db is not None:
+                try:
+                    row = db.execute("SELECT language FROM languages WHERE key = ?",
+                                     (key,)).fetchone()
+                except sqlite3.Error:
+                    row = None
+            if row is None:
+                self.stats.misses += 1
+                return None
+            self.stats.disk_hits += 1
+            self._remember(key, row[0])
+            return row[0]
+
+    def put(self, text: str, language: str) -> None:
+        """store a detected language"""
+        key = content_key(text)
+        with self._lock:
+            self._remember(key, language)
+            if self.db_path:
+                self._unsaved[key] = language
+                if len(self._unsaved) >= DISK_BATCH_SIZE:
+                    self._flush_locked()
+
+    def flush(self) -> None:
+        """write results not yet on disk"""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        db = self._connection()
+        if db is None or not self._unsaved:
+            self._unsaved.clear()
+            return
+        try:
+            with db:
+                db.executemany("INSERT OR REPLACE INTO languages (key, language) VALUES (?, ?)",
+                               self._unsaved.items())
+        except sqlite3.Error:
+            pass
+        self._unsaved.clear()
+
+    def clear(self) -> None:
+        """forget every entry, on disk too, and reset the statistics"""
+        with self._lock:
+            self._memory.clear()
+            self._unsaved.clear()
+            db = self._connection()
+            if db is not None:
+                with db:
+                    db.execute("DELETE FROM languages")
+            self.stats = CacheStats()
+
+
+def _configured_db_path() -> Optional[str]:
+    configured = os.environ.get(CACHE_ENV, "").strip()
+    if configured.lower() in ("off", "none", "0", "false"):
+        return None
+    return configured or DEFAULT_DB_PATH
+
+
+_shared_cache: Optional[LanguageCache] = None  # pylint: disable=invalid-name
+_shared_lock = threading.Lock()
+
+
+def get_language_cache(detector_tag: str = "") -> LanguageCache:
+    """process-wide cache, flushed to disk when the process exits"""
+    global _shared_cache  # pylint: disable=global-statement
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = LanguageCache(_configured_db_path(), detector_tag)
+            atexit.register(_shared_cache.flush)
+        return _shared_cache
@@ -0,0 +1,71 @@
+"""
+Parallel language detection.
+langdetect is pure Python and by far the slowest step of an analysis, so
+fragment texts are detected in chunks on a process pool. Workers seed
+langdetect like the parent process, so results equal serial detect_language.
+Set REWIND_DETECT_WORKERS to choose the worker count (1, the default,
+detects in-process). Spawned workers re-import the main module, so only
+entry points guarded by `if __name__ == "__main__":` -- the CLI and the
+Flask app -- raise it to one worker per CPU on their own.
+"""
+import threading
+from concurrent.futures import Future
+from typing import List, Optional
+
+from rewind.utils.env_utils import env_int
+from rewind.utils.language_utils import detect_language_uncached
+from rewind.utils.process_pool import LazyProcessPool, init_detection_worker
+
+WORKERS_ENV = "REWIND_DETECT_WORKERS"
+
+# Texts per task; large enough to amortize pickling, small enough to balance
+CHUNK_SIZE = 256
+
+# Chunks in flight per worker before the submitter waits for the oldest one
+PENDING_CHUNKS_PER_WORKER = 2
+
+
+def default_worker_count(fallback: int = 1) -> int:
+    """REWIND_DETECT_WORKERS, else fallback (in-process by default), also for a malformed value"""
+    return max(env_int(WORKERS_ENV, fallback), 1)
+
+
+def _detect_chunk(texts: List[str]) -> List[str]:
+    # The parent process already checked the language cache for these texts
+    return [detect_language_uncached(text) for text in texts]
+
+
+class LanguageDetectionPool(LazyProcessPool):
+    """
+    Lazily started process pool for detect_language.
+    Worker processes are spawned on the first submitted chunk, so exports
+    smaller than one chunk never pay the start-up cost.
+    """
+
+    def __init__(self, workers: Optional[int] = None, chunk_size: int = CHUNK_SIZE):
+        super().__init__(default_worker_count() if workers is None else workers,
+                         init_detection_worker)
+        self.chunk_size = chunk_size
+        self.max_pending = self.workers * PENDING_CHUNKS_PER_WORKER
+
+    def submit(self, texts: List[str]) -> Future:
+        """detect a chunk of texts on the pool, the future yields languages in order"""
+        return self._submit(_detect_chunk, texts)
+
+
+_shared_pool: Optional[LanguageDetectionPool] = None  # pylint: disable=invalid-name
+_shared_lock = threading.Lock()
+
+
+def get_shared_pool(workers: Optional[int] = None) -> LanguageDetectionPool:
+    """
+    Process-wide pool reused across analyses, e.g. by every Flask request.
+    Passing a different worker count replaces the pool.
+    """
+    global _shared_pool  # pylint: disable=global-statement
+    with _shared_lock:
+        if _shared_pool is None or (workers is not None and workers != _shared_pool.workers):
+            if _shared_pool is not None:
+                _shared_pool.shutdown()
+            _shared_pool = LanguageDetectionPool(workers)
+        return _shared_pool
@@ -1,52 +1,98 @@
 """Utility functions for language processing."""
-import re
 from collections import defaultdict
-from langdetect import detect, LangDetectException
+from langdetect import detect, DetectorFactory, LangDetectException
+from rewind.utils.env_utils import env_int
+from rewind.utils.language_cache import get_language_cache
+from rewind.utils.script_utils import ASCII_LATIN, HAN, classify_by_script, script_counts
+from rewind.utils.code_blocks import iter_code_blocks, strip_code_blocks
+
+# langdetect samples n-grams at random; a fixed seed makes every process,
+# including the detection pool workers, return the same language for a text
+DETECT_SEED = 0
+DetectorFactory.seed = DETECT_SEED
+
+# Bump whenever detection results change, persistent caches are then dropped
+DETECTOR_VERSION = 4
+
+# Sampling mode: with REWIND_DETECT_SAMPLE_CHARS set, detection reads code-stripped
+# prose cut to that many characters from the start and from the middle of a long
+# text; unset (the default), it reads the whole text as before
+SAMPLE_ENV = "REWIND_DETECT_SAMPLE_CHARS"
+
+
+def _configured_sample_chars() -> int:
+    """REWIND_DETECT_SAMPLE_CHARS; 0 (whole texts) when unset, below 1 or malformed"""
+    return max(env_int(SAMPLE_ENV, 0), 0)
+
+
+DETECT_SAMPLE_CHARS = _configured_sample_chars()
+
+# Identifies detection results in the language cache
+DETECTOR_TAG = f"{DETECTOR_VERSION}:sample={DETECT_SAMPLE_CHARS}"
 
 
 def detect_language(sentence: str) -> str:
-    """Detect language of the sentence."""
+    """Detect language of the sentence, memoized by content hash."""
     if not sentence.strip():
         return "unknown"
 
-    try:
-        # Check for Chinese characters dominance first as \
-            # langdetect can be tricky with short mixed texts
-        if chinese_dominant(sentence):
-            return "zh-cn"
+    cache = get_language_cache(DETECTOR_TAG)
+    language = cache.get(sentence)
+    if language is None:
+        language = detect_language_uncached(sentence)
+        cache.put(sentence, language)
+    return language
 
-        return detect(sentence)
-    except LangDetectException:
+
+def detect_language_uncached(sentence: str, sample_chars: int = DETECT_SAMPLE_CHARS) -> str:
+    """Detect language of the sentence, or of its detection sample in sampling mode."""
+    if not sentence.strip():
         return "unknown"
+    sample = detection_sample(sentence, sample_chars)
 
+    # The script histogram settles Chinese dominance (langdetect can be tricky
+    # with short mixed texts) and other unambiguous scripts without n-grams
+    language = classify_by_script(sample)
+    if language is not None:
+        return language
 
-def chinese_dominant(sentence: str) -> bool:
-    """Check if Chinese characters dominate in the string."""
-    chinese_count = 0
-    english_count = 0
+    try:
+        return detect(sample)
+    except LangDetectException:
+        return "unknown"
 
-    for char in sentence:
-        # 判断是否为中文字符（常用汉字 Unicode 范围）
-        if '\u4e00' <= char <= '\u9fff':
-            chinese_count += 1
-        # 判断是否为英文字母（大小写）
-        elif char.isalpha() and ord(char) < 128:
-            english_count += 1
 
-    return chinese_count > english_count
+def detection_sample(text: str, sample_chars: int = DETECT_SAMPLE_CHARS) -> str:
+    """
+    The part of a text language detection looks at: the fenced code blocks
+    iter_code_blocks() finds are dropped, and prose longer than two windows
+    is cut to its first sample_chars characters plus sample_chars from the middle.
+    A text that is only code is sampled as it is. 0 keeps the whole text.
+    """
+    if sample_chars <= 0:
+        return text
+    prose = strip_code_blocks(text)
+    if not prose.strip():
+        prose = text
+    if len(prose) <= 2 * sample_chars:
+        return prose
+    middle = max(sample_chars, (len(prose) - sample_chars) // 2)
+    return prose[:sample_chars] + "\n" + prose[middle:middle + sample_chars]
 
 
+def chinese_dominant(sentence: str) -> bool:
+    """Check if Chinese characters dominate in the string."""
+    # 常用汉字 (U+4E00-U+9FFF) 多于英文字母 (A-Z, a-z)
+    counts = script_counts(sentence)
+    return counts.get(HAN, 0) > counts.get(ASCII_LATIN, 0)
+
 
 def count_code_block_languages(text: str) -> dict:
     """Count occurrences of different programming languages in code blocks."""
-    # 匹配 ```language ... ``` 的模式，非贪婪匹配
-    pattern = r'```(\w+)\s*[\s\S]*?```'
-    matches = re.findall(pattern, text)
-
-    # 转为小写并统计
+    # ``` 与 ~~~ 围栏逐行识别，线性时间；无标注的代码块记为 "text"
     counts = defaultdict(int)
-    for lang in matches:
-        counts[lang.lower()] += 1
+    for block in iter_code_blocks(text):
+        counts[block.language] += 1
 
     return dict(counts)
 
@@ -0,0 +1,56 @@
+"""
+Lazily started process pools.
+Worker processes are spawned on the first submitted task, so work too small
+to be split never pays the start-up cost.
+"""
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Optional
+
+from langdetect import DetectorFactory
+from langdetect.detector_factory import init_factory
+
+from rewind.utils.language_utils import DETECT_SEED
+
+
+def init_detection_worker() -> None:
+    """
+    Initializer of workers that detect languages: seed langdetect like the
+    parent process and load its profiles once per worker process
+    """
+    DetectorFactory.seed = DETECT_SEED
+    init_factory()
+
+
+class LazyProcessPool:
+    """A ProcessPoolExecutor of a fixed worker count, started on first use"""
+
+    def __init__(self, workers: int, initializer: Optional[Callable[[], None]] = None):
+        self.workers = max(workers, 1)
+        self._initializer = initializer
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def parallel(self) -> bool:
+        """whether work is worth sending to worker processes"""
+        return self.workers > 1
+
+    def _submit(self, func: Callable[..., Any], *args: Any) -> Future:
+        with self._lock:
+            if self._executor is None:
+                # spawn, not fork: the Flask server forks from a threaded process
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=self._initializer,
+                )
+            return self._executor.submit(func, *args)
+
+    def shutdown(self) -> None:
+        """stop the workers; tasks already submitted still finish"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
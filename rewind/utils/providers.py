@@ -7,3 +7,6 @@ class ProviderType(enum.Enum):
     DEEPSEEK = "deepseek"
     CLAUDE = "claude"
     QWEN = "qwen"
+
+# Provider choice resolved by sniffing the export (loading_data.detect_provider)
+AUTO_PROVIDER = "auto"
@@ -0,0 +1,155 @@
+"""
+Unicode script histogram of a text and the languages it settles on its own.
+Text written in a script that only one language uses (Hangul, kana, Thai,
+Greek, Hebrew), Han-dominant text, ASCII English prose and text without any
+letters are classified from code point ranges alone; everything else goes on
+to langdetect. Uses NumPy when installed and regular expressions otherwise.
+"""
+import re
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # regex fallback below
+    np = None
+
+NEUTRAL = "neutral"          # ASCII digits, punctuation, whitespace, emoji: no language
+SYMBOL = "symbol"            # other punctuation and symbols; langdetect may still use them
+OTHER = "other"              # letters of any script not listed here
+ASCII_LATIN = "ascii_latin"  # A-Z and a-z, what chinese_dominant counts as English
+LATIN = "latin"              # accented and extended Latin letters
+HAN = "han"                  # CJK unified ideographs U+4E00-U+9FFF, as chinese_dominant counts
+KANA = "kana"
+HANGUL = "hangul"
+CYRILLIC = "cyrillic"
+GREEK = "greek"
+ARABIC = "arabic"
+HEBREW = "hebrew"
+DEVANAGARI = "devanagari"
+THAI = "thai"
+
+# (first code point, script) for half-open ranges up to the next entry, sorted
+_RANGES: List[Tuple[int, str]] = [
+    (0x0000, NEUTRAL), (0x0041, ASCII_LATIN), (0x005B, NEUTRAL), (0x0061, ASCII_LATIN),
+    (0x007B, NEUTRAL), (0x0080, SYMBOL), (0x00C0, LATIN), (0x0250, OTHER),
+    (0x0370, GREEK), (0x0400, CYRILLIC), (0x0530, OTHER), (0x0590, HEBREW),
+    (0x0600, ARABIC), (0x0700, OTHER), (0x0750, ARABIC), (0x0780, OTHER),
+    (0x0900, DEVANAGARI), (0x0980, OTHER), (0x0E00, THAI), (0x0E80, OTHER),
+    (0x1100, HANGUL), (0x1200, OTHER), (0x1E00, LATIN), (0x1F00, GREEK),
+    (0x2000, SYMBOL), (0x2C00, OTHER), (0x3000, SYMBOL), (0x3040, KANA),
+    (0x3100, OTHER), (0x3130, HANGUL), (0x3190, OTHER), (0x31F0, KANA),
+    (0x3200, OTHER), (0x4E00, HAN), (0xA000, OTHER), (0xAC00, HANGUL),
+    (0xD7B0, OTHER), (0xFB50, ARABIC), (0xFE00, NEUTRAL), (0xFE10, OTHER),
+    (0xFE70, ARABIC), (0xFF00, SYMBOL), (0xFF66, KANA), (0xFFA0, OTHER),
+    (0x1F000, NEUTRAL), (0x1FB00, OTHER),
+]
+SCRIPTS = sorted({script for _, script in _RANGES})
+
+# Scripts written by exactly one language among langdetect's profiles
+SINGLE_LANGUAGE_SCRIPTS = {
+    HANGUL: "ko",
+    KANA: "ja",
+    THAI: "th",
+    GREEK: "el",
+    HEBREW: "he",
+}
+
+# Share of a text's letters that must be in one script to decide on it
+SCRIPT_DOMINANCE = 0.9
+
+# Frequent English words that are not words in other Latin-script languages
+ENGLISH_MARKERS = frozenset("""
+the and that this with you your are was were have has what which would should could
+there their they them from will about been does don't it's i'm can't please thanks
+thank how why when where who just not but into than then these those only also
+""".split())
+MIN_ENGLISH_WORDS = 4
+ENGLISH_MARKER_SHARE = 0.1
+
+_WORD = re.compile(r"[a-z]+(?:'[a-z]+)?")
+
+if np is not None:
+    _BOUNDARIES = np.array([start for start, _ in _RANGES], dtype=np.uint32)
+    _RANGE_SCRIPT = np.array([SCRIPTS.index(script) for _, script in _RANGES], dtype=np.intp)
+else:
+    _BOUNDARIES = _RANGE_SCRIPT = None
+
+
+def _script_counts_numpy(text: str) -> Dict[str, int]:
+    code_points = np.frombuffer(text.encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+    range_index = np.searchsorted(_BOUNDARIES, code_points, side="right") - 1
+    counts = np.bincount(_RANGE_SCRIPT[range_index], minlength=len(SCRIPTS))
+    return {script: int(count) for script, count in zip(SCRIPTS, counts) if count}
+
+
+def _character_class(script: str) -> str:
+    """regex character class of every range belonging to a script"""
+    parts = []
+    bounds = [start for start, _ in _RANGES] + [0x110000]
+    for (start, range_script), end in zip(_RANGES, bounds[1:]):
+        if range_script == script:
+            parts.append(f"\\U{start:08x}-\\U{end - 1:08x}")
+    return "[" + "".join(parts) + "]"
+
+
+_SCRIPT_PATTERNS = {script: re.compile(_character_class(script)) for script in SCRIPTS}
+
+
+def _script_counts_regex(text: str) -> Dict[str, int]:
+    counts = {}
+    for script, pattern in _SCRIPT_PATTERNS.items():
+        if script == OTHER:
+            continue
+        count = len(pattern.findall(text))
+        if count:
+            counts[script] = count
+    other = len(text) - sum(counts.values())
+    if other:
+        counts[OTHER] = other
+    return counts
+
+
+def script_counts(text: str) -> Dict[str, int]:
+    """number of characters of each script in the text, scripts without any left out"""
+    if np is not None:
+        return _script_counts_numpy(text)
+    return _script_counts_regex(text)
+
+
+def _looks_english(text: str) -> bool:
+    words = _WORD.findall(text.lower())
+    if len(words) < MIN_ENGLISH_WORDS:
+        return False
+    markers = sum(1 for word in words if word in ENGLISH_MARKERS)
+    return markers >= 2 and markers >= ENGLISH_MARKER_SHARE * len(words)
+
+
+def classify_by_script(text: str, counts: Optional[Dict[str, int]] = None) -> Optional[str]:
+    """
+    Language settled by the script histogram alone, None when the text is
+    ambiguous and needs n-gram detection. Cyrillic, Arabic, Devanagari and
+    accented Latin are shared by several languages and always return None.
+    """
+    if counts is None:
+        counts = script_counts(text)
+
+    # Same rule and order as chinese_dominant in detect_language
+    if counts.get(HAN, 0) > counts.get(ASCII_LATIN, 0):
+        return "zh-cn"
+
+    letters = sum(count for script, count in counts.items() if script not in (NEUTRAL, SYMBOL))
+    if letters == 0:
+        # Nothing langdetect could take features from
+        return "unknown" if set(counts) <= {NEUTRAL} else None
+
+    for script, language in SINGLE_LANGUAGE_SCRIPTS.items():
+        script_letters = counts.get(script, 0)
+        if script == KANA and script_letters:
+            # Japanese mixes kana with kanji
+            script_letters += counts.get(HAN, 0)
+        if script_letters and script_letters >= SCRIPT_DOMINANCE * letters:
+            return language
+
+    if counts.get(ASCII_LATIN, 0) == letters and _looks_english(text):
+        return "en"
+    return None
@@ -1,6 +1,48 @@
 """iso time utils"""
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Optional, Tuple
 from dateutil import parser
 
+MICROSECONDS = 1_000_000
+DAY_SECONDS = 24 * 3600
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def parse_timestamp(iso_str: str) -> Tuple[Optional[int], int]:
+    """
+    (UTC epoch microseconds, UTC offset seconds) of an ISO-8601 string.
+    A string without an offset is taken as UTC; (None, 0) when it does not parse.
+    """
+    try:
+        moment = datetime.fromisoformat(iso_str)
+    except ValueError:
+        # Forms fromisoformat rejects on older Pythons, e.g. a trailing "Z"
+        try:
+            moment = parser.isoparse(iso_str)
+        except (ValueError, OverflowError):
+            return None, 0
+    except TypeError:
+        return None, 0
+    utc_offset = moment.utcoffset()
+    offset = int(utc_offset.total_seconds()) if utc_offset is not None else 0
+    wall_clock_us = (moment.replace(tzinfo=None) - _EPOCH) // _MICROSECOND
+    return wall_clock_us - offset * MICROSECONDS, offset
+
+
+def local_seconds(epoch_us: int, offset: int) -> int:
+    """whole wall-clock seconds since 1970-01-01 at a UTC offset"""
+    return epoch_us // MICROSECONDS + offset
+
+
+@lru_cache(maxsize=None)
+def day_label(day: int) -> str:
+    """YYYY-MM-DD of a day number counted from 1970-01-01"""
+    return (date(1970, 1, 1) + timedelta(days=day)).isoformat()
+
+
 def delta_to_dhms(iso_str1, iso_str2):
     """extract days, hours, minutes, seconds from two iso time strings"""
     dt1 = parser.isoparse(iso_str1)
@@ -11,8 +53,13 @@ def delta_to_dhms(iso_str1, iso_str2):
 
     total_seconds = int(delta.total_seconds())
 
-    days = total_seconds // (24 * 3600)
-    remainder = total_seconds % (24 * 3600)
+    return seconds_to_dhms(total_seconds) + (total_seconds,)
+
+
+def seconds_to_dhms(total_seconds: int) -> Tuple[int, int, int, int]:
+    """split a non-negative number of seconds into days, hours, minutes, seconds"""
+    days = total_seconds // DAY_SECONDS
+    remainder = total_seconds % DAY_SECONDS
 
     hours = remainder // 3600
     remainder %= 3600
@@ -20,7 +67,7 @@ def delta_to_dhms(iso_str1, iso_str2):
     minutes = remainder // 60
     seconds = remainder % 60
 
-    return days, hours, minutes, seconds, total_seconds
+    return days, hours, minutes, seconds
 
 def extract_time(iso_str):
     """extract HH:MM:SS from iso time string"""
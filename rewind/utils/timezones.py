@@ -0,0 +1,79 @@
+"""
+UTC offsets of IANA time zones as transition tables.
+zoneinfo answers one datetime at a time; ZoneOffsets holds a zone's offset
+changes as sorted UTC epoch seconds instead, so a local time is one bisect
+per timestamp, or one NumPy searchsorted for a whole array of them.
+Transitions are found by sampling the zone weekly between 1900 and 2100 and
+bisecting every change to the second. An offset change undone within a week
+would be missed; for every zone of the bundled tz database this finds the
+same transitions as daily sampling.
+"""
+import threading
+from bisect import bisect_right
+from datetime import datetime, timezone as dt_timezone
+from typing import Dict, List
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional for the rest of rewind
+    np = None
+
+SCAN_START = int(datetime(1900, 1, 1, tzinfo=dt_timezone.utc).timestamp())
+SCAN_END = int(datetime(2100, 1, 1, tzinfo=dt_timezone.utc).timestamp())
+SCAN_STEP = 7 * 24 * 3600
+
+
+class ZoneOffsets:
+    """UTC offset of one zone at any epoch second"""
+
+    def __init__(self, name: str):
+        try:
+            zone = ZoneInfo(name)
+        except (ZoneInfoNotFoundError, ValueError) as error:
+            raise ValueError(f"unknown timezone {name!r}") from error
+        self.name = name
+
+        def offset(epoch: int) -> int:
+            return int(datetime.fromtimestamp(epoch, zone).utcoffset().total_seconds())
+
+        # transitions[i] is the first second offsets[i + 1] applies
+        self.transitions: List[int] = []
+        self.offsets: List[int] = [offset(SCAN_START)]
+        previous = SCAN_START
+        for epoch in range(SCAN_START + SCAN_STEP, SCAN_END, SCAN_STEP):
+            current = offset(epoch)
+            if current != self.offsets[-1]:
+                low, high = previous, epoch
+                while high - low > 1:
+                    middle = (low + high) // 2
+                    if offset(middle) == current:
+                        high = middle
+                    else:
+                        low = middle
+                self.transitions.append(high)
+                self.offsets.append(current)
+            previous = epoch
+
+    def offset_at(self, epoch: int) -> int:
+        """offset in seconds at one UTC epoch second"""
+        return self.offsets[bisect_right(self.transitions, epoch)]
+
+    def local_seconds(self, epochs: "np.ndarray") -> "np.ndarray":
+        """wall-clock seconds since 1970-01-01 of an int64 array of UTC epoch seconds"""
+        index = np.searchsorted(np.asarray(self.transitions, dtype=np.int64), epochs,
+                                side="right")
+        return epochs + np.asarray(self.offsets, dtype=np.int64)[index]
+
+
+_zones: Dict[str, ZoneOffsets] = {}
+_zones_lock = threading.Lock()
+
+
+def zone_offsets(name: str) -> ZoneOffsets:
+    """transition table of an IANA zone, built once per process; ValueError if unknown"""
+    with _zones_lock:
+        zone = _zones.get(name)
+        if zone is None:
+            zone = _zones[name] = ZoneOffsets(name)
+        return zone
@@ -3,8 +3,10 @@
 import sys
 import os
 import click
-from rewind.cli.handlers import handle_overview, handle_style, handle_time
+from rewind.cli.handlers import handle_overview, handle_report, handle_style, handle_time
 from rewind.cli.interactive import interactive_mode
+from rewind.utils.language_pool import default_worker_count, get_shared_pool
+from rewind.data_process.sharded import get_shard_pool
 # Ensure the current directory is in the python path to import rewind modules
 sys.path.append(os.getcwd())
 
@@ -14,6 +16,8 @@ sys.path.append(os.getcwd())
 @click.pass_context
 def cli(ctx):
     """GPT Rewind CLI Tool to inspect API data"""
+    # Detect languages on one process per CPU unless REWIND_DETECT_WORKERS says otherwise
+    get_shared_pool(default_worker_count(os.cpu_count() or 1))
     if ctx.invoked_subcommand is None:
         interactive_mode()
 
@@ -23,12 +27,21 @@ def cli(ctx):
 @click.option(
     "--provider",
     "-p",
-    type=click.Choice(["openai", "deepseek", "claude", "qwen"], case_sensitive=False),
-    default="deepseek",
-    help="Provider type",
+    type=click.Choice(["auto", "openai", "deepseek", "claude", "qwen"], case_sensitive=False),
+    default="auto",
+    help="Provider type (default: detected from the first bytes of the file)",
 )
-def overview(file, provider):
+@click.option(
+    "--workers",
+    "-w",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Processes scanning shards of the sessions of large exports "
+         "(default: REWIND_SHARD_WORKERS or 1)",
+)
+def overview(file, provider, workers):
     """Show basic data overview"""
+    get_shard_pool(workers)
     handle_overview(file, provider)
 
 
@@ -37,12 +50,21 @@ def overview(file, provider):
 @click.option(
     "--provider",
     "-p",
-    type=click.Choice(["openai", "deepseek", "claude", "qwen"], case_sensitive=False),
-    default="deepseek",
-    help="Provider type",
+    type=click.Choice(["auto", "openai", "deepseek", "claude", "qwen"], case_sensitive=False),
+    default="auto",
+    help="Provider type (default: detected from the first bytes of the file)",
 )
-def style(file, provider):
+@click.option(
+    "--workers",
+    "-w",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Processes scanning shards of the sessions of large exports "
+         "(default: REWIND_SHARD_WORKERS or 1)",
+)
+def style(file, provider, workers):
     """Show style analysis"""
+    get_shard_pool(workers)
     handle_style(file, provider)
 
 
@@ -51,14 +73,63 @@ def style(file, provider):
 @click.option(
     "--provider",
     "-p",
-    type=click.Choice(["openai", "deepseek", "claude", "qwen"], case_sensitive=False),
-    default="deepseek",
-    help="Provider type",
+    type=click.Choice(["auto", "openai", "deepseek", "claude", "qwen"], case_sensitive=False),
+    default="auto",
+    help="Provider type (default: detected from the first bytes of the file)",
 )
-def time(file, provider):
+@click.option(
+    "--timezone",
+    "-t",
+    default=None,
+    help="IANA timezone of the day and hour distributions, e.g. Europe/Berlin "
+         "(default: as the export wrote them)",
+)
+@click.option(
+    "--workers",
+    "-w",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Processes scanning shards of the sessions of large exports "
+         "(default: REWIND_SHARD_WORKERS or 1)",
+)
+def time(file, provider, timezone, workers):
     """Show time analysis"""
-    handle_time(file, provider)
+    get_shard_pool(workers)
+    handle_time(file, provider, timezone)
+
 
 
+@cli.command()
+@click.option(
+    "--input",
+    "-i",
+    "inputs",
+    required=True,
+    multiple=True,
+    type=(str, click.Choice(["auto", "openai", "deepseek", "claude", "qwen"],
+                            case_sensitive=False)),
+    help="A JSON data file and its provider (or auto), repeated per export, "
+         "e.g. -i deepseek.json deepseek -i qwen.json auto",
+)
+@click.option(
+    "--timezone",
+    "-t",
+    default=None,
+    help="IANA timezone of the day and hour distributions, e.g. Europe/Berlin "
+         "(default: as the exports wrote them)",
+)
+@click.option(
+    "--workers",
+    "-w",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Processes scanning shards of the sessions of large exports "
+         "(default: REWIND_SHARD_WORKERS or 1)",
+)
+def report(inputs, timezone, workers):
+    """Show one report over several exports, per provider and per file"""
+    get_shard_pool(workers)
+    handle_report(inputs, timezone)
+
 if __name__ == "__main__":
     cli()  # pylint: disable=no-value-for-parameter
@@ -0,0 +1,15 @@
+"""Keep test runs out of the working tree's .rewind_cache"""
+import pytest
+
+# Persistent caches the analysis code opens on its own; tests of a cache build theirs in a
+# temporary directory
+CACHE_SWITCHES = ("REWIND_LANGUAGE_CACHE", "REWIND_SESSION_CACHE", "REWIND_INCREMENTAL")
+
+
+@pytest.fixture(autouse=True, scope="session")
+def no_persistent_caches():
+    """turn the language, session and incremental caches off for the whole run"""
+    with pytest.MonkeyPatch.context() as patch:
+        for name in CACHE_SWITCHES:
+            patch.setenv(name, "off")
+        yield
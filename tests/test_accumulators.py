@@ -0,0 +1,172 @@
+"""Tests for merging the partial aggregates of consecutive session shards"""
+import random
+import unittest
+
+from rewind.utils.conversation_model import Fragment, Message, Session
+from rewind.utils.language_pool import LanguageDetectionPool
+from rewind.data_process.accumulators import (TopK, feed_sessions, finalize_all, merge_shards,
+                                              scan_sessions)
+from rewind.data_process.analysis_session import default_accumulators
+from rewind.data_process.session_timeline import SessionTimeline
+from rewind.data_process.sharded import ShardPool, feed_sharded
+from rewind.data_process.time_data import DateAccumulator, HourAccumulator
+
+SESSION_COUNT = 300
+
+TEXTS = [
+    "请帮我写一个排序函数",
+    "麻烦解释一下这段代码",
+    "你这个回答不对",
+    "Could you explain how the garbage collector works?",
+    "对不起，我无法回答",
+    "Sure 😀 here it is:\n```python\nprint('hi')\n```\n",
+    "```js\nconsole.log(1)\n```\n👍🏽 done",
+    "",
+]
+
+
+def make_session(index, rng):
+    """a session with random models, fragments and timestamps, often tying another"""
+    messages = []
+    for message_index in range(rng.randrange(0, 6)):
+        model = rng.choice(["deepseek-chat", "deepseek-reasoner", "qwen3-max"])
+        fragments = []
+        if message_index % 2 == 0:
+            fragments.append(Fragment("REQUEST", rng.choice(TEXTS)))
+        else:
+            if rng.random() < 0.4:
+                fragments.append(Fragment("THINK", rng.choice(TEXTS)))
+            if rng.random() < 0.9:
+                fragments.append(Fragment("RESPONSE", rng.choice(TEXTS)))
+        messages.append(Message(f"{index}-{message_index}", model, fragments))
+
+    day = rng.randrange(1, 28)
+    hour, minute = rng.randrange(24), rng.choice([0, 30])
+    inserted_at = f"2024-{rng.randrange(1, 13):02}-{day:02}T{hour:02}:{minute:02}:00+08:00"
+    updated_at = f"2024-12-{day:02}T{hour:02}:{minute:02}:00+08:00"
+    if rng.random() < 0.05:
+        inserted_at = "unknown"
+    return Session(f"session {index}", inserted_at, updated_at, messages, str(index))
+
+
+def comparable(value, by_content=False):
+    """metrics with key order kept, sessions by identity and timelines by content"""
+    if isinstance(value, SessionTimeline):
+        return ("timeline", list(value.epochs), list(value.offsets))
+    if isinstance(value, dict):
+        return [(key, comparable(item, by_content)) for key, item in value.items()]
+    if isinstance(value, (list, tuple)):
+        return [comparable(item, by_content) for item in value]
+    if isinstance(value, Session):
+        return ("session", value.to_record() if by_content else id(value))
+    return value
+
+
+def split(sessions, shard_count):
+    """consecutive shards of nearly equal size, some possibly empty"""
+    size = -(-len(sessions) // shard_count)
+    return [sessions[start:start + size] for start in range(0, size * shard_count, size)]
+
+
+class MergeShardsTest(unittest.TestCase):
+    """merge_shards of the shards of an export must equal one pass over it"""
+
+    def setUp(self):
+        rng = random.Random(20240101)
+        self.sessions = [make_session(index, rng) for index in range(SESSION_COUNT)]
+        self.pool = LanguageDetectionPool(workers=1)
+
+    def single_pass(self, sessions):
+        """every metric of one scan"""
+        return scan_sessions(sessions, default_accumulators(self.pool))
+
+    def merged(self, shards):
+        """every metric of the shards scanned apart and merged"""
+        return finalize_all(merge_shards(
+            feed_sessions(shard, default_accumulators(self.pool)) for shard in shards))
+
+    def test_merge_equals_single_pass(self):
+        """counts, key order, record holders and rankings all match"""
+        expected = comparable(self.single_pass(self.sessions))
+        for shard_count in (1, 2, 3, 7, SESSION_COUNT):
+            with self.subTest(shard_count=shard_count):
+                merged = self.merged(split(self.sessions, shard_count))
+                self.assertEqual(comparable(merged), expected)
+
+    def test_merge_with_empty_shards(self):
+        """shards without sessions change nothing"""
+        expected = comparable(self.single_pass(self.sessions))
+        shards = [[], self.sessions[:100], [], self.sessions[100:], []]
+        self.assertEqual(comparable(self.merged(shards)), expected)
+
+    def test_ties_go_to_the_first_session(self):
+        """equal records are held by the earliest session across shards"""
+        sessions = [make_session(index, random.Random(7)) for index in range(6)]
+        merged = self.merged([sessions[:2], sessions[2:4], sessions[4:]])
+        chat_themost = merged["chat_themost"]
+        self.assertIs(chat_themost["most_active_session"], sessions[0])
+        self.assertIs(chat_themost["earliest_session"] or chat_themost["latest_session"],
+                      sessions[0])
+        self.assertEqual([session for session, _ in chat_themost["top_active_sessions"]],
+                         sessions[:5])
+
+    def test_mismatched_timezones(self):
+        """distributions bucketed in different zones do not merge"""
+        for accumulator_type in (DateAccumulator, HourAccumulator):
+            with self.subTest(accumulator=accumulator_type.name):
+                with self.assertRaises(ValueError):
+                    accumulator_type("UTC").merge(accumulator_type("Asia/Shanghai"))
+
+    def test_mismatched_metrics(self):
+        """shards must carry the same metrics in the same order"""
+        shards = [default_accumulators(self.pool), default_accumulators(self.pool)[::-1]]
+        with self.assertRaises(ValueError):
+            merge_shards(shards)
+
+
+class FeedShardedTest(unittest.TestCase):
+    """shards scanned by worker processes must merge into the single-pass metrics"""
+
+    def test_sharded_equals_single_pass(self):
+        """uneven shards on two workers, languages detected in the workers"""
+        rng = random.Random(20240102)
+        sessions = [make_session(index, rng) for index in range(SESSION_COUNT)]
+        expected = scan_sessions(sessions, default_accumulators(LanguageDetectionPool(workers=1)))
+        shard_pool = ShardPool(2, shard_sessions=70)
+        try:
+            sharded = finalize_all(feed_sharded(sessions, default_accumulators, shard_pool))
+        finally:
+            shard_pool.shutdown()
+        # Sessions come back from the workers as copies
+        self.assertEqual(comparable(sharded, by_content=True),
+                         comparable(expected, by_content=True))
+
+
+class TopKTest(unittest.TestCase):
+    """TopK must keep what sorting every value would"""
+
+    def test_matches_sort(self):
+        """largest first, equal values in the order they were added"""
+        rng = random.Random(3)
+        values = [(rng.randrange(20), index) for index in range(500)]
+        for k in (1, 3, 10):
+            top = TopK(k)
+            for value, holder in values:
+                top.add(value, holder)
+            expected = sorted(values, key=lambda item: (-item[0], item[1]))[:k]
+            self.assertEqual(top.items, expected)
+
+    def test_merge_matches_single_tracker(self):
+        """trackers of consecutive values merge into the tracker of them all"""
+        rng = random.Random(5)
+        values = [(rng.randrange(10), index) for index in range(200)]
+        whole, first, second = TopK(4), TopK(4), TopK(4)
+        for position, (value, holder) in enumerate(values):
+            whole.add(value, holder)
+            (first if position < 120 else second).add(value, holder)
+        first.merge(second)
+        self.assertEqual(first.items, whole.items)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+"""Tests for the result cache of the API functions"""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from rewind.apis import api_cache
+from rewind.apis.api_cache import cached_api
+from rewind.utils.cache_utils import CacheManager
+from rewind.utils.providers import ProviderType
+
+
+class CachedApiTest(unittest.TestCase):
+    """results are reused until the export, an argument or the configuration changes"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.export = os.path.join(self.directory.name, "export.json")
+        with open(self.export, "w", encoding="utf-8") as file:
+            file.write("[]")
+        cache = CacheManager(os.path.join(self.directory.name, "cache"))
+        patcher = mock.patch.object(api_cache, "get_cache_manager", return_value=cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.calls = []
+
+        @cached_api
+        def metric(json_path, provider_type=ProviderType.DEEPSEEK):
+            self.calls.append((json_path, provider_type))
+            return {"calls": len(self.calls)}
+
+        self.metric = metric
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_hit_and_argument_miss(self):
+        """the same call is answered from the cache, another provider is computed"""
+        self.assertEqual(self.metric(self.export), {"calls": 1})
+        self.assertEqual(self.metric(self.export, ProviderType.DEEPSEEK), {"calls": 1})
+        self.assertEqual(self.metric(self.export, ProviderType.QWEN), {"calls": 2})
+
+    def test_config_tag_change(self):
+        """another detector, word list or source timezone setting misses"""
+        self.metric(self.export)
+        with mock.patch.object(api_cache, "config_tag", return_value="detector=other"):
+            self.assertEqual(self.metric(self.export), {"calls": 2})
+            self.assertEqual(self.metric(self.export), {"calls": 2})
+        self.assertEqual(self.metric(self.export), {"calls": 1})
+
+    def test_analysis_version_change(self):
+        """a new ANALYSIS_VERSION misses results of the previous one"""
+        self.metric(self.export)
+        with mock.patch.object(api_cache, "ANALYSIS_VERSION", api_cache.ANALYSIS_VERSION + 1):
+            self.assertEqual(self.metric(self.export), {"calls": 2})
+        self.assertEqual(len(self.calls), 2)
+
+    def test_edited_export(self):
+        """the key follows the file's content, not its path"""
+        self.metric(self.export)
+        with open(self.export, "w", encoding="utf-8") as file:
+            file.write("[ ]")
+        self.assertEqual(self.metric(self.export), {"calls": 2})
+
+
+if __name__ == "__main__":
+    unittest.main()
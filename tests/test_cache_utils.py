@@ -0,0 +1,59 @@
+"""Tests for the result cache's memory tier"""
+import os
+import tempfile
+import unittest
+
+from rewind.utils.cache_utils import CacheManager
+
+
+class MemoryTierTest(unittest.TestCase):
+    """a memory hit is only served while its entry file is the one it was read from"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.export = os.path.join(self.directory.name, "export.json")
+        with open(self.export, "w", encoding="utf-8") as file:
+            file.write("[]")
+        self.cache_dir = os.path.join(self.directory.name, "cache")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_memory_hit(self):
+        """a second get is answered from memory, as a fresh copy"""
+        cache = CacheManager(self.cache_dir)
+        cache.set(self.export, "metric", {"value": [1]})
+        first = cache.get(self.export, "metric")
+        first["value"].append(2)
+        self.assertEqual(cache.get(self.export, "metric"), {"value": [1]})
+        self.assertEqual(cache.stats.memory_hits, 2)
+
+    def test_replaced_by_another_process(self):
+        """an entry rewritten by another manager is read from the new file"""
+        cache = CacheManager(self.cache_dir)
+        other = CacheManager(self.cache_dir)
+        cache.set(self.export, "metric", "old")
+        self.assertEqual(cache.get(self.export, "metric"), "old")
+        other.set(self.export, "metric", "new")
+        self.assertEqual(cache.get(self.export, "metric"), "new")
+        self.assertEqual(cache.stats.memory_hits, 1)
+
+    def test_discarded_or_deleted(self):
+        """a discarded entry or a deleted cache directory is a miss"""
+        cache = CacheManager(self.cache_dir)
+        other = CacheManager(self.cache_dir)
+        cache.set(self.export, "metric", "value")
+        other.discard(self.export, "metric")
+        self.assertIsNone(cache.get(self.export, "metric"))
+
+        cache.set(self.export, "metric", "value")
+        for name in os.listdir(self.cache_dir):
+            os.remove(os.path.join(self.cache_dir, name))
+        os.rmdir(self.cache_dir)
+        self.assertIsNone(cache.get(self.export, "metric"))
+        cache.set(self.export, "metric", "again")
+        self.assertEqual(cache.get(self.export, "metric"), "again")
+
+
+if __name__ == "__main__":
+    unittest.main()
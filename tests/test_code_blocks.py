@@ -0,0 +1,53 @@
+"""Tests for the fenced code block tokenizer"""
+import unittest
+
+from rewind.utils.code_blocks import CodeBlock, iter_code_blocks, strip_code_blocks
+
+
+def blocks(text):
+    """the code blocks of a text as a list"""
+    return list(iter_code_blocks(text))
+
+
+class FenceTokenizerTest(unittest.TestCase):
+    """nested, tilde and unclosed fences"""
+
+    def test_labeled_and_unlabeled(self):
+        """the info string's first word is the language, lowercased; none is text"""
+        text = "Run:\n```Python title=x\nprint(1)\nprint(2)\n```\nand\n```\nls\n```\n"
+        self.assertEqual(blocks(text), [CodeBlock("python", 2, 18), CodeBlock("text", 1, 3)])
+
+    def test_nested_fence(self):
+        """a shorter or other fence inside a longer one is part of its body"""
+        text = "````markdown\n```python\nx = 1\n```\n~~~\n````\nafter"
+        self.assertEqual(blocks(text), [CodeBlock("markdown", 4, 24)])
+        self.assertEqual(strip_code_blocks(text), "\n\nafter")
+
+    def test_tilde_fence(self):
+        """tildes open blocks that backtick lines do not close"""
+        text = "~~~ bash\necho ```\n```\n~~~~\n"
+        self.assertEqual(blocks(text), [CodeBlock("bash", 2, 13)])
+
+    def test_closing_fence_with_info_does_not_close(self):
+        """a fence line with an info string opens nothing inside a block"""
+        text = "```js\na()\n```js\nb()\n```\n"
+        self.assertEqual(blocks(text), [CodeBlock("js", 3, 14)])
+
+    def test_unclosed_fence(self):
+        """an unclosed block runs to the end, a bare fence on the last line counts not"""
+        self.assertEqual(blocks("```go\nfunc main() {}\n"), [CodeBlock("go", 1, 15)])
+        self.assertEqual(blocks("Here it is:\n```\n"), [])
+        self.assertEqual(blocks("Here it is:\n```"), [])
+
+    def test_inline_and_indented_backticks(self):
+        """backticks in the info string are inline code; four spaces are no fence"""
+        self.assertEqual(blocks("```a``` and ```b```\n    ```\n    x\n    ```\n"), [])
+
+    def test_strip_keeps_text_without_fences(self):
+        """prose without blocks comes back unchanged"""
+        self.assertEqual(strip_code_blocks("no code here ``inline``"),
+                         "no code here ``inline``")
+
+
+if __name__ == "__main__":
+    unittest.main()
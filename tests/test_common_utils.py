@@ -0,0 +1,172 @@
+"""Tests for Qwen interaction chain reconstruction"""
+# The reference implementation is kept verbatim on purpose
+# pylint: disable=duplicate-code
+import random
+import unittest
+
+from rewind.utils.common_utils import (
+    build_interaction_chain,
+    find_parent_message,
+    process_message_fragments,
+)
+
+SESSION_SIZE = 10_000
+
+
+def reference_chain(messages):
+    """The linear-scan implementation build_interaction_chain replaced, as dicts"""
+    if not messages:
+        return []
+
+    interaction_chain = []
+    current_msg = messages[-1]
+
+    while current_msg:
+        fragments, model = process_message_fragments(current_msg)
+        if not fragments and current_msg.get("role", "") == "assistant":
+            break
+
+        interaction_chain.append({
+            'id': current_msg.get("id", ""),
+            'message': {
+                "model": model,
+                "fragments": [fragment.to_dict() for fragment in fragments]
+            }
+        })
+
+        parent_id = current_msg.get("parentId", "-1")
+        if not parent_id or parent_id == "-1":
+            break
+
+        current_msg = find_parent_message(messages, parent_id)
+        if not current_msg:
+            break
+
+    interaction_chain.reverse()
+    return interaction_chain
+
+
+def as_dicts(chain):
+    """typed Message chain as the record dicts the reference builds"""
+    return [message.to_dict() for message in chain]
+
+
+def make_message(index, parent_id, rng, empty_rate=0.01):
+    """A user or assistant message in Qwen export format"""
+    if index % 2 == 0:
+        return {
+            "id": f"m{index}",
+            "role": "user",
+            "content": f"question {index}",
+            "models": ["qwen3-max"],
+            "parentId": parent_id,
+        }
+    content_list = [{"phase": "answer", "content": f"answer {index}"}]
+    if rng.random() < 0.3:
+        content_list.insert(0, {"phase": "think", "content": f"thinking {index}"})
+    if rng.random() < empty_rate:
+        # An unfinished answer, which ends the chain
+        content_list = []
+    return {
+        "id": f"m{index}",
+        "role": "assistant",
+        "model": "qwen3-max",
+        "content_list": content_list,
+        "parentId": parent_id,
+    }
+
+
+def linear_session(size, rng):
+    """one straight conversation without unfinished answers"""
+    return [make_message(i, f"m{i - 1}" if i else None, rng, empty_rate=0)
+            for i in range(size)]
+
+
+def branching_session(size, rng):
+    """every message answers a random earlier one, like edits and regenerations"""
+    return [make_message(i, f"m{rng.randrange(i)}" if i else None, rng) for i in range(size)]
+
+
+def regenerated_session(size, rng):
+    """a long conversation where some answers were regenerated into side branches"""
+    messages = []
+    main_parent = None
+    for i in range(size):
+        parent_id = main_parent
+        if messages and rng.random() < 0.2:
+            parent_id = messages[rng.randrange(len(messages))]["id"]
+        messages.append(make_message(i, parent_id, rng))
+        if parent_id == main_parent:
+            main_parent = messages[-1]["id"]
+    return messages
+
+
+class BuildInteractionChainTest(unittest.TestCase):
+    """build_interaction_chain must match the linear-scan implementation"""
+
+    def setUp(self):
+        self.rng = random.Random(20240101)
+
+    def test_empty_session(self):
+        """no messages, no chain"""
+        self.assertEqual(build_interaction_chain([]), [])
+        self.assertEqual(build_interaction_chain([], all_branches=True), [])
+
+    def test_matches_reference_on_linear_session(self):
+        """a 10k message conversation without branches"""
+        messages = linear_session(SESSION_SIZE, self.rng)
+        self.assertEqual(as_dicts(build_interaction_chain(messages)),
+                         reference_chain(messages))
+
+    def test_matches_reference_on_branching_sessions(self):
+        """10k message sessions with random and regeneration branches"""
+        for make_session in (branching_session, regenerated_session):
+            messages = make_session(SESSION_SIZE, self.rng)
+            self.assertEqual(as_dicts(build_interaction_chain(messages)),
+                         reference_chain(messages))
+
+    def test_matches_reference_after_shuffle(self):
+        """parents do not have to come before their children"""
+        messages = branching_session(SESSION_SIZE, self.rng)
+        last = messages[-1]
+        rest = messages[:-1]
+        self.rng.shuffle(rest)
+        messages = rest + [last]
+        self.assertEqual(as_dicts(build_interaction_chain(messages)),
+                         reference_chain(messages))
+
+    def test_duplicate_ids_resolve_to_first_message(self):
+        """like find_parent_message, the first message with an ID is the parent"""
+        messages = [
+            make_message(0, None, self.rng),
+            {"id": "m0", "role": "user", "content": "duplicate", "parentId": None},
+            make_message(2, "m0", self.rng),
+        ]
+        self.assertEqual(as_dicts(build_interaction_chain(messages)),
+                         reference_chain(messages))
+
+    def test_all_branches(self):
+        """every leaf gets the chain the reference builds when that leaf is last"""
+        messages = branching_session(SESSION_SIZE, self.rng)
+        branches = build_interaction_chain(messages, all_branches=True)
+
+        parent_ids = {msg["parentId"] for msg in messages}
+        leaves = [msg for msg in messages if msg["id"] not in parent_ids]
+        self.assertEqual(len(branches), len(leaves))
+        self.assertEqual(as_dicts(branches[-1]), as_dicts(build_interaction_chain(messages)))
+
+        for leaf, branch in list(zip(leaves, branches))[:50]:
+            reordered = [msg for msg in messages if msg is not leaf] + [leaf]
+            self.assertEqual(as_dicts(branch), reference_chain(reordered))
+
+    def test_parent_cycle_terminates(self):
+        """looping parent links stop after one pass over the session"""
+        messages = [
+            {"id": "a", "role": "user", "content": "a", "parentId": "b"},
+            {"id": "b", "role": "user", "content": "b", "parentId": "a"},
+        ]
+        self.assertEqual(len(build_interaction_chain(messages)), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
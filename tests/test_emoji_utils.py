@@ -0,0 +1,46 @@
+"""Tests for counting emojis as whole sequences"""
+import unittest
+
+from rewind.utils.emoji_utils import count_emojis, iter_emojis
+
+FAMILY = "\U0001f468\u200d\U0001f469\u200d\U0001f467"  # man, woman, girl joined by ZWJ
+FLAG_CN = "\U0001f1e8\U0001f1f3"
+KEYCAP_ONE = "1\ufe0f\u20e3"
+THUMBS_UP_MEDIUM = "\U0001f44d\U0001f3fd"
+HEART = "\u2764\ufe0f"
+
+
+class CountEmojisTest(unittest.TestCase):
+    """ZWJ, flag, keycap and skin-tone sequences count once, fully qualified"""
+
+    def counts(self, text):
+        """per-emoji counts of a text"""
+        stats = {}
+        count_emojis(text, stats)
+        return stats
+
+    def test_zwj_sequence(self):
+        """a family counts as itself, not as its members"""
+        self.assertEqual(self.counts(f"we {FAMILY} and {FAMILY}"), {FAMILY: 2})
+
+    def test_flag(self):
+        """two regional indicators are one flag"""
+        self.assertEqual(self.counts(f"{FLAG_CN}!"), {FLAG_CN: 1})
+
+    def test_keycap(self):
+        """digits only count before a keycap, with or without U+FE0F"""
+        self.assertEqual(self.counts(f"step {KEYCAP_ONE} of 3, then 1\u20e3"), {KEYCAP_ONE: 2})
+        self.assertEqual(self.counts("2024 #1 *"), {})
+
+    def test_skin_tone(self):
+        """a modifier belongs to the emoji before it"""
+        self.assertEqual(self.counts(f"{THUMBS_UP_MEDIUM}\U0001f44d"),
+                         {THUMBS_UP_MEDIUM: 1, "\U0001f44d": 1})
+
+    def test_unqualified_counts_as_fully_qualified(self):
+        """a heart without U+FE0F is counted under the qualified spelling"""
+        self.assertEqual(list(iter_emojis(f"\u2764 {HEART}")), [HEART, HEART])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+"""Tests for integer settings read from the environment"""
+import unittest
+from unittest import mock
+
+from rewind.utils.env_utils import env_int
+from rewind.utils.cache_utils import DEFAULT_MAX_ENTRIES, MAX_ENTRIES_ENV, CacheManager
+from rewind.utils.language_pool import WORKERS_ENV, default_worker_count
+from rewind.data_process import session_cache
+from rewind.data_process.sharded import SHARD_WORKERS_ENV, default_shard_workers
+
+NAME = "REWIND_TEST_INT"
+
+
+class EnvIntTest(unittest.TestCase):
+    """env_int must fall back to its default for unset and malformed values"""
+
+    def test_set_and_unset(self):
+        """integers are parsed, unset and blank values give the default silently"""
+        for environ, expected in [({NAME: "4"}, 4), ({NAME: " -2 "}, -2), ({}, 7),
+                                  ({NAME: "  "}, 7)]:
+            with self.subTest(environ=environ), mock.patch.dict("os.environ", environ), \
+                    self.assertNoLogs("rewind.utils.env_utils"):
+                self.assertEqual(env_int(NAME, 7), expected)
+
+    def test_malformed(self):
+        """a value that is not an integer gives the default and a warning"""
+        for value in ("four", "1.5", "8 workers"):
+            with self.subTest(value=value), mock.patch.dict("os.environ", {NAME: value}), \
+                    self.assertLogs("rewind.utils.env_utils", "WARNING"):
+                self.assertEqual(env_int(NAME, 7), 7)
+
+    def test_worker_count(self):
+        """a malformed REWIND_DETECT_WORKERS uses the fallback instead of raising"""
+        with mock.patch.dict("os.environ", {WORKERS_ENV: "all"}), \
+                self.assertLogs("rewind.utils.env_utils", "WARNING"):
+            self.assertEqual(default_worker_count(3), 3)
+        with mock.patch.dict("os.environ", {WORKERS_ENV: "0"}):
+            self.assertEqual(default_worker_count(3), 1)
+
+    def test_shard_workers(self):
+        """a malformed REWIND_SHARD_WORKERS scans in-process instead of raising"""
+        with mock.patch.dict("os.environ", {SHARD_WORKERS_ENV: "max"}), \
+                self.assertLogs("rewind.utils.env_utils", "WARNING"):
+            self.assertEqual(default_shard_workers(), 1)
+        with mock.patch.dict("os.environ", {SHARD_WORKERS_ENV: "4"}):
+            self.assertEqual(default_shard_workers(), 4)
+
+    def test_cache_caps(self):
+        """a malformed cache cap keeps its default instead of failing the import"""
+        with mock.patch.dict("os.environ", {MAX_ENTRIES_ENV: "4k"}), \
+                self.assertLogs("rewind.utils.env_utils", "WARNING"):
+            self.assertEqual(CacheManager("unused").max_entries, DEFAULT_MAX_ENTRIES)
+
+    def test_session_cache_cap(self):
+        """a malformed REWIND_SESSION_CACHE_MAX_MB keeps the default cap"""
+        with mock.patch.dict("os.environ", {session_cache.SESSION_CACHE_MAX_MB_ENV: "1GB"}), \
+                mock.patch.object(session_cache, "_session_cache", None), \
+                self.assertLogs("rewind.utils.env_utils", "WARNING"):
+            self.assertEqual(session_cache.get_session_cache().max_bytes,
+                             session_cache.DEFAULT_SESSION_CACHE_MAX_MB * 1024 * 1024)
+
+
+if __name__ == "__main__":
+    unittest.main()
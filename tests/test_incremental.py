@@ -0,0 +1,102 @@
+"""Tests for analyzing a re-export from the stored partials of an earlier export"""
+import os
+import random
+import tempfile
+import unittest
+
+from rewind.utils.providers import ProviderType
+from rewind.utils.conversation_model import Fragment, Message, Session
+from rewind.utils.language_pool import LanguageDetectionPool
+from rewind.data_process.accumulators import scan_sessions
+from rewind.data_process.analysis_session import default_accumulators
+from rewind.data_process.incremental import IncrementalStore, incremental_metrics
+from tests.test_accumulators import comparable, make_session
+
+
+def without_messages(value):
+    """metrics with every session replaced by its record minus the messages"""
+    if isinstance(value, Session):
+        record = value.to_record()
+        return ("session", record[:7] + record[8:])
+    if isinstance(value, dict):
+        return {key: without_messages(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [without_messages(item) for item in value]
+    return value
+
+
+class IncrementalMetricsTest(unittest.TestCase):
+    """metrics rebased from a stored export must equal a full scan, key order included"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.store = IncrementalStore(os.path.join(self.directory.name, "store.sqlite3"), "test")
+        self.pool = LanguageDetectionPool(workers=1)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def analyze(self, name, sessions):
+        """incremental metrics of an export file holding its name"""
+        path = os.path.join(self.directory.name, name)
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(name)
+        return incremental_metrics(sessions, path, ProviderType.DEEPSEEK, self.store, self.pool)
+
+    def full_scan(self, sessions):
+        """every metric of one pass, as incremental_metrics reports them"""
+        metrics = scan_sessions(sessions, default_accumulators(self.pool))
+        metrics.pop("code_language_count", None)
+        return metrics
+
+    def assert_equal_to_full_scan(self, incremental, sessions):
+        """same metrics in the same key order; record holders are stand-ins without messages"""
+        full = self.full_scan(sessions)
+        for name, value in full.items():
+            with self.subTest(metric=name):
+                self.assertEqual(comparable(without_messages(incremental[name])),
+                                 comparable(without_messages(value)))
+
+    def test_reexport_with_changes(self):
+        """sessions added in front, dropped, reordered and rewritten"""
+        rng = random.Random(20240103)
+        first = [make_session(index, rng) for index in range(120)]
+        self.assert_equal_to_full_scan(self.analyze("first.json", first), first)
+
+        second = [make_session(index, rng) for index in range(1000, 1030)] + first[40:]
+        rng.shuffle(second)
+        second[5:5] = [make_session(5, rng)]
+        self.assert_equal_to_full_scan(self.analyze("second.json", second), second)
+
+    def test_new_session_in_front_leads_key_order(self):
+        """keys first seen in a new leading session come first, as in a full scan"""
+        rng = random.Random(11)
+        first = [make_session(index, rng) for index in range(20)]
+        self.analyze("first.json", first)
+        second = [make_session(500, random.Random(12))] + first
+        self.assert_equal_to_full_scan(self.analyze("second.json", second), second)
+
+    def test_dropped_session_leaves_zero_fields(self):
+        """an empty code block and an empty fragment still count once their twins are gone"""
+        def session(index, think, response):
+            return Session(f"s{index}", f"2024-05-0{index}T10:00:00+08:00",
+                           f"2024-05-0{index}T10:00:00+08:00",
+                           [Message(f"{index}-0", "deepseek-chat", [Fragment("REQUEST", "hi")]),
+                            Message(f"{index}-1", "deepseek-reasoner",
+                                    [Fragment("THINK", think), Fragment("RESPONSE", response)])],
+                           str(index))
+
+        first = [session(1, "", "```python\n```"),
+                 session(2, "let me think", "```python\nprint(1)\n```"),
+                 session(3, "", "done")]
+        self.analyze("first.json", first)
+        second = [first[0], first[2]]
+        incremental = self.analyze("second.json", second)
+        self.assertEqual(incremental["code_block_stats"],
+                         {"python": {"blocks": 1, "lines": 0, "bytes": 0}})
+        self.assertEqual(incremental["count_chars"]["deepseek-reasoner_THINK"], 0)
+        self.assert_equal_to_full_scan(incremental, second)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+"""Tests for scanning fragments for every word list at once"""
+import random
+import unittest
+
+from rewind.utils.keyword_scanner import DEFAULT_WORD_LISTS, KeywordScanner
+
+# Nested, overlapping and regex-special words
+TRICKY_LISTS = {
+    "polite": ["thank", "thank you", "thanks", "请", "请问", "a.b", "(x)"],
+    "refuse": ["can't", "can", "ank", "问题", "x)"],
+    "empty": [],
+}
+
+
+def naive_scan(word_lists, text):
+    """words found per list with one `in` test per word, as the analysis did before"""
+    hits = {}
+    for name, words in word_lists.items():
+        found = [word for word in dict.fromkeys(words) if word and word in text]
+        if found:
+            hits[name] = found
+    return hits
+
+
+def random_texts(word_lists, count, seed=0):
+    """texts mixing listed words, pieces of them and filler"""
+    generator = random.Random(seed)
+    words = [word for words in word_lists.values() for word in words if word]
+    pieces = words + [word[:-1] for word in words if len(word) > 1] + \
+        [" ", "\n", "ok", "然后", "😀", ".", "t", "请 "]
+    return [" ".join(generator.choices(pieces, k=generator.randint(0, 12)))
+            for _ in range(count)]
+
+
+class KeywordScannerTest(unittest.TestCase):
+    """KeywordScanner.scan must equal a naive `in` scan, in list order"""
+
+    def check(self, word_lists, texts):
+        """compare scan and contains_any with the naive scan on every text"""
+        scanner = KeywordScanner(word_lists)
+        for text in texts:
+            with self.subTest(text=text):
+                expected = naive_scan(word_lists, text)
+                self.assertEqual(scanner.scan(text), expected)
+                for name in word_lists:
+                    self.assertEqual(scanner.contains_any(text, name), name in expected)
+
+    def test_default_lists(self):
+        """the politeness and refusal lists the analysis uses"""
+        self.check(DEFAULT_WORD_LISTS, random_texts(DEFAULT_WORD_LISTS, 100))
+
+    def test_overlapping_words(self):
+        """prefixes, words inside words and regex metacharacters"""
+        texts = ["thank you", "thanks", "请问问题", "a.b (x)", "axb", "can't", "tank"]
+        self.check(TRICKY_LISTS, texts + random_texts(TRICKY_LISTS, 100, seed=1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+"""Tests for the memoized language detection results"""
+import os
+import tempfile
+import unittest
+
+from rewind.utils.language_cache import LanguageCache
+
+
+class LanguageCacheTest(unittest.TestCase):
+    """hits, misses and evictions of LanguageCache, with its file in a temporary directory"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.db_path = os.path.join(self.directory.name, "languages.sqlite3")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_hit_and_miss(self):
+        """a stored text is a memory hit, any other text a miss"""
+        cache = LanguageCache(self.db_path, "v1")
+        self.assertIsNone(cache.get("hello there"))
+        cache.put("hello there", "en")
+        self.assertEqual(cache.get("hello there"), "en")
+        self.assertIsNone(cache.get("hello there!"))
+        self.assertEqual((cache.stats.memory_hits, cache.stats.disk_hits, cache.stats.misses),
+                         (1, 0, 2))
+
+    def test_eviction_falls_back_to_disk(self):
+        """entries evicted from memory are read back from the file, in memory only they are lost"""
+        cache = LanguageCache(self.db_path, "v1", max_entries=2)
+        memory_only = LanguageCache(None, "v1", max_entries=2)
+        for text, language in [("bonjour", "fr"), ("hallo", "de"), ("ciao", "it")]:
+            cache.put(text, language)
+            memory_only.put(text, language)
+        cache.flush()
+        self.assertEqual(cache.get("bonjour"), "fr")
+        self.assertEqual(cache.stats.disk_hits, 1)
+        self.assertEqual(cache.get("bonjour"), "fr")
+        self.assertEqual(cache.stats.memory_hits, 1)
+        self.assertIsNone(memory_only.get("bonjour"))
+        self.assertEqual(memory_only.get("ciao"), "it")
+
+    def test_file_survives_and_detector_change_empties_it(self):
+        """a new cache on the same file hits, unless the detector tag changed"""
+        cache = LanguageCache(self.db_path, "v1")
+        cache.put("こんにちは", "ja")
+        cache.flush()
+        self.assertEqual(LanguageCache(self.db_path, "v1").get("こんにちは"), "ja")
+        self.assertIsNone(LanguageCache(self.db_path, "v2").get("こんにちは"))
+        self.assertIsNone(LanguageCache(self.db_path, "v1").get("こんにちは"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+"""Tests for the sampling mode of language detection"""
+import os
+import unittest
+from unittest import mock
+
+from rewind.utils import language_utils
+from rewind.utils.language_utils import SAMPLE_ENV, detection_sample
+
+PROSE = "Une phrase en français. " * 200
+CODE = "```python\nprint('hello world, this is english code')\n```\n"
+
+
+class SamplingModeTest(unittest.TestCase):
+    """whole texts unless REWIND_DETECT_SAMPLE_CHARS opts in"""
+
+    @staticmethod
+    def configured(value):
+        """sample size read with REWIND_DETECT_SAMPLE_CHARS set to value, None for unset"""
+        with mock.patch.dict("os.environ"):
+            os.environ.pop(SAMPLE_ENV, None)
+            if value is not None:
+                os.environ[SAMPLE_ENV] = value
+            return language_utils._configured_sample_chars()  # pylint: disable=protected-access
+
+    def test_off_by_default(self):
+        """unset, zero, negative and malformed values keep whole texts"""
+        for value in (None, "", "0", "-5"):
+            with self.subTest(value=value):
+                self.assertEqual(self.configured(value), 0)
+        with self.assertLogs("rewind.utils.env_utils", "WARNING"):
+            self.assertEqual(self.configured("1k"), 0)
+        self.assertEqual(self.configured("250"), 250)
+
+    def test_whole_text(self):
+        """sample size 0 reads the text as it is, code included"""
+        text = CODE + PROSE
+        self.assertEqual(detection_sample(text, 0), text)
+
+    def test_sample(self):
+        """code is dropped and long prose cut to a start and a middle window"""
+        sample = detection_sample(PROSE + CODE + PROSE, 100)
+        self.assertNotIn("print", sample)
+        self.assertEqual(len(sample), 201)
+        self.assertTrue(PROSE.startswith(sample[:100]))
+        self.assertEqual(detection_sample(CODE, 100), CODE)
+
+
+if __name__ == "__main__":
+    unittest.main()
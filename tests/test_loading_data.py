@@ -0,0 +1,91 @@
+"""Tests for streaming the sessions of an export"""
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from rewind.utils.providers import ProviderType
+from rewind.data_process.loading_data import (SESSION_ARRAY_KEYS, iter_sessions,
+                                              _JsonStreamReader)
+
+CLAUDE_EXPORT = [{
+    "uuid": "a1", "name": "Greeting \"chat\"", "created_at": "2025-01-02T03:04:05Z",
+    "updated_at": "2025-01-02T05:06:07Z",
+    "chat_messages": [{"uuid": "m1", "sender": "human", "text": "你好 😀 \\u0041"},
+                      {"uuid": "m2", "sender": "assistant", "text": "1e-3 is 0.001"}],
+}, {"uuid": "a2", "name": "", "chat_messages": [], "score": -1.5e10}]
+
+
+class CountingReader(io.StringIO):
+    """StringIO remembering how many characters were read"""
+
+    def __init__(self, text):
+        super().__init__(text)
+        self.characters_read = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.characters_read += len(chunk)
+        return chunk
+
+
+class IterSessionsTest(unittest.TestCase):
+    """iter_sessions must yield exactly what json.load reads"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.claude_path = os.path.join(self.directory.name, "claude.json")
+        with open(self.claude_path, "w", encoding="utf-8") as file:
+            json.dump(CLAUDE_EXPORT, file, ensure_ascii=False)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def examples(self):
+        """(path, provider) of every provider's example"""
+        return [("data/example_deepseek.json", ProviderType.DEEPSEEK),
+                ("data/example_qwen.json", ProviderType.QWEN),
+                (self.claude_path, ProviderType.CLAUDE)]
+
+    @staticmethod
+    def loaded_sessions(path, provider):
+        """the sessions of an export read in one piece"""
+        with open(path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+        key = SESSION_ARRAY_KEYS.get(provider)
+        return data[key] if key is not None else data
+
+    def test_matches_json_load(self):
+        """every provider's example"""
+        for path, provider in self.examples():
+            with self.subTest(provider=provider.value):
+                self.assertEqual(list(iter_sessions(path, provider)),
+                                 self.loaded_sessions(path, provider))
+
+    def test_small_chunks(self):
+        """values, strings and escapes cut at every few characters"""
+        for path, provider in self.examples():
+            for chunk_size in (1, 7, 64):
+                with self.subTest(provider=provider.value, chunk_size=chunk_size):
+                    with open(path, "r", encoding="utf-8") as file:
+                        reader = _JsonStreamReader(file, chunk_size)
+                        key = SESSION_ARRAY_KEYS.get(provider)
+                        if key is not None:
+                            self.assertTrue(reader.seek_key(key))
+                        sessions = list(reader.iter_array())
+                    self.assertEqual(sessions, self.loaded_sessions(path, provider))
+
+    def test_malformed_session_stops_early(self):
+        """a syntax error inside the buffer is raised without reading the rest of the file"""
+        sessions = [{"id": str(number), "text": "x" * 100} for number in range(2000)]
+        text = json.dumps(sessions).replace('"id": "1"', '"id": "1" "extra"', 1)
+        file = CountingReader(text)
+        reader = _JsonStreamReader(file, chunk_size=1024)
+        with self.assertRaises(json.JSONDecodeError):
+            list(reader.iter_array())
+        self.assertLess(file.characters_read, len(text) // 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
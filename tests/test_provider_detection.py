@@ -0,0 +1,111 @@
+"""Tests for telling the provider of an export from its first bytes"""
+import io
+import json
+import os
+import tempfile
+import unittest
+
+import deepseek
+
+from rewind.utils.providers import ProviderType
+from rewind.data_process.loading_data import detect_provider
+from rewind.cli.handlers import get_provider_enum
+
+OPENAI_EXPORT = [{
+    "title": "Greeting", "create_time": 1704067200.0, "update_time": 1704067260.0,
+    "mapping": {"a": {"id": "a", "message": None, "parent": None, "children": []}},
+    "current_node": "a",
+}]
+
+CLAUDE_EXPORT = [{
+    "uuid": "a1", "name": "Greeting", "created_at": "2025-01-02T03:04:05Z",
+    "updated_at": "2025-01-02T05:06:07Z",
+    "chat_messages": [{"uuid": "m1", "sender": "human", "text": "你好 😀"}],
+}]
+
+
+class DetectProviderTest(unittest.TestCase):
+    """detect_provider must name the provider or raise ValueError, reading only a prefix"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name, content):
+        """a file of the temporary directory holding the text or bytes"""
+        path = os.path.join(self.directory.name, name)
+        with open(path, "wb") as file:
+            file.write(content if isinstance(content, bytes) else content.encode("utf-8"))
+        return path
+
+    def test_bundled_examples(self):
+        """the DeepSeek and Qwen examples shipped in data/"""
+        self.assertEqual(detect_provider("data/example_deepseek.json"), ProviderType.DEEPSEEK)
+        self.assertEqual(detect_provider("data/example_qwen.json"), ProviderType.QWEN)
+
+    def test_openai_and_claude(self):
+        """OpenAI's mapping without inserted_at, Claude's chat_messages"""
+        self.assertEqual(detect_provider(self.write("openai.json", json.dumps(OPENAI_EXPORT))),
+                         ProviderType.OPENAI)
+        self.assertEqual(detect_provider(self.write("claude.json", json.dumps(CLAUDE_EXPORT))),
+                         ProviderType.CLAUDE)
+
+    def test_truncated_prefix(self):
+        """a prefix cutting a string or a character still tells the first session's keys"""
+        content = ("\ufeff" + json.dumps(CLAUDE_EXPORT, ensure_ascii=False)).encode("utf-8")
+        cut = content.index("😀".encode("utf-8")) + 2
+        path = self.write("claude.json", content)
+        self.assertEqual(detect_provider(path, prefix_bytes=cut), ProviderType.CLAUDE)
+
+    def test_keys_of_nested_values_are_ignored(self):
+        """only the first session's own keys count, not those of its messages"""
+        export = [{"id": "1", "messages": [{"chat_messages": [], "mapping": {}}]}]
+        with self.assertRaises(ValueError):
+            detect_provider(self.write("other.json", json.dumps(export)))
+
+    def test_unknown_exports(self):
+        """other JSON documents fail without being parsed"""
+        for content in ("[]", "{}", '{"data": []}', "[1, 2]", '{"foo": {"mapping": 1}}', ""):
+            with self.subTest(content=content):
+                with self.assertRaises(ValueError):
+                    detect_provider(self.write("unknown.json", content))
+
+
+class UnsupportedProviderTest(unittest.TestCase):
+    """a detected provider without a normalizer is refused before analysis"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.openai_path = os.path.join(self.directory.name, "openai.json")
+        with open(self.openai_path, "w", encoding="utf-8") as file:
+            json.dump(OPENAI_EXPORT, file)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_cli(self):
+        """auto and an explicit openai both raise a ValueError the handlers print"""
+        for provider in ("auto", "openai"):
+            with self.subTest(provider=provider):
+                with self.assertRaisesRegex(ValueError, "openai exports are not supported"):
+                    get_provider_enum(provider, self.openai_path)
+        self.assertEqual(get_provider_enum("auto", "data/example_qwen.json"), ProviderType.QWEN)
+
+    def test_upload(self):
+        """the Flask upload answers 400 and saves nothing"""
+        client = deepseek.app.test_client()
+        with open(self.openai_path, "rb") as file:
+            content = file.read()
+        for provider in ("auto", "openai"):
+            with self.subTest(provider=provider):
+                response = client.post("/api/upload", content_type="multipart/form-data",
+                                       data={"file": (io.BytesIO(content), "openai.json"),
+                                             "provider_type": provider})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("not supported", response.get_json()["error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+"""Tests for settling languages from the script histogram"""
+import unittest
+
+from langdetect import detect
+
+from rewind.utils import script_utils
+from rewind.utils.language_utils import chinese_dominant, detect_language_uncached
+from rewind.utils.script_utils import classify_by_script, script_counts
+
+SETTLED = {
+    "ko": "안녕하세요, 오늘 날씨가 정말 좋네요. 산책하러 갈까요?",
+    # Kana only: kanji outnumbering ASCII letters is Chinese by the chinese_dominant rule
+    "ja": "こんにちは、おげんきですか。きょうはとてもいいてんきですね。",
+    "th": "สวัสดีครับ วันนี้อากาศดีมาก ไปเดินเล่นกันไหม",
+    "el": "Γεια σας, ο καιρός είναι πολύ ωραίος σήμερα. Πάμε για περίπατο;",
+    "he": "שלום, מזג האוויר היום נהדר. נצא לטיול?",
+    "en": "Could you please explain what this function does and why it would fail?",
+}
+
+MIXED_CJK_LATIN = [
+    "我在用Python写一个爬虫，requests库总是超时",
+    "请帮我 review 一下这段 code，谢谢",
+    "Please translate: 你好",
+    "API 返回 500 error",
+]
+
+AMBIGUOUS = [
+    "Bonjour, pouvez-vous m'aider avec ce problème de code ?",
+    "Привет, как дела? Помоги мне с этим кодом.",
+    "ok",
+]
+
+
+class ClassifyByScriptTest(unittest.TestCase):
+    """the fast path must answer like the slow path, or defer to it"""
+
+    def test_agrees_with_langdetect(self):
+        """unambiguous scripts give what seeded langdetect gives"""
+        for language, text in SETTLED.items():
+            with self.subTest(language=language):
+                self.assertEqual(classify_by_script(text), language)
+                self.assertEqual(detect(text), language)
+
+    def test_mixed_cjk_latin_follows_chinese_dominant(self):
+        """Han against ASCII letters decides like chinese_dominant, else defers"""
+        for text in MIXED_CJK_LATIN:
+            with self.subTest(text=text):
+                settled = classify_by_script(text)
+                if chinese_dominant(text):
+                    self.assertEqual(settled, "zh-cn")
+                else:
+                    self.assertNotEqual(settled, "zh-cn")
+                    self.assertEqual(detect_language_uncached(text, 0),
+                                     settled if settled is not None else detect(text))
+
+    def test_ambiguous_scripts_defer(self):
+        """accented Latin, Cyrillic and short texts go to langdetect"""
+        for text in AMBIGUOUS:
+            with self.subTest(text=text):
+                self.assertIsNone(classify_by_script(text))
+
+    def test_regex_counts_match_numpy(self):
+        """the fallback without NumPy counts the same histogram"""
+        # pylint: disable=protected-access
+        for text in list(SETTLED.values()) + MIXED_CJK_LATIN + AMBIGUOUS + ["😀 ，。 \x00"]:
+            with self.subTest(text=text):
+                self.assertEqual(script_utils._script_counts_regex(text), script_counts(text))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+"""Tests for parsing timestamps once into epoch microseconds"""
+import unittest
+
+from rewind.utils.conversation_model import Fragment, Message, Session
+from rewind.utils.time_utils import MICROSECONDS, parse_timestamp
+from rewind.data_process.time_data import chat_themost
+
+# 2024-03-01T12:00:00Z in epoch microseconds
+NOON_UTC_US = 1709294400 * MICROSECONDS
+
+
+class ParseTimestampTest(unittest.TestCase):
+    """(UTC epoch microseconds, offset seconds) of Z, offset and naive strings"""
+
+    def test_zulu(self):
+        """a trailing Z is UTC"""
+        self.assertEqual(parse_timestamp("2024-03-01T12:00:00Z"), (NOON_UTC_US, 0))
+        self.assertEqual(parse_timestamp("2024-03-01T12:00:00.250000Z"),
+                         (NOON_UTC_US + 250000, 0))
+
+    def test_offset(self):
+        """the offset is kept and the instant moved to UTC"""
+        self.assertEqual(parse_timestamp("2024-03-01T20:00:00+08:00"),
+                         (NOON_UTC_US, 8 * 3600))
+        self.assertEqual(parse_timestamp("2024-03-01T06:30:00-05:30"),
+                         (NOON_UTC_US, -(5 * 3600 + 1800)))
+
+    def test_naive(self):
+        """a string without an offset is taken as UTC"""
+        self.assertEqual(parse_timestamp("2024-03-01T12:00:00"), (NOON_UTC_US, 0))
+        self.assertEqual(parse_timestamp("2024-03-01"), (NOON_UTC_US - 12 * 3600 * MICROSECONDS, 0))
+
+    def test_unparseable(self):
+        """garbage and non-strings give (None, 0)"""
+        for value in ("unknown", "", "2024-13-01T00:00:00", None):
+            with self.subTest(value=value):
+                self.assertEqual(parse_timestamp(value), (None, 0))
+
+
+class ClockFormatTest(unittest.TestCase):
+    """earliest_time and latest_time are HH:MM:SS in the timestamp's own offset"""
+
+    def test_earliest_and_latest(self):
+        """6 AM splits the day between latest (before) and earliest (after)"""
+        sessions = [Session(f"s{index}", inserted_at, inserted_at,
+                            [Message("m", "deepseek-chat", [Fragment("REQUEST", "hi")])],
+                            str(index))
+                    for index, inserted_at in enumerate(["2024-03-01T07:05:09+08:00",
+                                                         "2024-03-02T02:03:04+08:00",
+                                                         "2024-03-03T06:00:00Z"])]
+        result = chat_themost(sessions)
+        self.assertEqual(result["earliest_time"], "06:00:00")
+        self.assertIs(result["earliest_session"], sessions[2])
+        self.assertEqual(result["latest_time"], "02:03:04")
+        self.assertIs(result["latest_session"], sessions[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+"""Tests for bucketing timestamps in IANA time zones across DST changes"""
+import unittest
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from rewind.utils.conversation_model import Session
+from rewind.utils.timezones import zone_offsets
+from rewind.data_process.time_data import (chat_frequency_distribution,
+                                           count_per_hour_distribution, session_timeline)
+
+
+def sessions_at(*timestamps):
+    """message-less sessions inserted at the given ISO timestamps"""
+    return [Session(f"s{index}", timestamp, timestamp, [], str(index))
+            for index, timestamp in enumerate(timestamps)]
+
+
+def busy_hours(distribution):
+    """hours with at least one session"""
+    return {hour: count for hour, count in distribution.items() if count}
+
+
+class DstBucketTest(unittest.TestCase):
+    """hours and days of sessions either side of a DST change"""
+
+    def test_offsets_match_zoneinfo(self):
+        """the transition table agrees with zoneinfo each half hour around a change"""
+        for name, change in [("America/New_York", datetime(2024, 3, 10, 7)),
+                             ("Europe/Berlin", datetime(2024, 10, 27, 1))]:
+            zone = zone_offsets(name)
+            for step in range(-6, 7):
+                moment = (change + timedelta(minutes=30 * step)).replace(tzinfo=timezone.utc)
+                expected = moment.astimezone(ZoneInfo(name)).utcoffset()
+                with self.subTest(zone=name, moment=moment):
+                    self.assertEqual(zone.offset_at(int(moment.timestamp())),
+                                     int(expected.total_seconds()))
+
+    def test_spring_forward_hours(self):
+        """an hour apart in UTC, two hours apart on New York clocks"""
+        sessions = sessions_at("2024-03-10T06:30:00Z", "2024-03-10T07:30:00Z")
+        expected = {1: 1, 3: 1}
+        self.assertEqual(busy_hours(count_per_hour_distribution(sessions, "America/New_York")),
+                         expected)
+        self.assertEqual(busy_hours(session_timeline(sessions)
+                                    .count_per_hour_distribution("America/New_York")), expected)
+
+    def test_fall_back_day(self):
+        """22:30 UTC is the next day in Berlin summer time, the same day in winter time"""
+        sessions = sessions_at("2024-10-26T22:30:00Z", "2024-10-27T22:30:00Z")
+        expected = {"month_distribution": {"2024-10": 2},
+                    "day_distribution": {"2024-10-27": 2}}
+        self.assertEqual(chat_frequency_distribution(sessions, "Europe/Berlin"), expected)
+        self.assertEqual(session_timeline(sessions).chat_frequency_distribution("Europe/Berlin"),
+                         expected)
+
+
+if __name__ == "__main__":
+    unittest.main()